@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+"""
+Benchmarks for the syuppo package (not installed).
+
+Generate a synthetic emerge.log:
+    python -m benchmarks.generator --lines 500k /tmp/emerge.log
+Time the emerge.log parsers:
+    python -m benchmarks.run --sizes 50k 500k 5M
+Check and time tokenizing with worker processes:
+    python -m benchmarks.parallel --sizes 50k 500k --workers 4
+Delay of a dbus like reply while parsing in a thread or a process:
+    python -m benchmarks.latency --sizes 500k 5M
+Throughput and peak memory of the child output capture:
+    python -m benchmarks.capture --size 50M
+Delay from a cancel order to the running command being killed:
+    python -m benchmarks.cancel
+"""
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import sys
+import time
+import types
+import random
+import logging
+import argparse
+import resource
+import threading
+
+from benchmarks.run import ROOT
+
+
+# A fake emerge --pretend computing dependencies: a line then
+# nothing until killed
+FAKE_EMERGE = '''
+import time
+print('Calculating dependencies... ', flush=True)
+time.sleep(3600)
+'''
+
+
+def import_manager():
+    """
+    Import syuppo.manager, with empty portage modules when portage
+    isn't installed: BaseHandler._pexpect() doesn't use it.
+    :return:
+        The module.
+    """
+    try:
+        import portage
+    except ImportError:
+        for name, attributes in (('portage', ()),
+                                 ('portage.versions', ('pkgcmp', 'pkgsplit',
+                                                       'vercmp')),
+                                 ('portage.dbapi', ()),
+                                 ('portage.dbapi.porttree', ('portdbapi', )),
+                                 ('portage.dbapi.vartree', ('vardbapi', ))):
+            module = types.ModuleType(name)
+            for attribute in attributes:
+                setattr(module, attribute, None)
+            sys.modules.setdefault(name, module)
+    from syuppo import manager
+    return manager
+
+
+def handler():
+    """
+    The minimal object BaseHandler._pexpect() needs: the 'pretend'
+    attributes (and its logger name).
+    """
+    from syuppo.utils import WakeupFd
+
+    myself = types.SimpleNamespace()
+    myself._BaseHandler__logger_name = '::benchmarks.cancel::'
+    myself.pretend = {
+        'cancel'    :   False,
+        'cancelled' :   False,
+        'exit'      :   False,
+        'status'    :   'running',
+        'wakeup'    :   WakeupFd(),
+        'locks'     :   {
+            'cancel'    :   threading.Lock(),
+            'cancelled' :   threading.Lock(),
+            'status'    :   threading.Lock()
+            }
+        }
+    return myself
+
+
+def measure(tty, wakeup, wait, order='cancel'):
+    """
+    Run the fake emerge in a thread, ask to cancel (or exit) after 
+    wait seconds.
+    :param wakeup:
+        Run it with BaseHandler._pexpect() and wake it up with 
+        WakeupFd.set(), else with the former loop (1s poll timeout).
+    :param order:
+        'cancel' or 'exit'.
+    :return:
+        Tuple (seconds from the order to the child reaped, cpu 
+        seconds used by this process meanwhile, what the loop 
+        returned: 'exit' for _pexpect(), None for the former one).
+    """
+    from syuppo.utils import ChildCapture
+
+    pexpect = import_manager().BaseHandler._pexpect
+    myself = handler()
+    myattr = myself.pretend
+    stopped = [ ]
+
+    def former():
+        child = ChildCapture(sys.executable, [ '-c', FAKE_EMERGE ], tty=tty,
+                             online=lambda line: None)
+        while not myattr['cancel'] and not myattr['exit']:
+            if not child.read(1):
+                break
+        child.terminate()
+        stopped.append((time.perf_counter(), None))
+    
+    def current():
+        status = pexpect(myself, 'pretend', sys.executable,
+                         [ '-c', FAKE_EMERGE ], 'Stop pretend', 
+                         lambda line: None, tty=tty)
+        stopped.append((time.perf_counter(), status))
+
+    thread = threading.Thread(target=current if wakeup else former)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    thread.start()
+    time.sleep(wait)
+    start = time.perf_counter()
+    if order == 'exit':
+        myattr['exit'] = True
+    else:
+        myattr['cancel'] = 'world'
+    myattr['wakeup'].set()
+    thread.join()
+    end = resource.getrusage(resource.RUSAGE_SELF)
+    return (stopped[0][0] - start, end.ru_utime - usage.ru_utime
+                                   + end.ru_stime - usage.ru_stime,
+            stopped[0][1])
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmarks.cancel',
+                            description='Delay between a cancel order and'
+                            ' the running (fake) emerge being killed and'
+                            ' reaped, with the former 1s poll timeout and'
+                            ' with a wakeup fd. Fail if a wakeup delay is'
+                            ' over --limit.')
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='Cancels by mode. Default: %(default)s.')
+    parser.add_argument('--wait', type=float, default=1.5,
+                        help='Maximum seconds before a cancel (random'
+                        ' between a tenth and all of it).'
+                        ' Default: %(default)s.')
+    parser.add_argument('--limit', type=float, default=0.05,
+                        help='Maximum seconds allowed with a wakeup fd.'
+                        ' Default: %(default)s.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from syuppo.logger import addLoggingLevel
+
+    addLoggingLevel('DEBUG2', 9)
+    logging.basicConfig(level=logging.CRITICAL)
+
+    print(f"{'mode':>14} {'p50 ms':>8} {'max ms':>8} {'cpu ms/s':>9}")
+    failed = 0
+    for tty in True, False:
+        for wakeup in False, True:
+            rand = random.Random(0)
+            delays = [ ]
+            cpu = elapsed = 0
+            for _ in range(args.repeat):
+                wait = rand.uniform(args.wait / 10, args.wait)
+                delay, used, status = measure(tty, wakeup, wait)
+                if wakeup and not status == 'exit':
+                    failed += 1
+                delays.append(delay)
+                cpu += used
+                elapsed += wait + delay
+            delays.sort()
+            if wakeup and delays[-1] > args.limit:
+                failed += 1
+            name = (f"{'pty' if tty else 'pipe'}"
+                    f"-{'wakeup' if wakeup else 'timeout'}")
+            print(f'{name:>14} {delays[len(delays) // 2] * 1000:>8.2f}'
+                  f' {delays[-1] * 1000:>8.2f} {cpu / elapsed * 1000:>9.2f}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
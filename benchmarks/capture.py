@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import subprocess
+
+from benchmarks.generator import parse_size
+from benchmarks.run import ROOT
+
+
+# A fake emerge --pretend --verbose: print size bytes of
+# ebuild lines (by 1MiB writes, so the reader is the bottleneck)
+# then the 'Total:' line
+FAKE_EMERGE = '''
+import sys
+size = int(sys.argv[1])
+line = (b'[ebuild     U  ] dev-qt/qtwebengine-5.15.2_p20210521::gentoo'
+        b' [5.15.2_p20210406::gentoo] USE="alsa jumbo-build system-icu'
+        b' widgets -bindist -designer -geolocation -kerberos" 0 KiB\\n')
+block = line * (1048576 // len(line))
+written = 0
+while written < size:
+    sys.stdout.buffer.write(block)
+    written += len(block)
+sys.stdout.buffer.write(b'Total: 1234 packages (1234 upgrades), Size of'
+                        b' downloads: 0 KiB\\n')
+sys.stdout.buffer.flush()
+'''
+
+
+def legacy(args):
+    """
+    The former BaseHandler._pexpect() loop: pexpect on a pty,
+    one read_nonblocking(size=1) by byte, every thing kept.
+    :return:
+        Tuple (lines count, last line).
+    """
+    import io
+    import pexpect
+
+    child = pexpect.spawn(sys.executable, args=args, encoding='utf-8',
+                          timeout=None)
+    mycapture = io.StringIO()
+    child.logfile = mycapture
+    while not child.closed and child.isalive():
+        try:
+            child.read_nonblocking(size=1, timeout=1)
+        except pexpect.EOF:
+            break
+        except pexpect.TIMEOUT:
+            continue
+    mylog = mycapture.getvalue()
+    child.close()
+    lines = mylog.splitlines()
+    return len(lines), lines[-1]
+
+
+def kept(args, tty):
+    """
+    ChildCapture without online: every line is kept.
+    :return:
+        Tuple (lines count, last line).
+    """
+    from syuppo.utils import ChildCapture
+
+    child = ChildCapture(sys.executable, args, tty=tty)
+    while child.read(1):
+        pass
+    child.wait()
+    lines = child.lines()
+    return len(lines), lines[-1]
+
+
+def streamed(args, tty):
+    """
+    ChildCapture handing lines to online(), which keep only
+    the last one: the loop of BaseHandler._pexpect().
+    :return:
+        Tuple (lines count, last line).
+    """
+    from syuppo.utils import ChildCapture
+
+    last = [ 0, '' ]
+    def online(line):
+        last[0] += 1
+        last[1] = line
+    child = ChildCapture(sys.executable, args, tty=tty, online=online)
+    while child.read(1):
+        pass
+    child.wait()
+    return tuple(last)
+
+
+RUNS = {
+    'pexpect-1B'    :   legacy,
+    'kept-pty'      :   lambda args: kept(args, True),
+    'kept-pipe'     :   lambda args: kept(args, False),
+    'streamed-pty'  :   lambda args: streamed(args, True),
+    'streamed-pipe' :   lambda args: streamed(args, False)
+    }
+
+
+def child(name, size):
+    """
+    Capture size bytes from the fake emerge in this process
+    and print the result as json.
+    """
+    from syuppo.logger import addLoggingLevel
+
+    addLoggingLevel('DEBUG2', 9)
+    logging.basicConfig(level=logging.CRITICAL)
+
+    args = [ '-c', FAKE_EMERGE, str(size) ]
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    count, last = RUNS[name](args)
+    seconds = time.perf_counter() - start
+    end = resource.getrusage(resource.RUSAGE_SELF)
+    print(json.dumps({
+        'seconds'   :   seconds,
+        # Only this process, not the fake emerge
+        'cpu'       :   (end.ru_utime - usage.ru_utime
+                         + end.ru_stime - usage.ru_stime),
+        # Kilobytes on linux
+        'peak'      :   end.ru_maxrss,
+        'lines'     :   count,
+        'total'     :   last.startswith('Total: 1234')
+        }))
+
+
+def spawn(name, size):
+    """
+    Run one capture in a new process so peak memory is its own.
+    :return:
+        Dictionary, see child(), else False.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None,
+                                    (ROOT, env.get('PYTHONPATH'))))
+    proc = subprocess.run([ sys.executable, '-m', 'benchmarks.capture',
+                            '--child', name, str(size) ],
+                          cwd=ROOT, env=env, capture_output=True,
+                          text=True)
+    if proc.returncode:
+        print(f'{name} failed:\n{proc.stderr}', file=sys.stderr)
+        return False
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmarks.capture',
+                            description='Throughput and peak memory of the'
+                            ' child output capture against a fake emerge:'
+                            ' the former byte by byte pexpect loop and'
+                            ' ChildCapture on a pty and on pipes, keeping'
+                            ' every line or streaming them.')
+    parser.add_argument('--size', default='50M',
+                        help='Bytes printed by the fake emerge.'
+                        ' Default: %(default)s.')
+    parser.add_argument('--legacy-size', default='5M',
+                        help='Bytes for the byte by byte loop (50M take'
+                        ' minutes), 0 to skip it. Default: %(default)s.')
+    parser.add_argument('--runs', nargs='+', choices=list(RUNS),
+                        default=list(RUNS),
+                        help='Captures to run. Default: all.')
+    parser.add_argument('--child', nargs=2, metavar=('RUN', 'SIZE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child[0], int(args.child[1]))
+
+    print(f"{'capture':>13} {'MB':>4} {'seconds':>8} {'MB/s':>7}"
+          f" {'cpu s':>7} {'peak MB':>8} {'lines':>7} {'total':>5}")
+    failed = 0
+    for name in args.runs:
+        size = parse_size(args.size)
+        if name == 'pexpect-1B':
+            size = parse_size(args.legacy_size)
+            if not size:
+                continue
+        result = spawn(name, size)
+        if not result:
+            failed += 1
+            continue
+        # The former loop stop once the child exited, before the
+        # pty is drained: it can miss the end of the output
+        failed += not result['total'] and not name == 'pexpect-1B'
+        print(f"{name:>13} {size / 1e6:>4.0f} {result['seconds']:>8.3f}"
+              f" {size / 1e6 / result['seconds']:>7.1f}"
+              f" {result['cpu']:>7.3f} {result['peak'] / 1024:>8.1f}"
+              f" {result['lines']:>7} {str(result['total']):>5}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
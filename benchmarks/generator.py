@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import sys
+import random
+import argparse
+
+
+# Named sizes, see parse_size()
+SIZES = {
+    '50k'   :   50000,
+    '500k'  :   500000,
+    '5M'    :   5000000
+    }
+
+
+def parse_size(size):
+    """
+    Convert '50k', '5M' or '1234' to a number of lines.
+    """
+    if size in SIZES:
+        return SIZES[size]
+    multiplier = { 'k' : 1000, 'M' : 1000000 }.get(size[-1:], 1)
+    if multiplier > 1:
+        size = size[:-1]
+    return int(float(size) * multiplier)
+
+
+class EmergeLogGenerator:
+    """
+    Generate a realistic emerge.log: syncs, complete, partial,
+    incomplete and fragment world updates, --resume runs, parallel
+    emerges, oneshot emerges and depcleans. Same seed, same file.
+    """
+    categories = ('dev-libs', 'kde-apps', 'sys-apps', 'dev-qt',
+                  'media-libs', 'x11-libs', 'net-misc', 'app-misc')
+    repositories = ('gentoo', 'steam-overlay', 'guru', 'rage')
+
+    def __init__(self, seed=0, start=1569592862, world=0.08):
+        """
+        :param seed:
+            Seed of the random generator. Default 0.
+        :param start:
+            First timestamp. Default 1569592862.
+        :param world:
+            Weight of world updates against the others
+            runs (syncs: 0.35, oneshot: 0.3, depclean: 0.1).
+            Default 0.08.
+        """
+        self.random = random.Random(seed)
+        self.timestamp = start
+        self.lines = [ ]
+        self.runs = {
+            'sync'              :   0.35,
+            'oneshot'           :   0.3,
+            'depclean'          :   0.1,
+            'world_complete'    :   world * 0.35,
+            'world_incomplete'  :   world * 0.15,
+            'world_partial'     :   world * 0.15,
+            'world_fragment'    :   world * 0.1,
+            'world_resume'      :   world * 0.1,
+            'world_parallel'    :   world * 0.1,
+            'world_aborted'     :   world * 0.05
+            }
+
+    def __call__(self, myfile, lines):
+        """
+        Write at least lines lines to the opened file myfile.
+        :return:
+            The number of lines written.
+        """
+        names = list(self.runs)
+        weights = list(self.runs.values())
+        written = 0
+        while written < lines:
+            getattr(self, self.random.choices(names, weights)[0])()
+            myfile.write('\n'.join(self.lines) + '\n')
+            written += len(self.lines)
+            self.lines = [ ]
+        return written
+
+    def _tick(self, low=0, high=3):
+        self.timestamp += self.random.randint(low, high)
+
+    def _write(self, line, spaces=1):
+        self.lines.append(f"{self.timestamp}:{' ' * spaces}{line}")
+
+    def _package(self):
+        return (f'{self.random.choice(self.categories)}/'
+                f'pkg{self.random.randint(0, 400)}-'
+                f'{self.random.randint(1, 9)}.{self.random.randint(0, 20)}')
+
+    def _started(self):
+        self._tick(5, 600)
+        self._write('Started emerge on: nov. 12, 2020 13:19:17')
+
+    def _merge(self, count, total, package, complete=True):
+        self._tick(0, 30)
+        self._write(f'>>> emerge ({count} of {total}) {package} to /', 2)
+        self._write(f'=== ({count} of {total}) Cleaning ({package}'
+                    '::/usr/portage/x.ebuild)', 2)
+        self._tick(0, 2)
+        self._write(f'=== ({count} of {total}) Compiling/Merging ({package}'
+                    '::/usr/portage/x.ebuild)', 2)
+        if not complete:
+            return
+        self._tick(0, 400)
+        self._write(f'=== ({count} of {total}) Merging ({package}'
+                    '::/usr/portage/x.ebuild)', 2)
+        self._tick()
+        self._write(f'>>> AUTOCLEAN: {package}:0', 2)
+        self._write(f'=== Unmerging... ({package})', 2)
+        self._write(f'>>> unmerge success: {package}', 2)
+        self._write(f'=== ({count} of {total}) Post-Build Cleaning ({package}'
+                    '::/usr/portage/x.ebuild)', 2)
+        self._write(f'::: completed emerge ({count} of {total}) {package}'
+                    ' to /', 2)
+
+    def _end(self, success=True):
+        self._tick()
+        self._write('*** Finished. Cleaning up...', 2)
+        if success:
+            self._write('*** exiting successfully.', 2)
+        else:
+            self._write("*** exiting unsuccessfully with status '1'.", 2)
+        self._tick()
+        self._write('*** terminating.', 2)
+
+    def _world_start(self, keepgoing=True):
+        self._started()
+        keepgoing = ' --keep-going' if keepgoing else ''
+        self._write('*** emerge --newuse --update --ask --deep'
+                    f'{keepgoing} --with-bdeps=y --quiet-build=y'
+                    ' --verbose @world', 2)
+
+    def sync(self):
+        failed = self.random.choice((None, None, None, 'gentoo', 'guru'))
+        self._started()
+        self._write('*** emerge --keep-going --quiet-build=y --sync', 2)
+        self._write('=== sync', 2)
+        for repository in self.repositories:
+            self._write(f">>> Syncing repository '{repository}' into"
+                        f" '/var/db/repos/{repository}'...")
+            self._tick(1, 60)
+            self._write('>>> Starting rsync with'
+                        ' rsync://92.60.51.128/gentoo-portage')
+            self._tick(1, 60)
+            if not repository == failed:
+                self._write(f'=== Sync completed for {repository}')
+        self._tick()
+        self._write('*** terminating.', 2)
+
+    def oneshot(self):
+        self._started()
+        self._write('*** emerge --oneshot app-misc/foo', 2)
+        total = self.random.randint(1, 4)
+        for count in range(1, total + 1):
+            self._merge(count, total, self._package())
+        self._end()
+
+    def depclean(self):
+        self._started()
+        self._write('*** emerge --depclean', 2)
+        self._write('>>> depclean', 2)
+        for _ in range(self.random.randint(0, 5)):
+            package = self._package()
+            self._write(f'=== Unmerging... ({package})', 2)
+            self._write(f'>>> unmerge success: {package}', 2)
+        self._write('*** exiting successfully.', 2)
+        self._write('*** terminating.', 2)
+
+    def world_complete(self):
+        self._world_start(self.random.random() < 0.5)
+        total = self.random.randint(1, 40)
+        for count in range(1, total + 1):
+            self._merge(count, total, self._package())
+        self._end()
+
+    def world_incomplete(self):
+        # Without --keep-going: stop on first failure
+        self._world_start(keepgoing=False)
+        total = self.random.randint(3, 40)
+        failed = self.random.randint(1, total)
+        for count in range(1, failed):
+            self._merge(count, total, self._package())
+        self._merge(failed, total, self._package(), complete=False)
+        self._end(success=False)
+
+    def world_partial(self):
+        # --keep-going: restart once without the failed package
+        self._world_start()
+        total = self.random.randint(6, 40)
+        failed = self.random.randint(1, total - 3)
+        for count in range(1, failed):
+            self._merge(count, total, self._package())
+        self._merge(failed, total, self._package(), complete=False)
+        left = total - failed
+        for count in range(1, left + 1):
+            self._merge(count, left, self._package())
+        self._end(success=False)
+
+    def world_fragment(self):
+        # --keep-going: fail again after the restart
+        self._world_start()
+        total = self.random.randint(8, 40)
+        failed = self.random.randint(1, total - 5)
+        for count in range(1, failed):
+            self._merge(count, total, self._package())
+        self._merge(failed, total, self._package(), complete=False)
+        left = total - failed
+        failed = self.random.randint(2, left)
+        for count in range(1, failed):
+            self._merge(count, left, self._package())
+        self._merge(failed, left, self._package(), complete=False)
+        self._end(success=False)
+
+    def world_resume(self):
+        # Killed (ctrl+c) then emerge --resume
+        self._world_start()
+        total = self.random.randint(6, 30)
+        stopped = self.random.randint(2, total - 2)
+        for count in range(1, stopped):
+            self._merge(count, total, self._package())
+        self._merge(stopped, total, self._package(), complete=False)
+        self._started()
+        self._write('*** emerge --resume --keep-going', 2)
+        self._write('*** Resuming merge...', 2)
+        left = total - stopped + 1
+        for count in range(1, left + 1):
+            self._merge(count, left, self._package())
+        self._end()
+
+    def world_parallel(self):
+        # An other emerge run while updating world
+        self._world_start()
+        total = self.random.randint(6, 30)
+        half = total // 2
+        for count in range(1, half):
+            self._merge(count, total, self._package())
+        self._tick(0, 5)
+        package = self._package()
+        self._write(f'>>> emerge ({half} of {total}) {package} to /', 2)
+        self._write(f'=== ({half} of {total}) Compiling/Merging ({package}'
+                    '::/usr/portage/x.ebuild)', 2)
+        self.oneshot()
+        self._write(f'::: completed emerge ({half} of {total}) {package}'
+                    ' to /', 2)
+        for count in range(half + 1, total + 1):
+            self._merge(count, total, self._package())
+        self._end()
+
+    def world_aborted(self):
+        self._world_start()
+        self._tick()
+        self._write('*** terminating.', 2)
+
+
+def generate(path, lines, seed=0, world=0.08):
+    """
+    Write a synthetic emerge.log with at least lines lines to path.
+    :return:
+        The number of lines written.
+    """
+    with open(path, 'w') as myfile:
+        return EmergeLogGenerator(seed=seed, world=world)(myfile, lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmarks.generator',
+                            description='Generate a synthetic emerge.log.')
+    parser.add_argument('-l', '--lines', default='50k',
+                        help='Number of lines: 50k, 500k, 5M or any number.'
+                        ' Default: 50k.')
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help='Random seed. Default: 0.')
+    parser.add_argument('-w', '--world', type=float, default=0.08,
+                        help='Weight of world updates. Default: 0.08.')
+    parser.add_argument('path', help='Where to write.')
+    args = parser.parse_args()
+
+    written = generate(args.path, parse_size(args.lines),
+                       seed=args.seed, world=args.world)
+    print(f'Wrote {written} lines to {args.path}.')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+
+from benchmarks.generator import generate
+from benchmarks.generator import parse_size
+from benchmarks.run import ROOT
+
+
+def parsers(workdir, path):
+    """
+    Same parsers as the daemon (see BaseHandler), writing
+    to workdir.
+    :return:
+        Tuple (extractors, index) as EmergeLogProcess want them.
+    """
+    from syuppo.logparser import LastSync
+    from syuppo.logparser import LastWorldUpdate
+    from syuppo.logparser import WorldUpdateHistory
+    from syuppo.logparser import MergeDurations
+    from syuppo.logparser import SyncHistory
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    extractors = [
+        ('lastsync', LastSync, { 'log' : path }),
+        ('lastworld', LastWorldUpdate, { 'log' : path }),
+        ('worldhistory', WorldUpdateHistory, {
+                    'path' : os.path.join(workdir, 'history'), 'log' : path }),
+        ('mergedurations', MergeDurations, {
+                    'path' : os.path.join(workdir, 'durations'), 'log' : path }),
+        ('synchistory', SyncHistory, {
+                    'path' : os.path.join(workdir, 'syncs'), 'log' : path })
+        ]
+    index = { 'path' : os.path.join(workdir, 'index'), 'log' : path }
+    return extractors, index
+
+
+def measure(scan, interval):
+    """
+    Run scan() in a thread while this one wake up every
+    interval seconds to answer like a dbus method would.
+    :return:
+        Tuple (scan seconds, sorted reply delays in seconds).
+    """
+    delays = [ ]
+    done = threading.Event()
+    elapsed = [ ]
+
+    def worker():
+        start = time.perf_counter()
+        scan()
+        elapsed.append(time.perf_counter() - start)
+        done.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    while not done.is_set():
+        start = time.perf_counter()
+        time.sleep(interval)
+        # The reply: a bit of python, like pydbus marshalling
+        json.dumps({ 'status' : 'running', 'packages' : list(range(20)) })
+        delays.append(time.perf_counter() - start - interval)
+    thread.join()
+    return elapsed[0], sorted(delays)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmarks.latency',
+                            description='Delay of a dbus like reply while'
+                            ' the emerge.log parsers read a log from scratch,'
+                            ' in a thread of the daemon (before) and in their'
+                            ' own process (after).')
+    parser.add_argument('--sizes', nargs='+', default=[ '500k', '5M' ],
+                        help='Log sizes in lines. Default: 500k 5M.')
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help='Seconds between replies. Default: 0.01.')
+    parser.add_argument('--workdir', default=os.path.join(
+                                tempfile.gettempdir(), 'syuppo-benchmarks'),
+                        help='Where generated logs are kept.'
+                        ' Default: %(default)s.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from syuppo.logger import addLoggingLevel
+    from syuppo.logparser import EmergeLogProcess
+    from syuppo.logparser import _build
+
+    addLoggingLevel('DEBUG2', 9)
+    logging.basicConfig(level=logging.CRITICAL)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    print(f"{'size':>6} {'parsing':>8} {'scan s':>7} {'replies':>7}"
+          f" {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+    for size in args.sizes:
+        path = os.path.join(args.workdir, f'emerge-{size}-0-0.08.log')
+        if not os.path.exists(path):
+            generate(path, parse_size(size), seed=0, world=0.08)
+        workdir = os.path.join(args.workdir, 'latency')
+
+        extractors, index = parsers(workdir, path)
+        scanner = _build(extractors, index, { 'log' : path })['scanner']
+        runs = [ ('thread', scanner) ]
+        extractors, index = parsers(workdir, path)
+        process = EmergeLogProcess(extractors, index=index, log=path)
+        runs.append(('process', process))
+
+        for name, scan in runs:
+            seconds, delays = measure(scan, args.interval)
+            count = len(delays)
+            print(f'{size:>6} {name:>8} {seconds:>7.2f} {count:>7}'
+                  f' {delays[count // 2] * 1000:>7.2f}'
+                  f' {delays[int(count * 0.99)] * 1000:>7.2f}'
+                  f' {delays[-1] * 1000:>7.2f}')
+        process.shutdown()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
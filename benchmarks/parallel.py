@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+from benchmarks.generator import generate
+from benchmarks.generator import parse_size
+from benchmarks.run import ROOT
+
+
+def scan(path, workdir, workers, chunksize):
+    """
+    Cold scan of path with the forward parsers.
+    :return:
+        Tuple (seconds, results).
+    """
+    from syuppo.logparser import LastWorldUpdate
+    from syuppo.logparser import WorldUpdateHistory
+    from syuppo.logparser import MergeDurations
+    from syuppo.logparser import EmergeLogIndex
+    from syuppo.logparser import EmergeLogScanner
+
+    for name in ('history', 'durations'):
+        if os.path.exists(os.path.join(workdir, name)):
+            os.remove(os.path.join(workdir, name))
+    options = { 'log' : path, 'workers' : workers, 'chunksize' : chunksize }
+    lastworld = LastWorldUpdate(**options)
+    history = WorldUpdateHistory(path=os.path.join(workdir, 'history'),
+                                 **options)
+    durations = MergeDurations(path=os.path.join(workdir, 'durations'),
+                               **options)
+    index = EmergeLogIndex(**options)
+    scanner = EmergeLogScanner(lastworld, history, durations, index=index,
+                               **options)
+    start = time.perf_counter()
+    world, *_ = scanner()
+    seconds = time.perf_counter() - start
+    return seconds, (world, history.last(),
+                     durations.packages, durations.merging, index.entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmarks.parallel',
+                            description='Check that tokenizing emerge.log'
+                            ' with worker processes give the same results'
+                            ' as the serial parser, and time both.')
+    parser.add_argument('--sizes', nargs='+', default=[ '50k', '500k' ],
+                        help='Log sizes in lines. Default: 50k 500k.')
+    parser.add_argument('--seeds', type=int, default=3,
+                        help='Number of generated logs by size. Default: 3.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='Worker processes. Default: %(default)s.')
+    parser.add_argument('--chunksize', type=int, default=262144,
+                        help='Bytes by chunk (small so even small logs are'
+                        ' split in many chunks). Default: %(default)s.')
+    parser.add_argument('--workdir', default=os.path.join(
+                                tempfile.gettempdir(), 'syuppo-benchmarks'),
+                        help='Where generated logs are kept.'
+                        ' Default: %(default)s.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from syuppo.logger import addLoggingLevel
+    from syuppo.logparser import EmergeLogParser
+
+    addLoggingLevel('DEBUG2', 9)
+    logging.basicConfig(level=logging.CRITICAL)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    print(f"{'size':>6} {'seed':>4} {'chunks':>6} {'serial':>8}"
+          f" {'parallel':>8} {'same':>5}")
+    failed = 0
+    for size in args.sizes:
+        for seed in range(args.seeds):
+            # Many world updates so every state is hit
+            path = os.path.join(args.workdir,
+                                f'emerge-{size}-{seed}-0.3.log')
+            if not os.path.exists(path):
+                generate(path, parse_size(size), seed=seed, world=0.3)
+            tokenizer = EmergeLogParser(log=path, workers=args.workers,
+                                        chunksize=args.chunksize)
+            end = tokenizer.getstat()[1]
+            chunks = len(tokenizer.getchunks(0, end))
+            same = (list(tokenizer.forwardevents(0, end))
+                    == [ (offset, line, tokenizer.tokenize(line))
+                         for offset, line in tokenizer.forwardlines(0, end) ])
+
+            serial, expected = scan(path, args.workdir, 0, args.chunksize)
+            parallel, results = scan(path, args.workdir, args.workers,
+                                     args.chunksize)
+            same = same and results == expected
+            failed += not same
+            print(f'{size:>6} {seed:>4} {chunks:>6} {serial:>8.3f}'
+                  f' {parallel:>8.3f} {str(same):>5}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
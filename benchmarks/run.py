@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import tempfile
+import subprocess
+
+from benchmarks.generator import generate
+from benchmarks.generator import parse_size
+
+
+# Root of the repository: benchmark this syuppo, not an installed one
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bench_lastsync(path):
+    """
+    LastSync() from scratch.
+    """
+    from syuppo.logparser import LastSync
+
+    parser = LastSync(log=path)
+    start = time.perf_counter()
+    parser()
+    return time.perf_counter() - start
+
+
+def bench_lastworld(path):
+    """
+    LastWorldUpdate() from scratch.
+    """
+    from syuppo.logparser import LastWorldUpdate
+
+    parser = LastWorldUpdate(log=path)
+    start = time.perf_counter()
+    parser()
+    return time.perf_counter() - start
+
+
+def bench_scanner(path):
+    """
+    LastSync and LastWorldUpdate from scratch sharing one reading.
+    """
+    from syuppo.logparser import LastSync
+    from syuppo.logparser import LastWorldUpdate
+    from syuppo.logparser import EmergeLogScanner
+
+    scanner = EmergeLogScanner(LastSync(log=path), LastWorldUpdate(log=path),
+                               log=path)
+    start = time.perf_counter()
+    scanner()
+    return time.perf_counter() - start
+
+
+def bench_index(path):
+    """
+    EmergeLogIndex built from scratch (in memory).
+    """
+    from syuppo.logparser import EmergeLogIndex
+
+    index = EmergeLogIndex(log=path)
+    stat = index.getstat()
+    start = time.perf_counter()
+    index.update(*stat)
+    return time.perf_counter() - start
+
+
+def bench_timeline(path):
+    """
+    EmergeLogTimeline built from scratch then 1000 bisections.
+    """
+    from syuppo.logparser import EmergeLogTimeline
+
+    timeline = EmergeLogTimeline(log=path)
+    stat = timeline.getstat()
+    start = time.perf_counter()
+    timeline.update(*stat)
+    first = int(timeline.timestamps[0])
+    last = int(timeline.timestamps[len(timeline) - 1])
+    for timestamp in range(first, last, max(1, (last - first) // 1000)):
+        timeline.find_offset(timestamp)
+    return time.perf_counter() - start
+
+
+def bench_rotated(path):
+    """
+    LastWorldUpdate() from scratch with the whole log gzip
+    rotated (emerge.log.1.gz) and an empty emerge.log.
+    """
+    import gzip
+    import shutil
+    from syuppo.logparser import LastWorldUpdate
+
+    directory = f'{path}.rotated'
+    log = os.path.join(directory, 'emerge.log')
+    if not os.path.exists(f'{log}.1.gz'):
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'rb') as source:
+            with gzip.open(f'{log}.1.gz.new', 'wb') as destination:
+                shutil.copyfileobj(source, destination)
+        os.replace(f'{log}.1.gz.new', f'{log}.1.gz')
+    open(log, 'wb').close()
+    parser = LastWorldUpdate(log=log)
+    start = time.perf_counter()
+    parser()
+    return time.perf_counter() - start
+
+
+def bench_statemachine(path):
+    """
+    LastWorldUpdate state machine alone over the whole file:
+    lines are read and tokenized before timing (so peak memory
+    include them).
+    """
+    from syuppo.logparser import LastWorldUpdate
+
+    parser = LastWorldUpdate(log=path)
+    events = [ (line, parser.tokenize(line))
+               for offset, line in parser.forwardlines() ]
+    start = time.perf_counter()
+    parser._load_default_cfg(init=True)
+    for parser.line, event in events:
+        parser._parse_line(event)
+    parser._check_pending()
+    return time.perf_counter() - start
+
+
+def _packages(path):
+    """
+    Lines with the (count, total) of the package being merged
+    when they are read, as the LastWorldUpdate state machine
+    see them (computed before timing).
+    :return:
+        Tuple (parser, list of (line, count, total)).
+    """
+    from syuppo.logparser import LastWorldUpdate
+
+    parser = LastWorldUpdate(log=path)
+    lines = [ ]
+    count = total = 0
+    for offset, line in parser.forwardlines():
+        timestamp, kind, fields = parser.tokenize(line)
+        if kind == 'merge' and fields[0]:
+            count, total = fields[0], fields[1]
+        lines.append((line, count, total))
+    return parser, lines
+
+
+def bench_cascade(path):
+    """
+    Current package matching without prefilter, as LastWorldUpdate
+    did it before: the stop then the start regex, built for each
+    (count, total), tried on every line. See bench_prefilter().
+    """
+    import re
+
+    parser, lines = _packages(path)
+    start = time.perf_counter()
+    for line, count, total in lines:
+        if not re.match(r'\d+:\s{2}:::.completed.emerge.\(' 
+                        + str(count) + r'.*of.*' + str(total) 
+                        + r'\).*$', line):
+            re.match(r'^\d+:\s{2}>>>.emerge.\(' 
+                     + str(count + 1) + r'.*of.*' + str(total) 
+                     + r'\)\s(.*)\sto.*$', line)
+    return time.perf_counter() - start
+
+
+def bench_prefilter(path):
+    """
+    Same as bench_cascade() with the prefilter: the line kind
+    (tokenize()) select the regex, compiled once, to try.
+    """
+    parser, lines = _packages(path)
+    start = time.perf_counter()
+    for line, count, total in lines:
+        kind = parser.tokenize(line)[1]
+        if kind == 'completed':
+            parser.stop_current.match(f'{count} {total}|{line}')
+        elif kind == 'merge':
+            parser.start_current.match(f'{count + 1} {total}|{line}')
+    return time.perf_counter() - start
+
+
+BENCHES = {
+    'lastsync'      :   bench_lastsync,
+    'lastworld'     :   bench_lastworld,
+    'scanner'       :   bench_scanner,
+    'index'         :   bench_index,
+    'timeline'      :   bench_timeline,
+    'rotated'       :   bench_rotated,
+    'statemachine'  :   bench_statemachine,
+    'cascade'       :   bench_cascade,
+    'prefilter'     :   bench_prefilter
+    }
+
+
+def child(name, path, level):
+    """
+    Run one benchmark in this process and print
+    its result as json.
+    """
+    from syuppo.logger import addLoggingLevel
+
+    addLoggingLevel('DEBUG2', 9)
+    # Messages are dropped: only their cost is measured
+    logging.basicConfig(level=level, handlers=[ logging.NullHandler() ])
+
+    seconds = BENCHES[name](path)
+    # Kilobytes on linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({ 'seconds' : seconds, 'peak' : peak }))
+
+
+def spawn(name, path, level):
+    """
+    Run one benchmark in a new process so peak
+    memory is its own.
+    :return:
+        Dictionary with 'seconds' and 'peak' (kB) else False.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None,
+                                    (ROOT, env.get('PYTHONPATH'))))
+    proc = subprocess.run([ sys.executable, '-m', 'benchmarks.run',
+                            '--child', name, path, '--level', level ],
+                          cwd=ROOT, env=env, capture_output=True,
+                          text=True)
+    if proc.returncode:
+        print(f'{name} failed on {path}:\n{proc.stderr}', file=sys.stderr)
+        return False
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmarks.run',
+                            description='Time the emerge.log parsers on'
+                            ' synthetic logs. lines/s is the number of'
+                            ' lines of the file by second, even if a'
+                            ' parser only read the end of it.')
+    parser.add_argument('--sizes', nargs='+', default=[ '50k', '500k', '5M' ],
+                        help='Log sizes in lines. Default: 50k 500k 5M.')
+    parser.add_argument('--benches', nargs='+', choices=list(BENCHES),
+                        default=list(BENCHES),
+                        help='Benchmarks to run. Default: all.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Generator seed. Default: 0.')
+    parser.add_argument('--world', type=float, default=0.08,
+                        help='Weight of world updates. Default: 0.08.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Keep the best of repeat runs. Default: 3.')
+    parser.add_argument('--workdir', default=os.path.join(
+                                tempfile.gettempdir(), 'syuppo-benchmarks'),
+                        help='Where generated logs are kept.'
+                        ' Default: %(default)s.')
+    parser.add_argument('--level', default='CRITICAL',
+                        choices=[ 'CRITICAL', 'INFO', 'DEBUG', 'DEBUG2' ],
+                        help='Logging level, messages are discarded.'
+                        ' Default: %(default)s.')
+    parser.add_argument('--child', nargs=2, metavar=('BENCH', 'PATH'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(*args.child, args.level)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    print(f"{'size':>6} {'benchmark':>13} {'seconds':>9}"
+          f" {'lines/s':>11} {'peak MB':>8}")
+    for size in args.sizes:
+        lines = parse_size(size)
+        path = os.path.join(args.workdir,
+                            f'emerge-{size}-{args.seed}-{args.world}.log')
+        if not os.path.exists(path):
+            generate(path, lines, seed=args.seed, world=args.world)
+        with open(path, 'rb') as myfile:
+            lines = sum(1 for line in myfile)
+
+        for name in args.benches:
+            results = [ spawn(name, path, args.level) 
+                        for _ in range(args.repeat) ]
+            if not all(results):
+                continue
+            best = min(results, key=lambda result: result['seconds'])
+            print(f"{size:>6} {name:>13} {best['seconds']:>9.3f}"
+                  f" {lines / best['seconds']:>11.0f}"
+                  f" {max(r['peak'] for r in results) / 1024:>8.1f}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -176,6 +176,12 @@ class DaemonParserHandler(CustomArgsCheck):
                             metavar = 'int',
                             type=self._check_args_interval,
                             default = 86400)
+        portage_arg.add_argument('-w',
+                            '--parse-workers',
+                            help = 'processes used to tokenize big parts of emerge.log (first reading, rotation). Only worth it with free cores and a big log. Default is 0: no worker process.', 
+                            metavar = 'int',
+                            type = int,
+                            default = 0)
         advanced_debug = self.parser.add_argument_group('<advanced debug options>')
         advanced_debug.add_argument('--nodbus',
                                     help = """Disable dbus binding""",
@@ -300,6 +306,17 @@ class ClientParserHandler(CustomArgsCheck):
                                   action = 'store_true',
                                   help = 'Display packages\'s update related informations from `emerge --pretend`.'
                                   ' This will NOT run an `emerge --pretend` in a background.')
+        portage_args.add_argument('--eta',
+                                  metavar = 'eta',
+                                  nargs = '?',
+                                  const = 'human:2',
+                                  type = self._check_args_portage_elapse_remain,
+                                  help = 'Display estimated duration of the next world update, from the build '
+                                  'durations recorded in emerge.log for the packages to update. Where \'eta\' '
+                                  'should be one of: \'human\' or \'seconds\'. Optionnal unrounded or tweak can '
+                                  'be execute using: [:r]ounded, [:u]nrounded and [:1]-5 to choose granularity level'
+                                  ' - this can be collapse, ex: [:r:5]. Default is human, [:r]ounded and granularity'
+                                  ' is [:2].')
         portage_args.add_argument('--last',
                                   metavar = 'lst',
                                   nargs = '?',
@@ -243,6 +243,29 @@ def packages(myobject, machine):
         print(msg)
      
      
+def eta(myobject, opt, machine):
+    """Display estimated duration of the next world update"""
+    # Default for --all argument
+    if not opt:
+        opt = 'human:2'
+    reply = int(myobject.get_pretend_attribute('eta'))
+    unestimated = int(myobject.get_pretend_attribute('unestimated'))
+    if 'seconds' in opt:
+        msg = f'{reply}'
+    elif reply:
+        msg = _format_timestamp(reply, opt)
+    else:
+        msg = _('None')
+    if not machine:
+        print('[*]', _('Estimated world update duration:'))
+        print(f'    - {msg}')
+        if unestimated:
+            print('    -', _('Packages never built (not estimated): {0}').format(
+                                                                    unestimated))
+    else:
+        print(msg)
+     
+     
 def last(myobject, last, machine):
     """Display informations about last world update"""
     # Default for --all argument
@@ -353,6 +376,7 @@ def parser(args):
         'remain'    :   { 'func': elapsed_remain, 'args' : [myobject, 'remain', args.remain, args.machine] },
         'available' :   { 'func': available, 'args' : [myobject, args.available, args.machine] },
         'packages'  :   { 'func': packages, 'args' : [myobject, args.machine] },
+        'eta'       :   { 'func': eta, 'args' : [myobject, args.eta, args.machine] },
         'last'      :   { 'func': last, 'args' : [myobject, args.last, args.machine] },
         'forced'    :   { 'func': forced, 'args' : [myobject, args.machine] }
         }
@@ -55,6 +55,11 @@ pathdir = {
     'debuglog'      :   '/var/log/' + prog_name + '/debug.log',
     'fdlog'         :   '/var/log/' + prog_name + '/stderr.log', 
     'statelog'      :   '/var/lib/' + prog_name + '/state.info',
+    'emergeindex'   :   '/var/lib/' + prog_name + '/emerge.index',
+    'worldhistory'  :   '/var/lib/' + prog_name + '/world.history',
+    'mergedurations':   '/var/lib/' + prog_name + '/merge.durations',
+    'synchistory'   :   '/var/lib/' + prog_name + '/sync.history',
+    'pretendlist'   :   '/var/lib/' + prog_name + '/pretend.list',
     'synclog'       :   '/var/log/' + prog_name + '/sync.log',
     'pretendlog'    :   '/var/log/' + prog_name + '/pretend.log'    
     }
@@ -210,6 +215,7 @@ class RegularDaemon(threading.Thread):
                 with self.manager.pretend['locks']['cancel']:
                     # Send proc id for specific msg 
                     self.manager.pretend['cancel'] = 'sync internal'
+                self.manager.pretend['wakeup'].set()
             
             # This is the case where we want to call pretend,
             # there is no process running
@@ -252,15 +258,16 @@ class RegularDaemon(threading.Thread):
                     and self.manager.pretend['status'] == 'ready'
                     and not self.manager.sync['status'] == 'running'):
                 if self.allow('pretend'):
-                    if self.manager.pretend['forced']:
+                    forced = self.manager.pretend['forced']
+                    if forced:
                         logger.warning('Recompute available packages updates'
                                         ' as requested by dbus client.')
                         self.manager.pretend['forced'] = False
                     logger.debug('Running pretend_world()')
                     # Making async and non-blocking
+                    # forced: bypass the result reuse
                     self.scheduler.run_in_executor(None,
-                                                    # -> ', )' = same here
-                                self.manager.pretend_world, ) 
+                                self.manager.pretend_world, forced) 
                         
             # skip calls if we are behind schedule:
             next_time += (time.time() - next_time) // delay * delay + delay
@@ -310,6 +317,7 @@ class RegularDaemon(threading.Thread):
                 logger.debug(f"Sending exit request for running {msg}.")
                 
                 myattr['exit'] = True
+                myattr['wakeup'].set()
                 # Wait for reply
                 while not myattr['exit'] == 'Done':
                     # So if we don't have reply but if
@@ -359,7 +367,10 @@ class DynamicDaemon(threading.Thread):
         self.watch = {
             'inotify'  :   {
                 'path'      :   pathdir['emergelog'],
-                'flags'     :   8,
+                # Moved / deleted: emerge.log have been rotated
+                'flags'     :   inotify_simple.flags.CLOSE_WRITE
+                                | inotify_simple.flags.MOVE_SELF
+                                | inotify_simple.flags.DELETE_SELF,
                 'id'        :   'inotify',
                 'call'      :   self.inotifywatch
                 },
@@ -373,6 +384,9 @@ class DynamicDaemon(threading.Thread):
         self.caller = self.watch['inotify']
         self.timeout = 1
         self.inotify = False
+        # Watch descriptor: directory holding repositories 
+        # sync markers (see RepoTimestamps)
+        self.repowatches = { }
         
         # for process querying
         self.prun = CheckProcRunning()
@@ -459,6 +473,7 @@ class DynamicDaemon(threading.Thread):
                 # Send proc id for specific msg 
                 self.manager.pretend['cancel'] = msg_id
                 # Leave the recall to RegularDaemon
+            self.manager.pretend['wakeup'].set()
         
         # Make sure we sleep exactly 1s 
         # THX!: https://stackoverflow.com/a/49801719/11869956
@@ -471,6 +486,10 @@ class DynamicDaemon(threading.Thread):
                              f" on pid: {self.pstate['path'].stem}")
             if self.display_log('info'):
                 logger.info(f"{msg[self.pstate['proc']]} is in progress.")
+            # Keep the world update parser up to date so the
+            # result is known as soon as the process exit
+            if self.pstate['proc'] == 'world':
+                self.manager.scan_emergelog()
             # skip calls if we are behind schedule:
             next_time += (time.time() - next_time) // delay * delay + delay
             time.sleep(max(0, next_time - time.time()))
@@ -495,6 +514,13 @@ class DynamicDaemon(threading.Thread):
         logger = logging.getLogger(f'{self.logger_name}inotifywatch::')
         # if inotify not already setup
         if not self.inotify:
+            # After a rotation, wait until emerge.log is recreated
+            while (not pathlib.Path(self.caller['path']).exists() 
+                    and not self.exit):
+                time.sleep(self.timeout)
+            if self.exit:
+                logger.debug("Stop waiting, receive exit order.")
+                return
             self.inotify = self.__inotify()
         reader = False
         # For exit order also
@@ -508,6 +534,33 @@ class DynamicDaemon(threading.Thread):
             return 
         
         logger.debug(f"State changed with: {reader}.")
+        # A repository have been synced but not by emerge --sync
+        # (which is tracked using CheckProcRunning) nor by us.
+        synced = [ event.name for event in reader 
+                   if event.wd in self.repowatches
+                   and self.manager.repotimestamps.watched(event.name) ]
+        if synced and not self.manager.sync['status'] == 'running':
+            logger.debug(f"Repository sync marker(s) changed: {synced},"
+                         " running check_sync().")
+            with self.manager.sync['locks']['check']:
+                self.manager.check_sync()
+        # Events of emerge.log, not of repositories markers
+        logged = [ event for event in reader if event.wd == self.logwatch ]
+        rotated = inotify_simple.flags.MOVE_SELF | inotify_simple.flags.DELETE_SELF
+        if any(event.mask & rotated for event in logged):
+            # The watch follow the inode, so it's now on the rotated
+            # log: re-arm it on the new one (on next call). Parsers
+            # will notice the new inode and read the rotated logs 
+            # if needed.
+            logger.debug(f"{self.caller['path']} have been rotated,"
+                         " closing inotify watcher.")
+            self.inotify.close()
+            self.inotify = False
+            return
+        # Feed emerge.log parsers with what 
+        # have just been written
+        if logged:
+            self.manager.scan_emergelog()
         # DONT close here: let self.checking() doing it
         # OR at the end of run()
     
@@ -520,7 +573,8 @@ class DynamicDaemon(threading.Thread):
         # Ouput by flag over one numeric value
         get_flags = inotify_simple.flags.from_mask
         try:
-            log_wd = inotify.add_watch(self.caller['path'], self.caller['flags'])
+            self.logwatch = inotify.add_watch(self.caller['path'], 
+                                              self.caller['flags'])
         except OSError as error:
             logger.error(f"Inotify watch crash: Using:"
                         + f" '{self.caller['path']}'.")
@@ -530,7 +584,17 @@ class DynamicDaemon(threading.Thread):
             logger.debug(f"Started monitoring: '{self.caller['path']}', flags:"
                         + f" '{get_flags(self.caller['flags'])}',"
                         + f" timeout={self.timeout}.")
-            return inotify
+        # Markers are written or replaced (rsync)
+        self.repowatches = { }
+        flags = inotify_simple.flags.CLOSE_WRITE | inotify_simple.flags.MOVED_TO
+        for directory in self.manager.repotimestamps.directories():
+            try:
+                self.repowatches[inotify.add_watch(directory, flags)] = directory
+            except OSError as error:
+                logger.error(f"While watching '{directory}': {error}.")
+        logger.debug(f"Started monitoring {len(self.repowatches)}"
+                     " repositories sync markers directories.")
+        return inotify
           
     def checking(self):
         """
@@ -629,7 +693,8 @@ class DynamicDaemon(threading.Thread):
         logger.debug("Running get_last_world_update()")
         # TEST now get_last_world_update return True if
         # world update have run else False.
-        if self.manager.get_last_world_update(detected=True):
+        if self.manager.get_last_world_update(detected=True,
+                                        started=self.pstate.get('started')):
             # let pretend_world() be run by RegularDaemon
             # And manage directly by get_last_world_update()
             # Also, call portage to update portage package update
@@ -827,7 +892,8 @@ def main():
     
     # Init manager
     manager = PortageDbus(interval=args.sync, pathdir=pathdir, 
-                          dryrun=args.dryrun, vdebug=args.vdebug)
+                          dryrun=args.dryrun, vdebug=args.vdebug,
+                          workers=args.parse_workers)
     
     # Init Dynamic Daemon
     dynamic_daemon = DynamicDaemon(pathdir, manager, 
@@ -38,6 +38,22 @@ class PortageDbus(BaseHandler):
                 <method name='get_world_update_status'>
                     <arg type='s' name='response' direction='out'/>
                 </method>
+                <method name='get_world_history'>
+                    <arg type='i' name='count' direction='in'/>
+                    <arg type='a(xxiis)' name='response' direction='out'/>
+                </method>
+                <method name='get_sync_history'>
+                    <arg type='a(sxxbxxi)' name='response' direction='out'/>
+                </method>
+                <method name='get_sync_progress'>
+                    <arg type='a(ssxxs)' name='response' direction='out'/>
+                </method>
+                <method name='get_pretend_packages'>
+                    <arg type='i' name='offset' direction='in'/>
+                    <arg type='i' name='count' direction='in'/>
+                    <arg type='i' name='total' direction='out'/>
+                    <arg type='a(ssssssx)' name='packages' direction='out'/>
+                </method>
                 <method name='_get_debug_attributes'>
                     <arg type='s' name='debug_key' direction='in'/>
                     <arg type='s' name='response' direction='out'/>
@@ -160,6 +176,61 @@ class PortageDbus(BaseHandler):
         if self.world_state:
             return 'True'
         return 'False'
+    
+    def get_world_history(self, count):
+        """
+        Retrieve the last count world updates (all if count < 1), 
+        oldest first, as (start, stop, total, nfailed, state).
+        """
+        logger = logging.getLogger(f'{self.named_logger}get_world_history::')
+        logger.debug(f'Requesting: {count}.')
+        history = self.emergelog['parsers'].views['history']
+        if count > 0:
+            history = history[-count:]
+        logger.debug(f'Returning: {len(history)} world update(s).')
+        return history
+    
+    def get_sync_history(self):
+        """
+        Retrieve the last sync of every repository as (repository,
+        start, duration, success, average duration of the last 5
+        and of the last 20 successful syncs, failures in the last 20).
+        """
+        logger = logging.getLogger(f'{self.named_logger}get_sync_history::')
+        logger.debug('Got request.')
+        summary = self.emergelog['parsers'].views['syncs']
+        logger.debug(f'Returning: {len(summary)} repositorie(s).')
+        return summary
+    
+    def get_sync_progress(self):
+        """
+        Retrieve the progress of the running (or last) sync, by
+        repository, as (repository, state, start, elapsed, last
+        error). State is pending, running, done, failed or cancelled.
+        """
+        logger = logging.getLogger(f'{self.named_logger}get_sync_progress::')
+        logger.debug('Got request.')
+        progress = self.sync_progress()
+        logger.debug(f'Returning: {len(progress)} repositorie(s).')
+        return progress
+    
+    def get_pretend_packages(self, offset, count):
+        """
+        Retrieve count packages (all if count < 1) from offset of
+        the last available update search, as (kind, flags, atom,
+        new version, old version, repository, size in KiB) and 
+        the total of packages.
+        """
+        name = 'get_pretend_packages'
+        logger = logging.getLogger(f'{self.named_logger}{name}::')
+        logger.debug(f'Requesting: {count} from {offset}.')
+        # Replaced, never changed in place: no lock needed
+        packages = self.pretend['list']
+        offset = max(offset, 0)
+        end = offset + count if count > 0 else len(packages)
+        page = [ package.astuple() for package in packages[offset:end] ]
+        logger.debug(f'Returning: {len(page)} / {len(packages)} package(s).')
+        return len(packages), page
         
     def _get_debug_attributes(self, key):
         """
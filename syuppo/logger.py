@@ -196,6 +196,52 @@ class RedirectFdToLogger:
             self.msg = ''
 
 
+class HotLogger:
+    """
+    Loggers for methods called in hot loops (each line, item or 
+    /proc entry): each logger is got (and its level set) only once,
+    and whether debug levels are enabled is decided by refresh(),
+    once per call, so a disabled debug message is never formatted:
+        logger = self.loggers('method')
+        if self.loggers.debug2:
+            logger.debug2(f'...')
+    """
+    def __init__(self, prefix, advanced_debug=False):
+        """
+        :param prefix:
+            Loggers name prefix, like '::module::Class::'.
+        :param advanced_debug:
+            Set loggers level to DEBUG2. Default False.
+        """
+        self.prefix = prefix
+        self.advanced_debug = advanced_debug
+        self.loggers = { }
+        self.refresh()
+    
+    def __call__(self, name):
+        """
+        Get the logger for method name.
+        """
+        try:
+            return self.loggers[name]
+        except KeyError:
+            logger = logging.getLogger(f'{self.prefix}{name}::')
+            if self.advanced_debug:
+                logger.setLevel(logging.DEBUG2)
+            self.loggers[name] = logger
+            return logger
+    
+    def refresh(self):
+        """
+        Check again which debug levels are enabled (every 
+        logger share the same configuration).
+        """
+        logger = self('refresh')
+        self.debug = logger.isEnabledFor(logging.DEBUG)
+        self.debug2 = logger.isEnabledFor(logging.DEBUG2)
+
+
+
 def addLoggingLevel(levelName, levelNum, methodName=None):
     """
     Comprehensively adds a new logging level to the `logging` module and the
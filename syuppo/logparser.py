@@ -4,10 +4,28 @@
 # Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
 # Distributed under the terms of the GNU General Public License v3
 
+import os
+import sys
+import copy
 import logging
-import subprocess
+import logging.handlers
 import re
+import gzip
+import lzma
+import bz2
+import zlib
+import struct
+import mmap
+import atexit
+import threading
+import collections
+import multiprocessing
+import concurrent.futures
 
+from portage.versions import pkgsplit
+
+from syuppo.logger import HotLogger
+from syuppo.logger import addLoggingLevel
 from syuppo.utils import on_parent_exit
 
 try:
@@ -18,126 +36,1154 @@ except Exception as exc:
     sys.exit(1)
 
 
+# Line which is not an event, see EmergeLogParser.tokenize()
+NOEVENT = (0, None, ())
+
+
 class EmergeLogParser:
     """
     Base class that implant shared methods for parsing emerge.log
     """
     def __init__(self, **kwargs):
         self.__nlogger =  f'::{__name__}::EmergeLogParser::' 
-        logger = logging.getLogger(f'{self.__nlogger}init::')
         
         self.aborted = 5
         self.emergelog = kwargs.get('log',
                                     '/var/log/emerge.log')
+        # Size of each read when going backward from EOF.
+        # Bigger block means less syscalls but more memory.
+        self.blocksize = kwargs.get('blocksize', 65536)
+        # Rotated logs (logrotate) like: emerge.log.1, 
+        # emerge.log.2.gz or emerge.log-20201112.xz 
+        self.rotated = re.compile(re.escape(os.path.basename(self.emergelog))
+                                  + r'[.-]\d+(\.gz|\.xz|\.bz2)?$')
+        self.openers = {
+            '.gz'   :   gzip.open,
+            '.xz'   :   lzma.open,
+            '.bz2'  :   bz2.open
+            }
+        # Bytes of each read when going backward in a compressed
+        # rotated log: each read decompress it from its beginning
+        self.segment = kwargs.get('segment', 8388608)
+        # Processes tokenizing big byte ranges, see self.forwardevents()
+        # 0, 1 or None (default): everything is done by the caller. 
+        # Opt-in: it only pay off with free cores and big ranges.
+        self.workers = kwargs.get('workers') or 0
+        # Bytes by chunk sent to a worker
+        self.chunksize = kwargs.get('chunksize', 4194304)
+        
+        ## Tokens setup, see self.tokenize() ##
+        # Only one regex so each line is matched only once: 
+        # the kind is the name of the matched group.
+        self.tokens = re.compile(
+            r'^(\d+):(?:\s{2}(?:'
+                r'\*\*\*.(?:'
+                    r'(?P<emerge>emerge.)'
+                    r'|(?P<resuming>Resuming.merge\.\.\.$)'
+                    r'|(?P<finished>Finished\..Cleaning up\.\.\.$)'
+                    r'|(?P<terminating>terminating\.$)'
+                    # Make sure it failed with status == 1
+                    r'|(?P<failed>exiting.unsuccessfully.with.status.\'1\'\.$)'
+                    r'|(?P<succeeded>exiting.successfully\.$))'
+                # 1605183716:  >>> emerge (1 of 54) x11-apps/xkbcomp-1.4.4 to /
+                r'|(?P<merge>>>>.emerge.\((?:(?P<merge_count>\d+).of.'
+                    r'(?P<merge_total>\d+)\)\s(?P<merge_name>.*)\sto.*$)?)'
+                r'|(?P<completed>:::.completed.emerge.\('
+                    r'(?:(?P<completed_count>\d+).of.(?P<completed_total>\d+)'
+                    r'\)\s(?P<completed_name>.*)\sto.*$)?))'
+            r'|\s(?:'
+                # 1605183558: Started emerge on: nov. 12, 2020 13:19:17
+                r'(?P<start>Started.emerge.on:)'
+                # 1569592862: >>> Syncing repository 'gentoo' into ...
+                r'|(?P<syncing>>>>.Syncing.repository.'
+                    r'\'(?P<syncing_repo>[^\']*)\')'
+                # 1569592932: === Sync completed for gentoo
+                r'|(?P<synced>===.Sync.completed.for.(?P<synced_repo>.*)$)))')
+        # Flags of an 'emerge' event
+        self.emerge_flags = (
+            # Added @world
+            # Added \s* after (?:world|@world) to make 
+            # sure we match only @world or world 
+            # Should we match with '.' or '\s' ??
+            ('world',       re.compile(r'^(\d+):\s{2}\*\*\*.emerge.*\s'
+                                       r'(?:world|@world)\s*.*$')),
+            # So match emerge but NOT follow by --depclean 
+            # or --sync or --resume
+            ('parallel',    re.compile(r'^\d+:\s{2}\*\*\*.emerge.'
+                                       r'(?!.*(--depclean|--sync|--resume)'
+                                       r'.*$)')),
+            # match emerge --resume
+            ('resume',      re.compile(r'^\d+:\s{2}\*\*\*.emerge.*'
+                                       r'\s--resume\s.*$')),
+            # Detect package dropped due to unmet dependency
+            # for exemple (display in terminal only):
+            #   * emerge --keep-going: kde-apps/dolphin-19.08.3 dropped
+            #                                       because it requires
+            #   * >=kde-apps/kio-extras-19.08.3:5
+            # BUT we get nothing in a emerge.log about that.
+            # We CAN'T have the name of the package.
+            # Just get the number and display some more informations, 
+            # like: (+n package(s) dropped) - this has to be TEST more
+            ('keepgoing',   re.compile(r'^.*\s--keep-going\s.*$'))
+            )
+   
+    def tokenize(self, line):
+        """
+        Turn an emerge.log line into an event using only one
+        match.
+        :return:
+            Tuple (timestamp, kind, fields), kind and fields are:
+            'start'         ()   Started emerge on: ...
+            'emerge'        flags from self.emerge_flags which match:
+                                 *** emerge --keep-going ... @world
+            'resuming'      ()   *** Resuming merge...
+            'finished'      ()   *** Finished. Cleaning up...
+            'terminating'   ()   *** terminating.
+            'failed'        ()   *** exiting unsuccessfully with
+                                     status '1'.
+            'succeeded'     ()   *** exiting successfully.
+            'merge'         (count, total, name) or (None, None, None)
+                                 >>> emerge (1 of 5) x/y-1.0 to /
+            'completed'     same as 'merge'
+                                 ::: completed emerge (1 of 5) ...
+            'syncing'       (repository, )
+                                 >>> Syncing repository 'gentoo' ...
+            'synced'        (repository, )
+                                 === Sync completed for gentoo
+            Else NOEVENT: (0, None, ()).
+        """
+        match = self.tokens.match(line)
+        if not match:
+            return NOEVENT
+        
+        kind = match.lastgroup
+        fields = ()
+        if kind in ('merge', 'completed'):
+            if match[f'{kind}_count']:
+                fields = (int(match[f'{kind}_count']), 
+                          int(match[f'{kind}_total']),
+                          match[f'{kind}_name'])
+            else:
+                fields = (None, None, None)
+        elif kind in ('syncing', 'synced'):
+            fields = (match[f'{kind}_repo'], )
+        elif kind == 'emerge':
+            fields = tuple(flag for flag, regex in self.emerge_flags 
+                           if regex.match(line))
+        return int(match.group(1)), kind, fields
+    
+    def getstat(self):
+        """
+        Get log file inode and the byte offset just after
+        the last complete line (a line still being written 
+        is left for the next call).
+        :return:
+            Tuple (inode, end) else False.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}getstat::')
+        
+        try:
+            fd = os.open(self.emergelog, os.O_RDONLY)
+        except OSError as error:
+            logger.error(f'Error reading \'{self.emergelog}\': {error}.')
+            return False
+        
+        try:
+            stat = os.fstat(fd)
+            end = stat.st_size
+            if end and not os.pread(fd, 1, end - 1) == b'\n':
+                block = os.pread(fd, min(self.blocksize, end), 
+                                 end - min(self.blocksize, end))
+                end = end - len(block) + block.rfind(b'\n') + 1
+            return stat.st_ino, end
+        finally:
+            os.close(fd)
+    
+    def reverselines(self, end=None, start=0, path=None):
+        """
+        Yield lines from log file, newest first, reading 
+        backward by blocks of self.blocksize bytes. 
+        Stopping the iteration stop reading, so caller
+        only pay for what it need.
+        :param end:
+            Byte offset where to start reading backward. 
+            Default None (end of file).
+        :param start:
+            Byte offset where to stop, it should be the 
+            beginning of a line. Default 0.
+        :param path:
+            File to read, a rotated log can be compressed: it's 
+            read by blocks of self.segment bytes as each one is
+            decompressed again from the beginning of the file.
+            Default None (the log).
+        :return:
+            Yield tuple (offset, line): offset is the byte
+            offset of the beginning of the line.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}reverselines::')
+        
+        path = path or self.emergelog
+        blocksize = self.blocksize
+        try:
+            if self.compressed(path):
+                blocksize = self.segment
+                if end is None:
+                    end = self.archivesize(path)
+                    if end is None:
+                        return
+                myfile = self.openarchive(path)
+                def read(size, position):
+                    myfile.seek(position)
+                    return myfile.read(size)
+                close = myfile.close
+            else:
+                fd = os.open(path, os.O_RDONLY)
+                read = lambda size, position: os.pread(fd, size, position)
+                close = lambda: os.close(fd)
+                if end is None:
+                    end = os.fstat(fd).st_size
+        except OSError as error:
+            logger.error(f'Error reading \'{path}\': {error}.')
+            return
+        
+        try:
+            if end <= start:
+                return
+            # buffer hold bytes from position to position + cut
+            position = end
+            buffer = b''
+            cut = 0
+            while True:
+                index = buffer.rfind(b'\n', 0, cut)
+                if index != -1:
+                    yield (position + index + 1, 
+                           buffer[index+1:cut].decode(errors='replace').rstrip())
+                    cut = index
+                    continue
+                if position <= start:
+                    # First line of the range
+                    yield position, buffer[:cut].decode(errors='replace').rstrip()
+                    return
+                size = min(blocksize, position - start)
+                last = position == end
+                position -= size
+                # Only the partial line is carry over to the next block 
+                buffer = read(size, position) + buffer[:cut]
+                cut = len(buffer)
+                # Skip the last newline so we don't yield an empty line
+                if last and buffer.endswith(b'\n'):
+                    cut -= 1
+        except (OSError, EOFError, lzma.LZMAError, zlib.error) as error:
+            logger.error(f'Error reading \'{path}\': {error}.')
+        finally:
+            close()
+    
+    def getarchives(self):
+        """
+        Get the rotated logs, newest first.
+        :return:
+            List of path.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}getarchives::')
+        
+        directory = os.path.dirname(self.emergelog) or '.'
+        try:
+            archives = [ (entry.stat().st_mtime, entry.path) 
+                         for entry in os.scandir(directory)
+                         if self.rotated.match(entry.name) ]
+        except OSError as error:
+            logger.error(f'Error listing \'{directory}\': {error}.')
+            return [ ]
+        return [ path for mtime, path in sorted(archives, reverse=True) ]
+    
+    def openarchive(self, path):
+        """
+        Open a rotated log in binary mode, decompressing 
+        on the fly (nothing is written to disk).
+        """
+        match = self.rotated.search(path)
+        opener = self.openers.get(match.group(1) if match else None, open)
+        return opener(path, 'rb')
+    
+    def compressed(self, path):
+        """
+        :return:
+            True if path is a compressed rotated log.
+        """
+        match = self.rotated.search(path)
+        return bool(match and match.group(1) in self.openers)
+    
+    def archivesize(self, path):
+        """
+        Get the decompressed size of a rotated log: a compressed
+        one is decompressed by blocks, nothing is kept but the
+        size (see _archivesizes).
+        :return:
+            Size in bytes else None.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}archivesize::')
+        
+        try:
+            stat = os.stat(path)
+            if not self.compressed(path):
+                return stat.st_size
+            key = (path, stat.st_mtime_ns, stat.st_size)
+            if key in _archivesizes:
+                return _archivesizes[key]
+            size = 0
+            with self.openarchive(path) as myfile:
+                while block := myfile.read(self.blocksize):
+                    size += len(block)
+        except (OSError, EOFError, lzma.LZMAError, zlib.error) as error:
+            logger.error(f'Error reading \'{path}\': {error}.')
+            return None
+        # Drop the size of the replaced file
+        for former in [ former for former in _archivesizes 
+                        if former[0] == path ]:
+            del _archivesizes[former]
+        _archivesizes[key] = size
+        return size
+    
+    def backlines(self, end=None):
+        """
+        Same as self.reverselines() but when the beginning of 
+        the log is reached, keep on going with rotated logs. 
+        They are laid out before the log so their byte offsets
+        are negative: emerge.log.1 from -size to 0 and so on.
+        Compressed ones are decompressed on the fly, nothing
+        is written to disk, see self.reverselines().
+        :return:
+            Yield tuple (offset, line).
+        """
+        logger = logging.getLogger(f'{self.__nlogger}backlines::')
+        
+        yield from self.reverselines(end=end)
+        
+        base = 0
+        for path in self.getarchives():
+            size = self.archivesize(path)
+            if size is None:
+                return
+            base -= size
+            for offset, line in self.reverselines(end=size, path=path):
+                yield base + offset, line
+    
+    def forwardlines(self, start=0, end=None):
+        """
+        Yield lines from log file, oldest first, from byte
+        offset start (which should be the beginning of a line)
+        to byte offset end (excluded) or to the end of file.
+        A negative start begin in the rotated logs, see 
+        self.backlines().
+        :return:
+            Yield tuple (offset, line): offset is the byte
+            offset of the beginning of the line.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}forwardlines::')
+        
+        if start < 0:
+            # Find which rotated logs hold start 
+            layout = [ ]
+            base = 0
+            for path in self.getarchives():
+                if base <= start:
+                    break
+                size = self.archivesize(path)
+                if size is None:
+                    return
+                base -= size
+                layout.append((base, path))
+            for base, path in reversed(layout):
+                # Go straight to start, in the oldest one (a 
+                # compressed one is decompressed up to there)
+                position = max(start - base, 0)
+                try:
+                    with self.openarchive(path) as myfile:
+                        myfile.seek(position)
+                        offset = base + position
+                        for line in myfile:
+                            if end is not None and offset >= end:
+                                return
+                            yield (offset, 
+                                   line.decode(errors='replace').rstrip())
+                            offset += len(line)
+                except (OSError, EOFError, lzma.LZMAError, 
+                        zlib.error) as error:
+                    logger.error(f'Error reading \'{path}\': {error}.')
+                    return
+            start = 0
+        
+        try:
+            with open(self.emergelog, 'rb') as myfile:
+                myfile.seek(start)
+                offset = start
+                for line in myfile:
+                    if end is not None and offset >= end:
+                        break
+                    yield offset, line.decode(errors='replace').rstrip()
+                    offset += len(line)
+        except OSError as error:
+            logger.error(f'Error reading \'{self.emergelog}\': {error}.')
+    
+    def findlines(self, pattern, start=0, end=None):
+        """
+        Yield only the lines of the log (not the rotated ones)
+        matching bytes regex pattern: it's searched over the whole
+        byte range at once using a mmap, so lines which don't match
+        are never split nor decoded. pattern should start with 
+        b'\\n' (the end of the previous line): it's a lot faster 
+        than '^' with re.MULTILINE.
+        :return:
+            Yield tuple (offset, line, following): following
+            is the byte offset of the next line.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}findlines::')
+        
+        try:
+            with open(self.emergelog, 'rb') as myfile:
+                size = os.fstat(myfile.fileno()).st_size
+                if end is None or end > size:
+                    end = size
+                # Empty file can't be mapped
+                if start >= end:
+                    return
+                buffer = mmap.mmap(myfile.fileno(), 0, 
+                                   access=mmap.ACCESS_READ)
+                matches = pattern.finditer(buffer, max(start - 1, 0), end)
+                try:
+                    if not start:
+                        # First line: there is no newline before
+                        stop = buffer.find(b'\n', 0, end)
+                        following = end if stop == -1 else stop + 1
+                        if pattern.match(b'\n' + buffer[:following]):
+                            yield (0, buffer[:following].decode(
+                                            errors='replace').rstrip(),
+                                   following)
+                    for match in matches:
+                        offset = match.start() + 1
+                        stop = buffer.find(b'\n', offset, end)
+                        following = end if stop == -1 else stop + 1
+                        yield (offset, buffer[offset:following].decode(
+                                            errors='replace').rstrip(),
+                               following)
+                finally:
+                    # The mapping can't be closed while the 
+                    # iterator hold it (caller could stop early).
+                    del matches
+                    buffer.close()
+        except (OSError, ValueError) as error:
+            logger.error(f'Error reading \'{self.emergelog}\': {error}.')
+    
+    def resume(self, checkpoint, inode, end):
+        """
+        Get the byte offset where to go on reading forward.
+        :param checkpoint:
+            Dictionary with 'inode' and 'offset' (None if 
+            never read) of the last reading.
+        :param inode:
+            Inode of the log.
+        :param end:
+            Size of the log.
+        :return:
+            The byte offset (negative in the rotated logs, see 
+            self.backlines()) else None if the log we were 
+            reading is lost.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}resume::')
+        
+        offset = checkpoint['offset']
+        archives = self.getarchives()
+        if offset is None:
+            # Every rotated logs
+            return - sum(self.archivesize(path) or 0 for path in archives)
+        if checkpoint['inode'] == inode and offset <= end:
+            return offset
+        # Without compression, a rotated log is the log we 
+        # were reading (same inode): the newest one, or an older 
+        # one if the log have been rotated more than once since
+        base = 0
+        for path in archives:
+            try:
+                stat = os.stat(path)
+            except OSError as error:
+                logger.error(f"While checking '{path}': {error}.")
+                return None
+            if stat.st_ino == checkpoint['inode'] and offset <= stat.st_size:
+                return base - stat.st_size + offset
+            size = self.archivesize(path)
+            if size is None:
+                return None
+            base -= size
+        return None
+    
+    def getchunks(self, start, end):
+        """
+        Split byte range start to end in chunks of about 
+        self.chunksize bytes, each one ending on a line.
+        :return:
+            List of tuple (start, end).
+        """
+        chunks = [ ]
+        with open(self.emergelog, 'rb') as myfile:
+            while end - start > self.chunksize:
+                myfile.seek(start + self.chunksize)
+                myfile.readline()
+                stop = myfile.tell()
+                if stop >= end:
+                    break
+                chunks.append((start, stop))
+                start = stop
+        chunks.append((start, end))
+        return chunks
+    
+    def forwardevents(self, start=0, end=None):
+        """
+        Same as self.forwardlines() but each line come with
+        its event (see self.tokenize()). If self.workers > 1 
+        and the byte range is bigger than two chunks, the log
+        (not the rotated ones) is split in chunks tokenized by
+        self.workers processes: they are still yield in order 
+        so the caller state machine run as usual.
+        :return:
+            Yield tuple (offset, line, event).
+        """
+        if start < 0:
+            for offset, line in self.forwardlines(start, 
+                                    0 if end is None else min(end, 0)):
+                yield offset, line, self.tokenize(line)
+            start = 0
+        
+        if self.workers > 1:
+            if end is None:
+                stat = self.getstat()
+                if not stat:
+                    return
+                end = stat[1]
+            if end - start > self.chunksize * 2:
+                yield from self._parallelevents(start, end)
+                return
         
-        nlines = self.getlines()
-        self.log_lines = { }
-        if not nlines:
-            # So we don't know how many lines have emerge.log 
-            # go a head and give an arbitrary count
-            self.log_lines = {
-                'count'    :   60000, 
-                'real'     :   False
-                }
-            logger.error(f"Couldn't get '{self.emergelog}' lines count,"
-                         " setting arbitrary to: "
-                         f"{self.log_lines['count']} lines.")
+        for offset, line in self.forwardlines(start, end):
+            yield offset, line, self.tokenize(line)
+    
+    def _parallelevents(self, start, end):
+        """
+        Tokenize byte range start to end using self.workers
+        processes, see self.forwardevents().
+        """
+        logger = logging.getLogger(f'{self.__nlogger}_parallelevents::')
+        
+        try:
+            chunks = self.getchunks(start, end)
+        except OSError as error:
+            logger.error(f'Error reading \'{self.emergelog}\': {error}.')
+            return
+        logger.debug(f'Tokenizing {self.emergelog} from byte: {start} to'
+                     f' byte: {end} in {len(chunks)} chunks using'
+                     f' {self.workers} processes.')
+        executor = _get_pool(self.emergelog, self.workers)
+        # Only a few chunks are pending so memory stay 
+        # bounded whatever the size of the log.
+        pending = collections.deque()
+        try:
+            for chunk in chunks:
+                pending.append((chunk[0], 
+                                executor.submit(_tokenize_chunk, *chunk)))
+                if len(pending) < self.workers * 2:
+                    continue
+                yield from pending[0][1].result()
+                pending.popleft()
+            while pending:
+                yield from pending[0][1].result()
+                pending.popleft()
+        except (OSError, concurrent.futures.BrokenExecutor) as error:
+            if isinstance(error, concurrent.futures.BrokenExecutor):
+                # Next call start a new one
+                _pools.pop((self.emergelog, self.workers), None)
+            # Nothing have been yield from the first pending chunk
+            start = pending[0][0] if pending else chunk[0]
+            logger.error(f'Error tokenizing \'{self.emergelog}\' using'
+                         f' processes: {error}, going on from byte: {start}'
+                         ' without.')
+            for offset, line in self.forwardlines(start, end):
+                yield offset, line, self.tokenize(line)
+        finally:
+            # Caller could stop early
+            for offset, future in pending:
+                future.cancel()
+ 
+
+
+# Parser of a worker process, see EmergeLogParser.forwardevents()
+_worker = None
+
+# Decompressed size of compressed rotated logs by (path, mtime,
+# size), shared by every parser, see EmergeLogParser.archivesize()
+_archivesizes = { }
+
+# Worker pools by (log, workers), kept for the life of the process:
+# each 'spawn' worker pay an interpreter start-up and the import of
+# this module, too much to pay on every forwardevents() call.
+_pools = { }
+
+
+def _get_pool(log, workers):
+    """
+    Get (start if needed) the worker pool for log.
+    """
+    if not (log, workers) in _pools:
+        if not _pools:
+            atexit.register(_shutdown_pools)
+        # 'spawn' because forking a threaded process (the daemon) 
+        # could dead lock the child.
+        _pools[(log, workers)] = concurrent.futures.ProcessPoolExecutor(
+                            max_workers=workers,
+                            mp_context=multiprocessing.get_context('spawn'),
+                            initializer=_init_worker, 
+                            initargs=(log, ))
+    return _pools[(log, workers)]
+
+
+def _shutdown_pools():
+    while _pools:
+        _pools.popitem()[1].shutdown(wait=True)
+
+
+def _init_worker(log):
+    global _worker
+    _worker = EmergeLogParser(log=log)
+
+
+def _tokenize_chunk(start, end):
+    """
+    Tokenize a chunk in a worker process.
+    :return:
+        List of tuple (offset, line, event).
+    """
+    events = [ ]
+    offset = start
+    with open(_worker.emergelog, 'rb') as myfile:
+        myfile.seek(start)
+        for raw in myfile:
+            if offset >= end:
+                break
+            line = raw.decode(errors='replace').rstrip()
+            events.append((offset, line, _worker.tokenize(line)))
+            offset += len(raw)
+    return events
+
+
+
+class EmergeLogIndex(EmergeLogParser):
+    """
+    On-disk index of emerge.log: byte offset and timestamp of
+    the lines a cold start need to seek to, updated as the 
+    log grow.
+    """
+    def __init__(self, path=None, dryrun=False, **kwargs):
+        """
+        :param path:
+            Index file path. Default None (only kept in memory).
+        :param dryrun:
+            Don't write anything. Default False.
+        """
+        super().__init__(**kwargs)
+        
+        self.__nlogger = f'::{__name__}::EmergeLogIndex::'
+        self.path = path
+        self.dryrun = dryrun
+        # Lines which could be indexed (see self.forward()) so 
+        # catching up only tokenize them (see self.update()).
+        # Like self.tokens but bytes and with ascii whitespaces:
+        # what emerge write.
+        self.landmarks = re.compile(
+            rb'\n\d+:(?:[^\S\n]{2}\*\*\*.(?:emerge.|terminating\.)'
+            rb'|[^\S\n](?:Started.emerge.on:|===.Sync.completed.for.))')
+        self._reset(0)
+        self.load()
+    
+    def _reset(self, inode):
+        """
+        Index from scratch emerge.log with inode.
+        """
+        self.inode = inode
+        # Indexed up to this byte offset
+        self.offset = 0
+        # Each entry is a tuple (offset, timestamp, name)
+        self.entries = {
+            # 1605183558: Started emerge on: nov. 12, 2020 13:19:17
+            'start'     :   [ ],
+            # 1569592932: === Sync completed for gentoo
+            # name is the repository
+            'sync'      :   [ ],
+            # 1605183558:  *** emerge --newuse --update --deep @world
+            # only right after a 'start' line (or on the first line)
+            'world'     :   [ ],
+            # 1605185458:  *** terminating.
+            'stop'      :   [ ]
+            }
+        # Kind of the line just before self.offset
+        self.previous = None
+        # Entries not yet written: (kind, offset, timestamp, name)
+        self.unsaved = [ ]
+        # The whole file have to be written
+        self.rewrite = True
+    
+    def load(self):
+        """
+        Load the index file, a line by entry:
+            inode 1234
+            start 0 1569592862
+            sync 250 1569592932 gentoo
+            offset 2400 sync
+        Entries are only valid up to the last 'offset' line 
+        which also hold the kind of the last indexed line.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}load::')
+        
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r') as myfile:
+                lines = myfile.read().splitlines()
+        except FileNotFoundError:
+            logger.debug(f"Index file '{self.path}' not found,"
+                         " it will be built.")
+            return
+        except OSError as error:
+            logger.error(f"While loading index file '{self.path}':"
+                         f" {error}.")
+            return
+        
+        try:
+            key, inode = lines[0].split()
+            if not key == 'inode':
+                raise ValueError(f"first line: '{lines[0]}'")
+            self._reset(int(inode))
+            pending = [ ]
+            for line in lines[1:]:
+                kind, offset, value, *name = line.split()
+                if kind == 'offset':
+                    for entry in pending:
+                        self.entries[entry[0]].append(entry[1:])
+                    pending = [ ]
+                    self.offset = int(offset)
+                    self.previous = None if value == '-' else value
+                else:
+                    pending.append((kind, int(offset), int(value),
+                                    name[0] if name else None))
+                    # Check the kind now
+                    self.entries[kind]
+        except (IndexError, ValueError, KeyError) as error:
+            logger.warning(f"Index file '{self.path}' is corrupted"
+                           f" ({error}), it will be rebuilt.")
+            self._reset(0)
+            return
+        # Anything after the last 'offset' line
+        # is dropped so it have to be rewritten.
+        self.rewrite = bool(pending)
+        logger.debug(f"Loaded index file '{self.path}': inode: {self.inode},"
+                     f" offset: {self.offset}, entries: "
+                     + ', '.join(f'{kind}: {len(entries)}' 
+                                 for kind, entries in self.entries.items()))
+    
+    def save(self):
+        """
+        Append new entries to the index file or rewrite it
+        if needed.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}save::')
+        
+        if not self.path or self.dryrun:
+            return
+        if not self.unsaved and not self.rewrite:
+            return
+        
+        if self.rewrite:
+            entries = sorted((entry[0], kind, *entry[1:])
+                             for kind, entries in self.entries.items()
+                             for entry in entries)
+            entries = [ (kind, offset, timestamp, name) 
+                        for offset, kind, timestamp, name in entries ]
         else:
-            self.log_lines = {
-                'count'     :   nlines, 
-                'real'      :   True
-                }
-            logger.debug(f"Setting '{self.emergelog}' maximum lines count to:"
-                         + f" {self.log_lines['count']} lines.")
-        # Init numpy range lists
-        self._range = { }
+            entries = self.unsaved
+        lines = [ f'{kind} {offset} {timestamp}' + (f' {name}' if name else '')
+                  for kind, offset, timestamp, name in entries ]
+        lines.append(f'offset {self.offset} {self.previous or "-"}')
+        
+        try:
+            if self.rewrite:
+                # Write a new file then replace: so there is
+                # always a valid one.
+                temporary = f'{self.path}.new'
+                with open(temporary, 'w') as myfile:
+                    myfile.write(f'inode {self.inode}\n')
+                    myfile.write('\n'.join(lines) + '\n')
+                os.replace(temporary, self.path)
+            else:
+                with open(self.path, 'a') as myfile:
+                    myfile.write('\n'.join(lines) + '\n')
+        except OSError as error:
+            logger.error(f"While writing index file '{self.path}': {error}.")
+            return
+        
+        logger.debug(f"{'Wrote' if self.rewrite else 'Appended'}"
+                     f" {len(entries)} entrie(s) to '{self.path}'.")
+        self.unsaved = [ ]
+        self.rewrite = False
+    
+    def forward(self, offset, line, event):
+        """
+        Index an appended line and its event (see self.tokenize()).
+        """
+        timestamp, kind, fields = event
+        if kind == 'start':
+            self._add('start', offset, timestamp)
+        elif kind == 'synced':
+            self._add('sync', offset, timestamp, fields[0])
+        elif (kind == 'emerge' and 'world' in fields
+              and (self.previous == 'start' or not offset)):
+            self._add('world', offset, timestamp)
+        elif kind == 'terminating':
+            self._add('stop', offset, timestamp)
+        self.previous = kind
+    
+    def _add(self, kind, offset, timestamp, name=None):
+        """
+        Add an entry.
+        """
+        self.entries[kind].append((offset, timestamp, name))
+        self.unsaved.append((kind, offset, timestamp, name))
+    
+    def commit(self, end):
+        """
+        Every line up to byte offset end have been indexed 
+        with self.forward(): save the index.
+        """
+        self.offset = end
+        self.save()
+    
+    def update(self, inode, end):
+        """
+        Index what have been appended to emerge.log with inode
+        up to byte offset end, or the whole file if it have been
+        replaced or truncated.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}update::')
+        
+        if not inode == self.inode or self.offset > end:
+            if self.inode:
+                logger.debug(f"{self.emergelog} have been replaced or"
+                             f" truncated (inode: {self.inode} -> {inode},"
+                             f" offset: {self.offset}, size: {end}),"
+                             " rebuilding index.")
+            self._reset(inode)
+        if self.offset < end:
+            logger.debug(f"Indexing {self.emergelog} from byte:"
+                         f" {self.offset} to byte: {end}.")
+            following = self.offset
+            for offset, line, next_offset in self.findlines(self.landmarks,
+                                                            self.offset, end):
+                # Skipped lines are never 'start' ones
+                if not offset == following:
+                    self.previous = None
+                self.forward(offset, line, self.tokenize(line))
+                following = next_offset
+            if not following == end:
+                self.previous = None
+        self.commit(end)
+    
+    def latest(self, kind, name=None):
+        """
+        Return the newest entry of kind (and name if 
+        not None) else None.
+        """
+        for entry in reversed(self.entries[kind]):
+            if name is None or entry[2] == name:
+                return entry
+        return None
+ 
+ 
+ 
+class EmergeLogTimeline(EmergeLogParser):
+    """
+    Timestamp and byte offset of every world update start of 
+    emerge.log ('*** emerge ... @world') in two numpy arrays, 
+    so 'was a world update logged since' a time is a bisection
+    instead of a scan. Only these lines are kept (16 bytes each),
+    in memory: they are found again in a fraction of second. It's
+    an EmergeLogScanner extractor, so it live where the scanner
+    does (the EmergeLogProcess one).
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        
+        self.__nlogger = f'::{__name__}::EmergeLogTimeline::'
+        # Only emerge lines are split and tokenized, see self.update()
+        self.starts = re.compile(rb'\n\d+:[^\S\n]{2}\*\*\*.emerge.')
+        self._reset(0)
+    
+    def _reset(self, inode):
+        """
+        Drop everything, emerge.log with inode will be read
+        from scratch.
+        """
+        self.inode = inode
+        # Read up to this byte offset
+        self.offset = 0
+        # World update starts count, arrays are bigger so 
+        # appending don't copy everything each time.
+        self.size = 0
+        self.timestamps = numpy.zeros(64, dtype=numpy.int64)
+        self.offsets = numpy.zeros(64, dtype=numpy.int64)
+    
+    def __len__(self):
+        return self.size
+    
+    def update(self, inode, end):
+        """
+        Add world update starts appended to emerge.log with inode
+        up to byte offset end (which should be the end of a line), 
+        or read it from scratch if it have been replaced or 
+        truncated.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}update::')
+        
+        if not inode == self.inode or self.offset > end:
+            if self.inode:
+                logger.debug(f"{self.emergelog} have been replaced or"
+                             f" truncated (inode: {self.inode} -> {inode},"
+                             f" offset: {self.offset}, size: {end}),"
+                             " rebuilding timeline.")
+            self._reset(inode)
+        if not self.offset < end:
+            return
+        
+        found = [ ]
+        for offset, line, following in self.findlines(self.starts, 
+                                                      self.offset, end):
+            timestamp, kind, fields = self.tokenize(line)
+            if kind == 'emerge' and 'world' in fields:
+                found.append((timestamp, offset))
+        if found:
+            self._append(found)
+        self.offset = end
+        logger.debug(f"Timeline of {self.emergelog} hold {self.size}"
+                     f" world update(s) (up to byte: {end}).")
+    
+    def _append(self, found):
+        """
+        Add list of tuple (timestamp, offset). A clock going 
+        back get the greatest previous timestamp, so it's sorted.
+        """
+        size = self.size + len(found)
+        if size > len(self.timestamps):
+            capacity = max(size, len(self.timestamps) * 2)
+            for name in ('timestamps', 'offsets'):
+                grown = numpy.zeros(capacity, dtype=numpy.int64)
+                grown[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, grown)
+        timestamps, offsets = zip(*found)
+        timestamps = numpy.array(timestamps, dtype=numpy.int64)
+        if self.size:
+            numpy.maximum(timestamps, self.timestamps[self.size - 1],
+                          out=timestamps)
+        numpy.maximum.accumulate(timestamps, out=timestamps)
+        self.timestamps[self.size:size] = timestamps
+        self.offsets[self.size:size] = offsets
+        self.size = size
+    
+    def find_offset(self, timestamp):
+        """
+        Bisect the first world update started at or after 
+        timestamp.
+        :return:
+            Its byte offset else self.offset (none since).
+        """
+        index = numpy.searchsorted(self.timestamps[:self.size], timestamp,
+                                   side='left')
+        if index < self.size:
+            return int(self.offsets[index])
+        return self.offset
+    
+    def world_logged(self, since):
+        """
+        Check if a world update have been logged since timestamp
+        since.
+        :return:
+            True if found else False.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}world_logged::')
+        
+        # Timestamps are in seconds
+        offset = self.find_offset(int(since))
+        logger.debug(f"World update logged since: {since}:"
+                     f" {offset < self.offset} (byte: {offset}).")
+        return offset < self.offset
+    
+    def rewind(self, inode, end):
+        """
+        Nothing to do: lines are searched, not read, 
+        see self.finish().
+        """
+        pass
+    
+    def backward(self, offset, line):
+        """
+        Nothing needed from a backward reading.
+        :return:
+            True.
+        """
+        return True
+    
+    def lookup(self, index):
+        """
+        Same as self.backward().
+        """
+        return True
+    
+    def forward(self, offset, line, event):
+        """
+        Same as self.rewind().
+        """
+        pass
+    
+    def finish(self, inode, end, backward):
+        """
+        Add the world update starts appended (or every one).
+        :return:
+            The number of world update starts.
+        """
+        self.update(inode, end)
+        return self.size
+ 
 
-    def getlines(self):
-        """
-        Get total number of lines from log file
-        """
-        logger = logging.getLogger(f'{self.__nlogger}getlines::')
-        
-        myargs = ['/bin/wc', '--lines', self.emergelog]
-        mywc = subprocess.Popen(myargs, preexec_fn=on_parent_exit(),
-                                stdout=subprocess.PIPE, 
-                                stderr=subprocess.PIPE, 
-                                universal_newlines=True)
-        
-        nlines = re.compile(r'^(\d+)\s.*$')
-        
-        for line in mywc.stdout:
-            if nlines.match(line):
-                return int(nlines.match(line).group(1))
-        mywc.stdout.close()
-        
-        return_code = mywc.poll()
-        if return_code:
-            logger.error(f'Got error while getting lines number for \'{self.emergelog}\' file.')
-            logger.error('Command: {0}, return code: {1}'.format(' '.join(myargs), return_code))
-            for line in mywc.stderr:
-                line = line.rstrip()
-                if line:
-                    logger.error(f'Stderr: {line}')
-            mywc.stderr.close()
-        # Got nothing
-        return False
-   
-   
-    def getlog(self, lastlines=500):
+
+class EmergeLogScanner(EmergeLogParser):
+    """
+    Read emerge.log once for several extractors.
+    """
+    def __init__(self, *extractors, index=None, **kwargs):
         """
-        Get last n lines from log file
-        https://stackoverflow.com/a/136280/11869956
+        :param extractors:
+            Objects which provide:
+            rewind(inode, end): a backward reading, from byte 
+                offset end, is about to start. Return None, or 
+                a byte offset (negative in the rotated logs) to 
+                get instead every event from there to end through
+                forward(): one forward reading is shared by every
+                such extractor.
+            backward(offset, line): a line read backward, return 
+                True when nothing more is needed. Lines are not
+                tokenized here: going backward, an extractor only 
+                need few of them and know which ones.
+            forward(offset, line, event): a line appended since 
+                last call and its event (see self.tokenize()).
+            lookup(index): like backward() but using an 
+                EmergeLogIndex, called after rewind(). Return True
+                when nothing more is needed, else backward() is
+                called for the rotated logs.
+            finish(inode, end, backward): reading is over, return 
+                the extracted informations.
+        :param index:
+            EmergeLogIndex to keep updated and to use instead 
+            of reading backward. Default None.
         """
+        super().__init__(**kwargs)
         
-        logger = logging.getLogger(f'{self.__nlogger}getlog::')
-                
-        myargs = ['/bin/tail', '-n', str(lastlines), self.emergelog]
-        mytail = subprocess.Popen(myargs, preexec_fn=on_parent_exit(),
-                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-        
-        # From https://stackoverflow.com/a/4417735/11869956
-        for line in iter(mytail.stdout.readline, ""):
-            yield line.rstrip()
-        mytail.stdout.close()
-        
-        return_code = mytail.poll()
-        if return_code:
-            logger.error(f'Error reading \'{self.emergelog}\','
-                         + f" command: \'{' '.join(myargs)}\'," 
-                         + f' return code: \'{return_code}\'.')
-            for line in mytail.stderr:
-                line = line.rstrip()
-                if line:
-                    logger.error(f'Stderr: {line}')
-            mytail.stderr.close()
-            
-             
-    def keep_collecting(self, curr_loop, msg, key):
+        self.__nlogger = f'::{__name__}::EmergeLogScanner::'
+        self.extractors = extractors
+        self.index = index
+        # Where the last reading stop
+        self.inode = 0
+        self.offset = 0
+    
+    def __call__(self):
         """
-        Restart collecting if nothing has been found and
-        managing lastlines increment to load.
+        Read only what have been appended since last call 
+        or, the first time and if the file have been replaced 
+        or truncated (rotated), look it up in the index or, without
+        index, read backward until every extractor is done: going on
+        with rotated logs if needed.
+        :return:
+            A list with the result of each extractor.
         """
-               
-        logger = logging.getLogger(f'{self.__nlogger}keep_collecting::')
+        logger = logging.getLogger(f'{self.__nlogger}__call__::')
         
-        if not self.log_lines['real']:
-            additionnal_msg='(unknow maximum lines)'
+        stat = self.getstat()
+        if not stat:
+            return [ False for extractor in self.extractors ]
+        inode, end = stat
+        
+        backward = False
+        if inode == self.inode and self.offset <= end:
+            if self.offset < end:
+                logger.debug(f"Following {self.emergelog} from byte: "
+                             f"{self.offset} to byte: {end}.")
+                consumers = self.extractors
+                # Feed the index as well if it's at the same place
+                indexing = (self.index and self.index.inode == inode
+                            and self.index.offset == self.offset)
+                if indexing:
+                    consumers = (*consumers, self.index)
+                for offset, line, event in self.forwardevents(self.offset,
+                                                              end):
+                    for consumer in consumers:
+                        consumer.forward(offset, line, event)
+                if indexing:
+                    self.index.commit(end)
+            if self.index:
+                # Nothing to do if already up to date
+                self.index.update(inode, end)
         else:
-            additionnal_msg='(it is the maximum)'
-        # Get loop count
-        loop_count = len(self._range[key])
-        
-        if curr_loop < loop_count:
-            logger.debug(f'Retry {curr_loop}/{loop_count - 1}: {msg[0]}' 
-                         + ' not found, reloading an bigger increment...')
-            self.lastlines = self._range[key][curr_loop]
-            return True
-        elif curr_loop >= loop_count:
-            logger.error(f'After {loop_count - 1} retries and {self.lastlines} lines read' 
-                         + f' {additionnal_msg}, {msg[0]} not found.')
-            logger.error(f'Look like the system {msg[1]}')
-            return False
+            if self.inode:
+                logger.debug(f"{self.emergelog} have been replaced or"
+                             f" truncated (inode: {self.inode} -> {inode},"
+                             f" offset: {self.offset}, size: {end}),"
+                             " reading from scratch.")
+            backward = True
+            # Extractors reading forward from their checkpoint
+            following = [ ]
+            running = [ ]
+            for extractor in self.extractors:
+                begin = extractor.rewind(inode, end)
+                if begin is None:
+                    running.append(extractor)
+                else:
+                    following.append((begin, extractor))
+            # Where to start reading backward
+            start = end
+            if self.index:
+                self.index.update(inode, end)
+                logger.debug(f"Looking up index for {len(running)}"
+                             " extractor(s).")
+                running = [ extractor for extractor in running 
+                            if not extractor.lookup(self.index) ]
+                # The index cover the whole log: only 
+                # the rotated ones are left
+                start = 0
+            if running:
+                logger.debug(f"Reading backward from {self.emergelog}"
+                             f" (byte: {start}) for {len(running)}"
+                             " extractor(s).")
+                for offset, line in self.backlines(end=start):
+                    running = [ extractor for extractor in running 
+                                if not extractor.backward(offset, line) ]
+                    if not running:
+                        break
+            if following:
+                begin = min(begin for begin, extractor in following)
+                logger.debug(f"Reading forward from byte: {begin} to byte:"
+                             f" {end} for {len(following)} extractor(s).")
+                for offset, line, event in self.forwardevents(begin, end):
+                    for begin, extractor in following:
+                        if offset >= begin:
+                            extractor.forward(offset, line, event)
+        
+        self.inode = inode
+        self.offset = end
+        return [ extractor.finish(inode, end, backward) 
+                 for extractor in self.extractors ]
  
  
  
@@ -145,15 +1191,33 @@ class LastSync(EmergeLogParser):
     """
     Extract the last sync timestamp
     """
-    def __init__(self, lastlines=500, nrange=10, **kwargs):
+    def __init__(self, checkpoint=None, **kwargs):
+        """
+        :param checkpoint:
+            Dictionary from a previous call: 'inode' and 'offset'
+            of emerge.log and the latest 'timestamp' found. 
+            emerge.log is append only, so as long as inode is the 
+            same and file is not smaller, only bytes appended after
+            'offset' are parsed. Default None (parse from scratch).
+        """
         super().__init__(**kwargs)     
         
-        self.lastlines = lastlines
-        # construct exponantial list
-        self._range['sync'] = numpy.geomspace(self.lastlines, self.log_lines['count'], 
-                                              num=nrange, endpoint=True, dtype=int)
         self.__nlogger = f'::{__name__}::LastSync::' 
         
+        self.checkpoint = {
+            'inode'     :   0,
+            'offset'    :   0,
+            'timestamp' :   0
+            }
+        if checkpoint:
+            self.checkpoint.update(checkpoint)
+        
+        self.latest = False
+        # From where the checkpoint can be used
+        self.resume = None
+        # For standalone calling
+        self.scanner = EmergeLogScanner(self, log=self.emergelog)
+        
     def __call__(self):
         """
         Return last sync timestamp
@@ -191,50 +1255,95 @@ class LastSync(EmergeLogParser):
             adapt from https://stackoverflow.com/a/54023859/11869956
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}get::')
-        
-        completed_re = re.compile(r'^(\d+):\s{1}===.Sync.completed.for.gentoo$')
-        collect = [ ]
-        keep_running = True
-        count = 1
-        
-        while keep_running:
-            logger.debug('Loading last {0} lines from {1}.'.format(self.lastlines, self.emergelog))
-            logger.debug('Extracting list of successfully sync for main repo gentoo.')
-            for line in self.getlog(self.lastlines):
-                if completed_re.match(line):
-                    current_timestamp = int(completed_re.match(line).group(1))
-                    collect.append(current_timestamp)
-                    logger.debug(f'Recording: {current_timestamp}.')
-            # Collect is finished.
-            # If we got nothing then extend last lines for self.getlog()
-            if collect:
-                keep_running = False
-            else:
-                # keep_collecting manage self.lastlines increment
-                if self.keep_collecting(count, ['last sync timestamp for main repo \'gentoo\'', 
-                                            'never sync...'], 'sync'):
-                    count = count + 1
-                    keep_running = True
-                else:
-                    return False
-        
-        latest = collect[0]
-        # Don't need to proceed if list item == 1
-        if len(collect) == 1:
-            logger.debug(f'Selecting latest: \'{latest}\'.')
-            return latest
-        # otherwise get the latest timestamp
-        logger.debug('Extracting latest sync from:' 
-                     + ' {0}'.format(', '.join(str(timestamp) for timestamp in collect)))
-        for timestamp in collect:
-            if timestamp > latest:
-                latest = timestamp
-        if latest:
-            logger.debug(f'Selecting latest: \'{latest}\'.')
-            return latest
-        
-        logger.error('Failed to found latest update timestamp for main repo gentoo.')
+        return self.scanner()[0]
+    
+    def rewind(self, inode, end):
+        """
+        Setup a backward reading from byte offset end.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}rewind::')
+        
+        self.latest = False
+        self.resume = None
+        if (inode == self.checkpoint['inode'] 
+                and self.checkpoint['offset'] <= end):
+            # Everything before the checkpoint have already been read
+            self.resume = self.checkpoint['offset']
+        elif self.checkpoint['inode']:
+            logger.debug(f'{self.emergelog} have been replaced or truncated'
+                         f' (inode: {self.checkpoint["inode"]} -> {inode},'
+                         f' offset: {self.checkpoint["offset"]}, size: {end}),'
+                         ' reading from scratch.')
+        logger.debug('Searching last successfully sync for main repo gentoo'
+                     f' (from byte {end} to {self.resume or 0}).')
+    
+    def backward(self, offset, line):
+        """
+        Search backward the first completed sync.
+        :return:
+            True when found else False.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}backward::')
+        
+        if self.resume is not None and offset < self.resume:
+            self.latest = self.checkpoint['timestamp'] or False
+            logger.debug(f'Reached checkpoint at byte: {self.resume},'
+                         f' keeping: \'{self.latest}\'.')
+            return True
+        # emerge.log is sorted by time: the first match 
+        # from the end is the latest one, so stop here.
+        if not line.endswith('gentoo'):
+            return False
+        timestamp, kind, fields = self.tokenize(line)
+        if kind == 'synced' and fields[0] == 'gentoo':
+            self.latest = timestamp
+            logger.debug(f'Selecting latest: \'{self.latest}\''
+                         f' (at byte: {offset}).')
+            return True
+        return False
+    
+    def lookup(self, index):
+        """
+        Get the last completed sync from the index.
+        :return:
+            True when found else False.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}lookup::')
+        
+        entry = index.latest('sync', 'gentoo')
+        if entry:
+            self.latest = entry[1]
+            logger.debug(f'Selecting latest: \'{self.latest}\''
+                         f' (at byte: {entry[0]}).')
+            return True
+        return False
+    
+    def forward(self, offset, line, event):
+        """
+        Search completed sync in appended line.
+        """
+        if event[1] == 'synced' and event[2][0] == 'gentoo':
+            self.latest = event[0]
+    
+    def finish(self, inode, end, backward):
+        """
+        Save checkpoint and return last sync timestamp 
+        else False.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}finish::')
+        
+        self.checkpoint = {
+            'inode'     :   inode,
+            'offset'    :   end,
+            'timestamp' :   self.latest or 0
+            }
+        
+        if self.latest:
+            return self.latest
+        
+        logger.error('After reading the whole file, last sync timestamp'
+                     ' for main repo \'gentoo\' not found.')
+        logger.error('Look like the system never sync...')
         return False
       
       
@@ -242,17 +1351,13 @@ class LastSync(EmergeLogParser):
 class LastWorldUpdate(EmergeLogParser):
     """
     Extract the last world update informations.
+    The parser state is kept between calls so, after 
+    the first call, only the lines appended to the log 
+    file are parsed.
     """
-    def __init__(self,  lastlines=3000, incomplete=2,
-                 fragment=2, nrange=8, advanced_debug=False,
+    def __init__(self, incomplete=2, fragment=2, advanced_debug=False,
                  debug_show_all_lines=False, **kwargs):
         """
-        :param lastlines:  
-            Read last n lines from emerge log file (as we don't have
-            to read all the file to get last world update)
-            Can be tweak but any way if you lower it and if the function
-            don't get anything in the first pass it will increment it 
-            depending on function keep_collecting(). Default 3000. 
         :param incomplete:
             Enable or disable the search for start but failed update world.
             True for enable without limiter. False for disable. 
@@ -273,8 +1378,6 @@ class LastWorldUpdate(EmergeLogParser):
             at 30, restart and definetly failed at 20 and fragment=45 then 
             this will be recorded. Float setup, will filter by percentage. 
             Default 2.
-        :param nrange: 
-            List length for numpy to build an exponantial list. Default 8. 
         :param advanced_debug:
             Enable or disable advanced debugging. This will make A LOT of log.
             True for enable else False. Default False. Note: if logging level
@@ -301,22 +1404,28 @@ class LastWorldUpdate(EmergeLogParser):
         super().__init__(**kwargs)
                
         self.__nlogger = f'::{__name__}::LastWorldUpdate::'
-        self.lastlines = lastlines
         self.incomplete = incomplete
         self.fragment = fragment
         self.advanced_debug = advanced_debug
         self.debug_show_all_lines = debug_show_all_lines
-        
-        # construct exponantial list
-        self._range['world'] = numpy.geomspace(self.lastlines, 
-                                               self.log_lines['count'], 
-                                               num=nrange, endpoint=True,
-                                               dtype=int)
+        # Methods are called for each line: see HotLogger
+        self.loggers = HotLogger(self.__nlogger, 
+                                 advanced_debug=advanced_debug)
         
         self.collect = [ ]
-        # Reading line from self.getlog() generator 
-        # (EmergeLogParser)
+        # A group still running when the last line read is a 
+        # terminating_line: saved as it is but kept out of
+        # self.parser so it can still be resumed.
+        self.pending = False
+        # Reading line from self.forwardlines() generator 
+        # (EmergeLogParser) or from EmergeLogScanner
         self.line = False
+        # Its event, see EmergeLogParser.tokenize()
+        self.timestamp, self.kind, self.fields = NOEVENT
+        # Backward reading state, see self.rewind()
+        self.rewinding = { }
+        # Lines have been appended since last finish()
+        self.appended = False
         
         # Parser to store all extracted informations
         # and all configurations. Can be reset in one
@@ -329,83 +1438,40 @@ class LastWorldUpdate(EmergeLogParser):
         self._load_default_cfg(init=True)
         
         ## RE setup ##
-        self.start_emerge = re.compile(r'^(\d+):\s{1}Started.emerge.on:.*$')
-        # Added @world
-        # Added \s* after (?:world|@world) to make 
-        # sure we match only @world or world 
-        # Should we match with '.' or '\s' ??
-        self.start_opt = re.compile(r'^(\d+):\s{2}\*\*\*.emerge.*\s'
-                                     '(?:world|@world)\s*.*$')
-        # So match emerge but NOT follow by --depclean 
-        # or --sync or --resume
-        self.start_parallel = re.compile(r'^\d+:\s{2}\*\*\*.emerge.'
-                                          '(?!.*(--depclean|--sync|--resume)'
-                                          '.*$)')
-        # match emerge --resume
-        self.resume_opt = re.compile(r'^\d+:\s{2}\*\*\*.emerge.*'
-                                        '\s--resume\s.*$')
-        # Detect package dropped due to unmet dependency
-        # for exemple (display in terminal only):
-        #   * emerge --keep-going: kde-apps/dolphin-19.08.3 dropped
-        #                                       because it requires
-        #   * >=kde-apps/kio-extras-19.08.3:5
-        # BUT we get nothing in a emerge.log about that.
-        # We CAN'T have the name of the package.
-        # Just get the number and display some more informations, like:
-        # (+n package(s) dropped) - this has to be TEST more and more
-        self.keepgoing_opt = re.compile(r'^.*\s--keep-going\s.*$')
-        # For --resume make sure its restart
-        self.start_resume = re.compile(r'^\d+:\s{2}\*\*\*'
-                                        '.Resuming.merge\.\.\.$')
-        # So make sure we start to compile the world update 
-        # and this should be the first package 
-        self.start_compiling = re.compile(r'^\d+:\s{2}>>>.emerge.'
-                                           '\(1.of.(\d+)\)'
-                                           '\s(.*)\sto.*$')
-        # For finished line:
-        #   1569179409:  *** Finished. Cleaning up...
-        self.finished_line = re.compile(r'(\d+):\s{2}\*\*\*.Finished'
-                                         '\..Cleaning up\.\.\.$')
-        # For terminating line:
-        #   1563026610:  *** terminating.
-        self.terminating_line = re.compile(r'\d+:\s{2}\*\*\*.terminating\.$')
-        # For exiting line:
-        self.exiting_line = re.compile(r'\d+:\s{2}\*\*\*.exiting\s{1}'
-                                        '(?:successfully|unsuccessfully).*$')
-        # Make sure it failed with status == 1
-        self.failed_line = re.compile(r'(\d+):\s{2}\*\*\*.exiting.'
-                                       'unsuccessfully.with.status.\'1\'\.$')
-        self.succeeded_line = re.compile(r'(\d+):\s{2}\*\*\*.exiting.'
-                                          'successfully\.$')
+        # Everything else is matched once in self.tokenize()
+        # Start and stop of the current package (count of total). 
+        # Count and total are changing so, instead of compiling a new
+        # regex for each package, they are given in front of the line:
+        #   '<count> <total>|<line>' and matched using backreference.
+        self.start_current = re.compile(r'^(\d+)\s(\d+)\|\d+:\s{2}>>>'
+                                         r'.emerge.\(\1.*of.*\2\)\s(.*)'
+                                         r'\sto.*$')
+        self.stop_current = re.compile(r'^(\d+)\s(\d+)\|\d+:\s{2}:::'
+                                        r'.completed.emerge.\(\1.*of.*\2\)'
+                                        r'.*$')
+        # For standalone calling
+        self.scanner = EmergeLogScanner(self, log=self.emergelog)
         # TODO Give a choice to enable or disable 
         # incomplete/fragment collect
         
         # TODO TODO TODO Add @sytem / system parser !
         
-        # TODO improve performance:
-        # For 51808 lines read (the whole file) - but it's not 
-        #   Elapsed Time: 2.97 seconds.  Collected 217 stack 
-        #                                  frames (88 unique)
-        # 
-        # For 129761 lines read:
-        #   23296316 function calls (22688021 primitive calls)
-        #                                    in 10.764 seconds
-        
-        # With default settings (3000 lines):
-        #   OLD version: Elapsed Time: 0.40 seconds. Collected 118 
-        #                                  stack frames (82 unique)
-        #   NEW version: 508617 function calls (495529 primitive calls)
-        #                                              in 0.316 seconds
+        # Performance: see benchmarks/, like:
+        #   python -m benchmarks.run --benches lastworld statemachine
     
     def __call__(self):
         """
         Collect and return the informations.
         """
+        return self.scanner()[0]
+    
+    def rewind(self, inode, end):
+        """
+        Setup a backward reading from byte offset end.
+        """
         
-        logger = logging.getLogger(f'{self.__nlogger}__call__::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        self.loggers.refresh()
+        logger = self.loggers('rewind')
         
         incomplete_msg = ''
         if self.incomplete:
@@ -415,80 +1481,147 @@ class LastWorldUpdate(EmergeLogParser):
         if self.fragment:
             fragment_msg = ', partial and fragmented'
             
-        keep_running =  True
-        count = 1                    
-
-        while keep_running:
-            logger.debug(f"Loading last {self.lastlines} lines"
-                         f" from {self.emergelog}.")
-            logger.debug(f"Extracting list of complete{incomplete_msg}"
-                         f"{fragment_msg} group for global"
-                         " update informations.")
-            for self.line in self.getlog(self.lastlines):
-                # Show all logparser line for extra debugging
-                if self.debug_show_all_lines:
-                    logger.debug2(f"Loading current line: {self.line}")
-                
-                self.parser['line'] += 1
-                if self.parser['running']:
-                    # everything start with self._running()
-                    self._running()
-                elif self.start_opt.match(self.line):
-                    logger.debug2(f"start_opt match at line: {self.line}")
-                    self._config_detected()
-                # So check if nextline match start_opt.
-                # self.parser['line'] is set to '0' in 
-                # self._config_detected()
-                elif (self.parser['line'] == 1 
-                      and 'start' in self.parser['group']):
-                    # Have to be validate
-                    self._validate_start()
-            
-            # Parsing finished 
-            # TEST make sure we haven't skip any world update
-            # in progress which failed / was stopped (ctr+c kill)
-            if self.parser['running']:
-                logger.debug(f"Still something left running: {self.parser}")
-                if self.terminating_line.match(self.line):
-                    # Ok so this mean the last line of emerge.log 
-                    # file is a terminating_line. 
-                    # So this is an incomplete or fragment group.
-                    logger.debug2(f"terminating_line match at line: {self.line}")
-                    # Make sure we get the same stop timestamp every 
-                    # where otherwise this will be treat as an 
-                    # world update.
-                    # SO don't get stop timestamp from 
-                    # terminating_line.match line but from 
-                    # _set_stop_timestamp()
-                    if self._set_stop_timestamp():
-                        self._save_switcher()
-            # Check we get something
-            if self.collect:
-                logger.debug2("Stop running, collect have been successfull.")
-                keep_running = False
-            elif self.keep_collecting(count, 
-                                      ['last global update informations', 
-                                       "have never been update using 'world'"
-                                       " update schema..."], 'world'):
-                keep_running = True
-                count += 1
+        logger.debug(f"Extracting list of complete{incomplete_msg}"
+                     f"{fragment_msg} group for global"
+                     " update informations.")
+        
+        self.collect = [ ]
+        self.pending = False
+        self.appended = False
+        self.rewinding = {
+            # Where the backward reading start
+            'end'       :   end,
+            # State of the newest segment which is 
+            # the one to keep on going with
+            'current'   :   None,
+            # Byte offset of the newer candidate
+            'boundary'  :   None,
+            # The line read just before: (offset, line)
+            'following' :   None
+            }
+    
+    def backward(self, offset, line):
+        """
+        A world update always start with a start_emerge line
+        followed by a start_opt line. Going backward, each one is
+        a candidate: parse forward from it to the newer candidate
+        (or end) and stop as soon as something is collected.
+        So every line is parsed at most once and we never
+        restart from end.
+        :return:
+            True when something have been collected else False.
+        """
+        following = self.rewinding['following']
+        self.rewinding['following'] = (offset, line)
+        # Only tokenize what could be a start_emerge line
+        if (following and 'Started' in line 
+                and self.tokenize(line)[1] == 'start'
+                and self._world_emerge(following[1])):
+            if self.loggers.debug2:
+                self.loggers('backward').debug2("start_opt candidate at byte:"
+                                                f" {following[0]}, line:"
+                                                f" {following[1]}")
+            return self._candidate(following[0])
+        return False
+    
+    def _candidate(self, offset):
+        """
+        Parse the candidate starting at byte offset.
+        :return:
+            True if something have been collected else False.
+        """
+        self._parse_segment(offset, stop=self.rewinding['boundary'],
+                            end=self.rewinding['end'])
+        if self.rewinding['current'] is None:
+            self.rewinding['current'] = self.parser
+            self.parser = { }
+        if self.collect or self.pending:
+            return True
+        self.rewinding['boundary'] = offset
+        return False
+    
+    def lookup(self, index):
+        """
+        Same as self.backward() but only on the 
+        candidates from the index.
+        :return:
+            True when something have been collected else False.
+        """
+        for offset, timestamp, name in reversed(index.entries['world']):
+            if self.loggers.debug2:
+                self.loggers('lookup').debug2("start_opt candidate at byte:"
+                                              f" {offset}")
+            if self._candidate(offset):
+                return True
+        return False
+    
+    def forward(self, offset, line, event):
+        """
+        Keep on parsing with an appended line.
+        """
+        self.line = line
+        self.appended = True
+        self._parse_line(event)
+    
+    def finish(self, inode, end, backward):
+        """
+        Return the last world update informations.
+        """
+        
+        logger = self.loggers('finish')
+        # Before keeping on parsing appended lines
+        self.loggers.refresh()
+        
+        if backward:
+            following = self.rewinding['following']
+            # The first line of the file doesn't have
+            # a start_emerge line before.
+            if (not self.collect and not self.pending and following
+                    and self._world_emerge(following[1])):
+                self._candidate(following[0])
+            # Keep the state at end so only 
+            # appended lines have to be parsed
+            if self.rewinding['current'] is None:
+                # Nothing running
+                self.parser = { }
+                self._load_default_cfg(init=True)
             else:
-                logger.debug("FAILED to collect last world update informations.")
-                return False
-          
+                self.parser = self.rewinding['current']
+            self.rewinding = { }
+        elif self.appended:
+            self._check_pending()
+            self.appended = False
+        
+        if not self.collect and not self.pending:
+            logger.error("After reading the whole file, last global update"
+                         " informations not found.")
+            logger.error("Look like the system have never been update using"
+                         " 'world' update schema...")
+            return False
+        
         # So now compare and get the highest 'start' timestamp from each list
-        logger.debug2("Extracting lastest world update informations from "
-                      f"complete{incomplete_msg}{fragment_msg}"
-                      " collected lists.")
+        if self.loggers.debug2:
+            logger.debug2("Extracting lastest world update informations from "
+                          "collected lists.")
         
-        latest_timestamp = self.collect[0]['start']
-        latest_sublist = self.collect[0]
+        latest_timestamp = 0
+        latest_sublist = False
         for sublist in self.collect:
-            logger.debug2(f"Inspecting: {sublist}.")
-            if sublist['start'] > latest_timestamp:
+            if self.loggers.debug2:
+                logger.debug2(f"Inspecting: {sublist}.")
+            if not latest_sublist or sublist['start'] > latest_timestamp:
                 latest_timestamp = sublist['start']
                 # Ok we got latest
                 latest_sublist = sublist
+        # Only the latest is needed for next call
+        if latest_sublist:
+            self.collect = [ latest_sublist ]
+        
+        if self.pending and (not latest_sublist 
+                             or self.pending['start'] > latest_timestamp):
+            if self.loggers.debug2:
+                logger.debug2(f"Inspecting pending: {self.pending}.")
+            latest_sublist = self.pending
         
         if latest_sublist:
             failed = f" failed: {latest_sublist['failed']},"
@@ -507,6 +1640,102 @@ class LastWorldUpdate(EmergeLogParser):
             logger.error('FAILED to found latest global update informations.')
             return False
         
+    def _parse_segment(self, start, stop=None, end=None):
+        """
+        Run the parser from byte offset start to the line at 
+        byte offset stop (included) or to byte offset end 
+        (excluded) if stop is None.
+        """
+        
+        # Each segment start from scratch
+        self._load_default_cfg(init=not self.parser)
+        
+        for offset, self.line, event in self.forwardevents(start, end):
+            self._parse_line(event)
+            # The newer candidate have been processed:
+            # anything after belong to the newer segment.
+            if offset == stop:
+                return
+        
+        self._check_pending()
+    
+    def _parse_line(self, event):
+        """
+        Run the parser on self.line and its event.
+        """
+        # Show all logparser line for extra debugging
+        if self.debug_show_all_lines and self.loggers.debug2:
+            self.loggers('_parse_line').debug2("Loading current line:"
+                                               f" {self.line}")
+        
+        self.timestamp, self.kind, self.fields = event
+        self.parser['line'] += 1
+        if self.parser['running']:
+            # everything start with self._running()
+            self._running()
+        elif self.kind == 'emerge' and 'world' in self.fields:
+            if self.loggers.debug2:
+                self.loggers('_parse_line').debug2("start_opt match at line:"
+                                                   f" {self.line}")
+            self._config_detected()
+        # So check if nextline match start_opt.
+        # self.parser['line'] is set to '0' in 
+        # self._config_detected()
+        elif (self.parser['line'] == 1 
+              and 'start' in self.parser['group']):
+            # Have to be validate
+            self._validate_start()
+    
+    def _world_emerge(self, line):
+        """
+        Line is a world update emerge command, like:
+            1605183558:  *** emerge --newuse --update --deep @world
+        """
+        timestamp, kind, fields = self.tokenize(line)
+        return kind == 'emerge' and 'world' in fields
+    
+    def _start_compiling(self):
+        """
+        Current line start to compile the first package, like:
+            1605183716:  >>> emerge (1 of 54) x11-apps/xkbcomp-1.4.4 to /
+        """
+        return self.kind == 'merge' and self.fields[0] == 1
+    
+    def _check_pending(self):
+        """
+        Parsing finished, make sure we haven't skip any world 
+        update in progress which failed / was stopped (ctr+c kill)
+        """
+        
+        logger = self.loggers('_check_pending')
+        
+        self.pending = False
+        if self.parser['running']:
+            logger.debug(f"Still something left running: {self.parser}")
+            if self.kind == 'terminating':
+                # Ok so this mean the last line read is
+                # a terminating_line. 
+                # So this is an incomplete or fragment group.
+                # But it could be resumed later (--resume) so
+                # work on a copy and keep the parser running.
+                if self.loggers.debug2:
+                    logger.debug2("terminating_line match at line:"
+                                  f" {self.line}")
+                running = copy.deepcopy(self.parser)
+                collected = len(self.collect)
+                # Make sure we get the same stop timestamp every 
+                # where otherwise this will be treat as an 
+                # world update.
+                # SO don't get stop timestamp from 
+                # terminating_line.match line but from 
+                # _set_stop_timestamp()
+                if self._set_stop_timestamp():
+                    self._save_switcher()
+                if len(self.collect) > collected:
+                    self.pending = self.collect.pop()
+                del self.collect[collected:]
+                self.parser = running
+    
     def _load_default_cfg(self, include=(), exclude=(),
                           init=False, verbose=False):
         """
@@ -525,10 +1754,7 @@ class LastWorldUpdate(EmergeLogParser):
             advanced_debug=True. Default False.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_load_default_cfg::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_load_default_cfg')
         
         # Default keys/values:
         __defaults = {
@@ -593,42 +1819,44 @@ class LastWorldUpdate(EmergeLogParser):
         else:
             msg = "Reloading of all default attributes."
                 
-        logger.debug2(msg)
+        if self.loggers.debug2:
+            logger.debug2(msg)
         
         for key, value in __defaults.items():
             if include and not key in include:
-                if verbose:
+                if verbose and self.loggers.debug2:
                     logger.debug2("Skip reload for not included key:"
                                  f" {key}, current value: {self.parser[key]}")
                 continue
             elif exclude and key in exclude:
-                if verbose:
+                if verbose and self.loggers.debug2:
                     logger.debug2("Skip reload for excluded key:"
                                  f" {key}, current value: {self.parser[key]}")
                 continue
-            if verbose and not init:
-                logger.debug2(f"Reloading key: {key}, value: current:"
-                              f" {self.parser[key]}, default: "
-                              f"{__defaults[key]}")
-            elif verbose and init:
-                logger.debug2(f"Init key: {key}, default: {__defaults[key]}")
+            if verbose and self.loggers.debug2:
+                if not init:
+                    logger.debug2(f"Reloading key: {key}, value: current:"
+                                  f" {self.parser[key]}, default: "
+                                  f"{__defaults[key]}")
+                else:
+                    logger.debug2(f"Init key: {key},"
+                                  f" default: {__defaults[key]}")
             self.parser[key] = __defaults[key]
             
     def _config_detected(self):
         """
         World update start setup
         """
-        logger = logging.getLogger(f'{self.__nlogger}_config_detected::')
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_config_detected')
         
         #self.parser['group'] = { }
         self._load_default_cfg(include=('group',))
         # Get the timestamp
-        self.parser['group']['start'] = int(self.start_opt.match(self.line).group(1))
+        self.parser['group']['start'] = self.timestamp
         # --keep-going setup
-        if self.keepgoing_opt.match(self.line):
-            logger.debug2(f"keepgoing_opt match at line: {self.line}")
+        if 'keepgoing' in self.fields:
+            if self.loggers.debug2:
+                logger.debug2(f"keepgoing_opt match at line: {self.line}")
             self.parser['keepgoing'] = True
         self.parser['line'] = 0
         
@@ -637,20 +1865,19 @@ class LastWorldUpdate(EmergeLogParser):
         World update start validation
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_validate_start::')
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_validate_start')
         
         # Make sure it's start to compile
-        if self.start_compiling.match(self.line):
-            logger.debug2("start_compiling match at line:"
-                        + f" '{self.line}'.")
+        if self._start_compiling():
+            if self.loggers.debug2:
+                logger.debug2("start_compiling match at line:"
+                            + f" '{self.line}'.")
             # Ok we start already to compile the first package
             # Get how many package to update
-            total = int(self.start_compiling.match(self.line).group(1))
+            total = self.fields[1]
             self.parser['group']['total'] = total
             # Get the package name
-            name = self.start_compiling.match(self.line).group(2)
+            name = self.fields[2]
             self.parser['name'] = name
             self.parser['running'] = True
             self.parser['count'] = 1
@@ -659,8 +1886,9 @@ class LastWorldUpdate(EmergeLogParser):
         else:
             # This has been aborted OR it's not the right
             # start opt match ....
-            logger.debug2("Look like it has been aborted or something"
-                          f" is wrong at line: '{self.line}'.")
+            if self.loggers.debug2:
+                logger.debug2("Look like it has been aborted or something"
+                              f" is wrong at line: '{self.line}'.")
             # reload default but not key line
             self._load_default_cfg(exclude=('line',))            
     
@@ -669,9 +1897,7 @@ class LastWorldUpdate(EmergeLogParser):
         Processing of matches and calls during 'compiling' state.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_running::')
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_running')
     
         if self.parser['current']:
             self._current_package()
@@ -679,40 +1905,42 @@ class LastWorldUpdate(EmergeLogParser):
         # Start compiling next package
         # Need >= python3.8 for capturing condition values
         # https://www.python.org/dev/peps/pep-0572/#capturing-condition-values
-        elif match := re.match(r'^\d+:\s{2}>>>.emerge.\('
-                      + str(self.parser['count']) 
-                      + r'.*of.*' 
-                      + str(self.parser['group']['total']) 
-                      + r'\)\s(.*)\sto.*$', self.line):
-            logger.debug2("start_current (package) match at line:"
-                          f" {self.line}")
+        elif self.kind == 'merge' and (
+                match := self.start_current.match(
+                                 f"{self.parser['count']} "
+                                 f"{self.parser['group']['total']}|"
+                                 f"{self.line}")):
+            if self.loggers.debug2:
+                logger.debug2("start_current (package) match at line:"
+                              f" {self.line}")
             self.parser['current'] = True
             # reset record as it will restart
             self.parser['record'] = [ ]
             # Needed to set stop if unexpect_start is detected
             self.parser['record'].append(self.line) 
            
-            self.parser['name'] = match.group(1)
+            self.parser['name'] = match.group(3)
             self.parser['running'] = True
         
         # For finished we should catch unsuccessfully exit
         # AND ONLY on next line: linecompiling == 1
         # linecompiling is reset to 0 in _current_package()
         elif self.parser['finished'] and self.parser['line'] == 1:
-            if self.failed_line.match(self.line):
-                logger.debug2("failed_line (finished_line) match at line:"
-                             f" {self.line}")
+            if self.kind == 'failed':
+                if self.loggers.debug2:
+                    logger.debug2("failed_line (finished_line) match at line:"
+                                 f" {self.line}")
                 # Call self._analyze_finished_match()
                 # Because it's could be ambiguous
                 # TODO TODO !
                 if self.parser['parallel']['total']:
-                    logger.debug2("parallel merge (failed_line)"
-                                 " may also be running...")
+                    if self.loggers.debug2:
+                        logger.debug2("parallel merge (failed_line)"
+                                     " may also be running...")
                     self._analyze_finished_match()
                 # Set only stop, everything else is done in
                 # self._save_switcher()
-                timestamp = self.failed_line.match(self.line).group(1)
-                self.parser['group']['stop'] = int(timestamp)
+                self.parser['group']['stop'] = self.timestamp
                 self._save_switcher()
             else:
                 # TEST so if failed_line not detected this could be
@@ -720,16 +1948,18 @@ class LastWorldUpdate(EmergeLogParser):
                 self.parser['finished'] = False
                 self.parser['current'] = True
                 self.parser['saved'] =  True
-                logger.debug2(f"finished_line aborted at line: {self.line}")
+                if self.loggers.debug2:
+                    logger.debug2(f"finished_line aborted at line: {self.line}")
                 if self.parser['parallel']['total']:
                     # For the moment go ahead and if this was not
                     # the current world update that failed then
                     # it's the parallel that succeeded :)
                     # WARNING If there is more than one paralle merge
                     # then it's going to be really really a mess ....
-                    logger.debug2("start_parallel (finished_line):" 
-                                 " 'total' reset, look like it's"
-                                 f" succeeded at line: {self.line}")
+                    if self.loggers.debug2:
+                        logger.debug2("start_parallel (finished_line):" 
+                                     " 'total' reset, look like it's"
+                                     f" succeeded at line: {self.line}")
                     self.parser['parallel']['total'] = None
         
         # Here it's a complete process BUT this doesn't 
@@ -737,21 +1967,21 @@ class LastWorldUpdate(EmergeLogParser):
         # If self.parser['keepgoing'] is detected, last package could be in
         # complete state but compiling end to a failed match. 
         elif self.parser['completed']:
-            if self.succeeded_line.match(self.line):
-                logger.debug2("succeeded_line (completed) match"
-                             f" at line: {self.line}")
+            if self.kind == 'succeeded':
+                if self.loggers.debug2:
+                    logger.debug2("succeeded_line (completed) match"
+                                 f" at line: {self.line}")
                 # Set stop 
-                timestamp = self.succeeded_line.match(self.line).group(1)
-                self.parser['group']['stop'] = int(timestamp)
+                self.parser['group']['stop'] = self.timestamp
                 self._save_complete()
                 # reset to default
                 self._load_default_cfg()
-            elif self.failed_line.match(self.line):
-                logger.debug2("failed_line (completed) match at line:"
-                             f" {self.line}")
+            elif self.kind == 'failed':
+                if self.loggers.debug2:
+                    logger.debug2("failed_line (completed) match at line:"
+                                 f" {self.line}")
                 # Set stop timestamp
-                timestamp = self.failed_line.match(self.line).group(1)
-                self.parser['group']['stop'] = int(timestamp)
+                self.parser['group']['stop'] = self.timestamp
                 # The only choice is partial
                 self._save_partial_fragment('partial')
                 # reset also
@@ -762,8 +1992,10 @@ class LastWorldUpdate(EmergeLogParser):
         # same here linecompiling is reset in _current_package()
         elif self.parser['started'] and self.parser['line'] == 1:
             # This is validate
-            if self.start_opt.match(self.line):
-                logger.debug2(f"start_opt (started) match at line: {self.line}")
+            if self.kind == 'emerge' and 'world' in self.fields:
+                if self.loggers.debug2:
+                    logger.debug2("start_opt (started) match at line:"
+                                  f" {self.line}")
                 
                 # Make sure we get stop timestamp or
                 # just skip current group 
@@ -782,9 +2014,10 @@ class LastWorldUpdate(EmergeLogParser):
             # if it's not a world update start than it could be
             # a parallel start: this will not match --depclean
             # --sync AND --resume
-            elif self.start_parallel.match(self.line):
-                logger.debug2("start_parallel (started) match at"
-                             f" line: {self.line}")
+            elif self.kind == 'emerge' and 'parallel' in self.fields:
+                if self.loggers.debug2:
+                    logger.debug2("start_parallel (started) match at"
+                                 f" line: {self.line}")
                 # Ok so keep running and just set key parallel to True
                 # So we can get new emerge info (total package) in _current_package()
                 self.parser['parallel']['start'] = True
@@ -795,9 +2028,10 @@ class LastWorldUpdate(EmergeLogParser):
                 # start_compiling
             
             # TEST this could be an --resume restart
-            elif self.resume_opt.match(self.line):
-                logger.debug2("resume_opt (started) match at line:"
-                             f" {self.line}")
+            elif self.kind == 'emerge' and 'resume' in self.fields:
+                if self.loggers.debug2:
+                    logger.debug2("resume_opt (started) match at line:"
+                                 f" {self.line}")
                 self.parser['line'] = 0
                 # Restart
                 self.parser['current'] = True
@@ -815,10 +2049,7 @@ class LastWorldUpdate(EmergeLogParser):
         Processing of matches and calls during 'current' state is True.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_current_package::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_current_package')
         
         # Record each line between start_compiling match
         # and completed emerge match, this is almost
@@ -839,13 +2070,13 @@ class LastWorldUpdate(EmergeLogParser):
         #   1572890862:  >>> unmerge success: kde-apps/eventviews-19.08.2
         #   1572890863:  === (67 of 69) Post-Build Cleaning {...CUT...}
         #   1572890863:  ::: completed emerge (67 of 69) kde-apps/eventviews-19.08.2 to /
-        if re.match(r'\d+:\s{2}:::.completed.emerge.\(' 
-                    + str(self.parser['count']) 
-                    + r'.*of.*' 
-                    + str(self.parser['group']['total']) 
-                    + r'\).*$', self.line):
-            logger.debug2("stop_current (package) match at line:"
-                          f" {self.line}")
+        if self.kind == 'completed' and self.stop_current.match(
+                                        f"{self.parser['count']} "
+                                        f"{self.parser['group']['total']}|"
+                                        f"{self.line}"):
+            if self.loggers.debug2:
+                logger.debug2("stop_current (package) match at line:"
+                              f" {self.line}")
             self._pkg_complete()
                     
         # We can match:
@@ -859,8 +2090,9 @@ class LastWorldUpdate(EmergeLogParser):
         # {...SPLIT...}    --verbose @world
         # 1605183716:  >>> emerge (1 of 54) x11-apps/xkbcomp-1.4.4 to /
         # 1605183716:  === (1 of 54) Cleaning {...CUT...}
-        elif self.start_emerge.match(self.line):
-            logger.debug2(f"start_emerge match at line: {self.line}")
+        elif self.kind == 'start':
+            if self.loggers.debug2:
+                logger.debug2(f"start_emerge match at line: {self.line}")
             # Same here this have to be validate
             # Because its should have an start_opt match
             # at the nextline.
@@ -878,49 +2110,56 @@ class LastWorldUpdate(EmergeLogParser):
             # this have been aborted and this could generate
             # some false positive if searching again and
             # again... (ie: keepgoing restart). TEST
-            if (self.parser['line'] < 11 and
-                    self.start_compiling.match(self.line)):
+            if self.parser['line'] < 11 and self._start_compiling():
                 # Ok so just save total package (this could reduce 
                 # false positive)
-                total = int(self.start_compiling.match(self.line).group(1))
+                total = self.fields[1]
                 self.parser['parallel']['total'] = total
-                logger.debug2("start_compiling (start_parallel), total saved:"
-                             f" {total}, at line: {self.line}, ")
+                if self.loggers.debug2:
+                    logger.debug2("start_compiling (start_parallel), total"
+                                  f" saved: {total}, at line: {self.line}, ")
                 # reset start
                 self.parser['parallel']['start'] = False
             elif self.parser['line'] > 10:
-                logger.debug2("start_parallel: NO match after 10 lines,"
-                             " abording search...")
+                if self.loggers.debug2:
+                    logger.debug2("start_parallel: NO match after 10 lines,"
+                                 " abording search...")
                 self._load_default_cfg(include=('parallel',))
         
         ### TEST detect --resume and treat as keepgoing restart
         elif self.parser['resume']:
             if self.parser['line'] == 1:
-                if self.start_resume.match(self.line):
-                    logger.debug2("start_resume (resume) match"
-                                 f" at line: {self.line}")
+                if self.kind == 'resuming':
+                    if self.loggers.debug2:
+                        logger.debug2("start_resume (resume) match"
+                                     f" at line: {self.line}")
                     # Just restart so we can check next line
                 else:
-                    logger.debug2(f"start_resume aborted at line: {self.line}")
+                    if self.loggers.debug2:
+                        logger.debug2("start_resume aborted at line:"
+                                      f" {self.line}")
                     self.parser['resume'] = False
                     # This have to be TEST to know what to do in this
                     # situation...
             elif self.parser['line'] == 2:
                 # Ok make sure we got an start_compiling match
                 # before calling _pkg_keepgoing()
-                if self.start_compiling.match(self.line):
-                    logger.debug2("start_compiling (start_resume) match"
-                                 f" at line: {self.line}")
-                    logger.debug2("start_compiling (start_resume) processing"
-                                 "like keepgoing restart.")
+                if self._start_compiling():
+                    if self.loggers.debug2:
+                        logger.debug2("start_compiling (start_resume) match"
+                                     f" at line: {self.line}")
+                        logger.debug2("start_compiling (start_resume)"
+                                      " processing like keepgoing restart.")
                     self._pkg_keepgoing()
                 else:
-                    logger.debug2("start_compiling (start_resume) aborted"
-                                 f" at line: {self.line}")
+                    if self.loggers.debug2:
+                        logger.debug2("start_compiling (start_resume) aborted"
+                                     f" at line: {self.line}")
                     self.parser['resume'] = False
                     # TEST same as above
             else:
-                logger.debug2(f"resume_opt aborted at line: {self.line}")
+                if self.loggers.debug2:
+                    logger.debug2(f"resume_opt aborted at line: {self.line}")
                 self.parser['resume'] = False
                 
         # WARNING ALL the rest could generate false positive WARNING
@@ -934,21 +2173,23 @@ class LastWorldUpdate(EmergeLogParser):
         # 1576005596:  >>> emerge (1 of 6) kde-plasma/systemsettings-5.17.4 to /
         # So its restart right after failing... (and in this exemple
         # it skip 1 package). This could generate A LOT of false positive...
-        elif (self.start_compiling.match(self.line) and 
-                self.parser['keepgoing']):
-            total = int(self.start_compiling.match(self.line).group(1))
+        elif self.parser['keepgoing'] and self._start_compiling():
+            total = self.fields[1]
             msg = ("current total: "
                    f"{self.parser['group']['total']}, count: "
                    f"{self.parser['count']}, matched total: {total}")
-            logger.debug2("start_compiling (keepgoing_opt) match"
-                        f" at line: {self.line}")
+            if self.loggers.debug2:
+                logger.debug2("start_compiling (keepgoing_opt) match"
+                            f" at line: {self.line}")
             if self.parser['count'] + total <= self.parser['group']['total']:
-                logger.debug2(f"keepgoing restart match: {self.line}")
-                logger.debug2(f"keepgoing enable: {msg}")
+                if self.loggers.debug2:
+                    logger.debug2(f"keepgoing restart match: {self.line}")
+                    logger.debug2(f"keepgoing enable: {msg}")
                 self._pkg_keepgoing()
             else:
-                logger.debug2("start_compiling (keepgoing) aborted"
-                             f" at line: {msg}")
+                if self.loggers.debug2:
+                    logger.debug2("start_compiling (keepgoing) aborted"
+                                 f" at line: {msg}")
             
         # Fourth False: we can match an finished line if
         # world update failed (even with keepgoing opt enable)
@@ -962,8 +2203,9 @@ class LastWorldUpdate(EmergeLogParser):
         # There is always the finished line right after.
         # AND this should exit unsuccessfully !
         # Same here: it could gnerate false positive...
-        elif self.finished_line.match(self.line):
-            logger.debug2(f"finished_line match at line: {self.line}")
+        elif self.kind == 'finished':
+            if self.loggers.debug2:
+                logger.debug2(f"finished_line match at line: {self.line}")
             # But we still have to validate 
             # Because if exit successfully or anything else
             # to the nextline then this should be ignored
@@ -977,11 +2219,7 @@ class LastWorldUpdate(EmergeLogParser):
         Analyze record list and get stop
         timestamp
         """
-        name = f'{self.__nlogger}_set_stop_timestamp::'
-        logger = logging.getLogger(name)
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_set_stop_timestamp')
         
         if not self.parser['record']:
             logger.error("When extracting world update informations,"
@@ -1006,14 +2244,17 @@ class LastWorldUpdate(EmergeLogParser):
                           + str(self.parser['group']['total'])
                           + r'\).*$')
         
-        logger.debug2("Extracting stop timestamp from record list")
+        if self.loggers.debug2:
+            logger.debug2("Extracting stop timestamp from record list")
         timestamp = False
         for line in reversed(self.parser['record']):
-            logger.debug2(f"Analyzing: {line}")
-            if stop.match(line):
-                timestamp = stop.match(line).group(1)
-                logger.debug2(f"Timestamp extracted: {timestamp}"
-                             f" from: {line}")
+            if self.loggers.debug2:
+                logger.debug2(f"Analyzing: {line}")
+            if match := stop.match(line):
+                timestamp = match.group(1)
+                if self.loggers.debug2:
+                    logger.debug2(f"Timestamp extracted: {timestamp}"
+                                 f" from: {line}")
                 break
         
         if not timestamp:
@@ -1031,11 +2272,7 @@ class LastWorldUpdate(EmergeLogParser):
         """
         Analyze ambiguous finished line
         """
-        name = f'{self.__nlogger}_analyze_finished_match::'
-        logger = logging.getLogger(name)
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_analyze_finished_match')
         
         # parallel merge have been detected 
         # so we have to analyze the record list
@@ -1055,10 +2292,7 @@ class LastWorldUpdate(EmergeLogParser):
         'complete' configuration.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_pkg_complete::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_pkg_complete')
         
         # Compile finished for the current package
         self.parser['current'] = False 
@@ -1072,9 +2306,10 @@ class LastWorldUpdate(EmergeLogParser):
             self.parser['count'] += 1
         # IF count == total then compiling group finished 
         elif self.parser['count'] == self.parser['group']['total']:
-            logger.debug2("stop_compiling reached: current count: "
-                         f"{self.parser['count']}, current total count: "
-                         f"{self.parser['group']['total']}")
+            if self.loggers.debug2:
+                logger.debug2("stop_compiling reached: current count: "
+                             f"{self.parser['count']}, current total count: "
+                             f"{self.parser['group']['total']}")
             self.parser['completed'] = True
         elif self.parser['count'] > self.parser['group']['total']:
             logger.error("When searching for last world update informations:"
@@ -1090,10 +2325,7 @@ class LastWorldUpdate(EmergeLogParser):
         'keepgoing' configuration.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_pkg_keepgoing::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_pkg_keepgoing')
             
         # If this is the first time we setup keepgoing
         # there is no key saved...
@@ -1114,21 +2346,22 @@ class LastWorldUpdate(EmergeLogParser):
         self.parser['group']['failed'].append(self.parser['name'])
         
         # Set name of the package to current one
-        self.parser['name'] = self.start_compiling.match(self.line).group(2)
+        self.parser['name'] = self.fields[2]
         # get the total number of package from this new emerge 
-        self.parser['group']['total'] = int(self.start_compiling.match(self.line).group(1))
+        self.parser['group']['total'] = self.fields[1]
         # We already compiling the first package
         self.parser['count'] = 1
         self.parser['current'] = True 
         self.parser['running'] = True
         
-        logger.debug2(f"Stats: group: {self.parser['group']}, keepgoing:"
-                    + f" {self.parser['keepgoing']}, linecompiling: "
-                    + f" {self.parser['line']}, package_name:"
-                    + f" {self.parser['name']}, packages_count:"
-                    + f" {self.parser['count']}, compiling:"
-                    + f" {self.parser['running']}, current_package:"
-                    + f" {self.parser['current']}.")
+        if self.loggers.debug2:
+            logger.debug2(f"Stats: group: {self.parser['group']}, keepgoing:"
+                        + f" {self.parser['keepgoing']}, linecompiling: "
+                        + f" {self.parser['line']}, package_name:"
+                        + f" {self.parser['name']}, packages_count:"
+                        + f" {self.parser['count']}, compiling:"
+                        + f" {self.parser['running']}, current_package:"
+                        + f" {self.parser['current']}.")
           
     def _save(self, target):
         """
@@ -1138,10 +2371,7 @@ class LastWorldUpdate(EmergeLogParser):
             or fragment.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_save::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_save')
         
         # The BUG have been fixed but keep this as a safeguard
         # Keep WARNING for each of theses safeguard
@@ -1190,12 +2420,8 @@ class LastWorldUpdate(EmergeLogParser):
             Targeted saving process: incomplete or fragment.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}'
-                                   '_save_incomplete_fragment::')
+        logger = self.loggers('_save_incomplete_fragment')
         
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
-            
         logger.debug(f"Running with arg: {arg}")
         
         target = getattr(self, arg)
@@ -1248,10 +2474,7 @@ class LastWorldUpdate(EmergeLogParser):
             Targeted saving process: incomplete or fragment.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_save_partial_fragment::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_save_partial_fragment')
         
         logger.debug(f"Running with arg: {arg}")
         
@@ -1331,10 +2554,7 @@ class LastWorldUpdate(EmergeLogParser):
         This is handle complete process.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_save_complete::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_save_complete')
         
         # Make sure there is no key 'failed' and 'saved'
         # otherwise this method shouln't have been called...
@@ -1362,10 +2582,7 @@ class LastWorldUpdate(EmergeLogParser):
         could be 'incomplete' or 'fragment'.
         """
         
-        logger = logging.getLogger(f'{self.__nlogger}_pkg_terminate::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('_pkg_terminate')
             
         # Search over self.parser['group'] to know which
         # _save_*() to call
@@ -1377,7 +2594,8 @@ class LastWorldUpdate(EmergeLogParser):
            and 'total' in self.parser['group']['saved']):
             # Ok so we have to add last failed to the list
             self.parser['group']['failed'].append(self.parser['name'])
-            logger.debug2("Calling _save_partial_fragment('fragment')")
+            if self.loggers.debug2:
+                logger.debug2("Calling _save_partial_fragment('fragment')")
             self._save_partial_fragment('fragment')
         else:
             # same here add failed package_name
@@ -1388,7 +2606,885 @@ class LastWorldUpdate(EmergeLogParser):
             total = self.parser['group']['total']
             count = self.parser['count']
             self.parser['group']['nfailed'] = total - count
-            logger.debug2("Calling _save_incomplete_fragment('incomplete')")
+            if self.loggers.debug2:
+                logger.debug2("Calling _save_incomplete_fragment('incomplete')")
             self._save_incomplete_fragment('incomplete')
         # Then reset everything
         self._load_default_cfg()
+ 
+ 
+ 
+class WorldUpdateHistory(LastWorldUpdate):
+    """
+    Keep every world update group in a numpy structured array
+    (a column by field), saved as a compact file of fixed size 
+    records appended as the log grow.
+    """
+    # Magic, emerge.log inode and byte offset from 
+    # where parsing can be resumed, see self.forward()
+    header = struct.Struct('<8sqq')
+    # start, stop, total, nfailed and state (index of self.states),
+    # padded to 28 bytes
+    record = numpy.dtype({
+        'names'     :   [ 'start', 'stop', 'total', 'nfailed', 'state' ],
+        'formats'   :   [ '<i8', '<i8', '<i4', '<i4', 'u1' ],
+        'offsets'   :   [ 0, 8, 16, 20, 24 ],
+        'itemsize'  :   28
+        })
+    magic = b'SYUPWH01'
+    states = ('complete', 'partial', 'incomplete', 'fragment')
+    
+    def __init__(self, path=None, dryrun=False, **kwargs):
+        """
+        :param path:
+            History file path. Default None (only kept in memory).
+        :param dryrun:
+            Don't write anything. Default False.
+        Others keyword arguments are the LastWorldUpdate ones.
+        """
+        super().__init__(**kwargs)
+        
+        self.__nlogger = f'::{__name__}::WorldUpdateHistory::'
+        self.path = path
+        self.dryrun = dryrun
+        # Records, oldest first
+        self.records = numpy.zeros(0, dtype=self.record)
+        # Offset None: never parsed, start from the oldest rotated log
+        self.checkpoint = {
+            'inode'     :   0,
+            'offset'    :   None
+            }
+        # The whole file have to be written
+        self.rewrite = True
+        # Latest byte offset where the parser was idle
+        self.idle = 0
+        self.load()
+    
+    def load(self):
+        """
+        Load the history file.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}load::')
+        
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'rb') as myfile:
+                data = myfile.read()
+        except FileNotFoundError:
+            logger.debug(f"History file '{self.path}' not found,"
+                         " it will be built.")
+            return
+        except OSError as error:
+            logger.error(f"While loading history file '{self.path}':"
+                         f" {error}.")
+            return
+        
+        if (len(data) < self.header.size 
+                or (len(data) - self.header.size) % self.record.itemsize
+                or not data.startswith(self.magic)):
+            logger.warning(f"History file '{self.path}' is corrupted,"
+                           " it will be rebuilt.")
+            return
+        magic, inode, offset = self.header.unpack_from(data)
+        self.checkpoint = {
+            'inode'     :   inode,
+            'offset'    :   offset
+            }
+        self.records = numpy.frombuffer(data, dtype=self.record,
+                                        offset=self.header.size).copy()
+        self.rewrite = False
+        logger.debug(f"Loaded {len(self)} world update(s) from '{self.path}'"
+                     f" (inode: {inode}, offset: {offset}).")
+    
+    def save(self, records):
+        """
+        Append records to the history file and update
+        its header, or write the whole file if needed.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}save::')
+        
+        if not self.path or self.dryrun:
+            return
+        header = self.header.pack(self.magic, self.checkpoint['inode'],
+                                  self.checkpoint['offset'])
+        try:
+            if self.rewrite:
+                temporary = f'{self.path}.new'
+                with open(temporary, 'wb') as myfile:
+                    myfile.write(header + self.records.tobytes())
+                os.replace(temporary, self.path)
+            else:
+                with open(self.path, 'r+b') as myfile:
+                    myfile.seek(0, os.SEEK_END)
+                    myfile.write(records.tobytes())
+                    myfile.seek(0)
+                    myfile.write(header)
+        except OSError as error:
+            logger.error(f"While writing history file '{self.path}':"
+                         f" {error}.")
+            return
+        self.rewrite = False
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def last(self, count=0):
+        """
+        Get the last count world updates, oldest first.
+        :param count:
+            How many, 0 for all. Default 0.
+        :return:
+            List of tuple (start, stop, total, nfailed, state).
+        """
+        records = self.records
+        if count > 0:
+            records = records[-count:]
+        return [ (start, stop, total, nfailed, self.states[state])
+                 for start, stop, total, nfailed, state 
+                 in records.tolist() ]
+    
+    def rewind(self, inode, end):
+        """
+        Setup parsing, forward, from the checkpoint.
+        :return:
+            The byte offset of the checkpoint.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}rewind::')
+        
+        start = self.resume(self.checkpoint, inode, end)
+        if start is None:
+            # The log we were reading have been compressed (or 
+            # removed): every rotated logs again, groups already 
+            # recorded are dropped by self.finish()
+            start = - sum(self.archivesize(path) or 0 
+                          for path in self.getarchives())
+            logger.debug(f"{self.emergelog} have been replaced, parsing"
+                         " every rotated logs again.")
+        logger.debug(f"Parsing world updates from byte: {start}"
+                     f" to byte: {end}.")
+        
+        self.loggers.refresh()
+        self.collect = [ ]
+        self.parser = { }
+        self._load_default_cfg(init=True)
+        self.idle = start
+        return start
+    
+    def backward(self, offset, line):
+        """
+        Nothing needed: every group is parsed forward from 
+        the checkpoint, see self.rewind().
+        :return:
+            True.
+        """
+        return True
+    
+    def lookup(self, index):
+        """
+        Same as self.backward().
+        """
+        return True
+    
+    def forward(self, offset, line, event):
+        """
+        Keep on parsing with an appended line.
+        """
+        # Parsing again from here, from scratch,
+        # will give the same groups
+        if not self.parser['running'] and not self.parser['group']:
+            self.idle = offset
+        self.line = line
+        self._parse_line(event)
+    
+    def finish(self, inode, end, backward):
+        """
+        Record new groups.
+        :return:
+            The number of world updates recorded.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}finish::')
+        
+        self.loggers.refresh()
+        if not self.parser['running'] and not self.parser['group']:
+            self.idle = end
+        
+        latest = 0
+        if len(self.records):
+            latest = int(self.records['start'][-1])
+        records = [ ]
+        for group in sorted(self.collect, key=lambda group: group['start']):
+            # Parsing again from the checkpoint
+            # give already recorded groups
+            if group['start'] <= latest:
+                continue
+            records.append((group['start'], group['stop'], group['total'],
+                            group['nfailed'], 
+                            self.states.index(group['state'])))
+            latest = group['start']
+        self.collect = [ ]
+        
+        checkpoint = {
+            'inode'     :   inode,
+            'offset'    :   self.idle
+            }
+        if records or self.rewrite or not checkpoint == self.checkpoint:
+            if records:
+                logger.debug(f"Recording {len(records)}"
+                             " new world update(s).")
+            # Padding is written to the file: zeroed, numpy 
+            # only copy the fields
+            merged = numpy.zeros(len(self.records) + len(records),
+                                 dtype=self.record)
+            merged[:len(self.records)] = self.records
+            merged[len(self.records):] = records
+            records = merged[len(self.records):]
+            self.records = merged
+            self.checkpoint = checkpoint
+            self.save(records)
+        return len(self)
+ 
+ 
+ 
+class MergeDurations(EmergeLogParser):
+    """
+    Keep the build duration of every package merged, from
+    '>>> emerge (x of y) cat/pkg-ver' to '::: completed emerge
+    (x of y) cat/pkg-ver', to estimate how long updating a
+    list of packages will take.
+    """
+    def __init__(self, path=None, dryrun=False, stale=604800, **kwargs):
+        """
+        :param path:
+            Durations file path. Default None (only kept in memory).
+        :param dryrun:
+            Don't write anything. Default False.
+        :param stale:
+            Seconds after which a merge never completed (failed, 
+            interrupted...) is dropped. Default 604800 (7 days).
+        """
+        super().__init__(**kwargs)
+        
+        self.__nlogger = f'::{__name__}::MergeDurations::'
+        self.path = path
+        self.dryrun = dryrun
+        self.stale = stale
+        self._reset()
+        self.load()
+    
+    def _reset(self):
+        """
+        Everything from scratch.
+        """
+        # cat/pkg -> [ merges, total seconds, last seconds ]
+        self.packages = { }
+        # Merges not yet completed: cat/pkg -> [ cat/pkg-ver, start 
+        # timestamp ], so a merge which never completed is replaced 
+        # by the next one of the same package
+        self.merging = { }
+        # Offset None: never parsed, start from the oldest rotated log
+        self.checkpoint = {
+            'inode'     :   0,
+            'offset'    :   None
+            }
+        self.changed = False
+    
+    def load(self):
+        """
+        Load the durations file, a line by entry:
+            inode 1234
+            offset 5678
+            package dev-qt/qtwebengine 3 36000 12100
+            merging dev-qt/qtwebengine-5.15.2 1605183716
+        """
+        logger = logging.getLogger(f'{self.__nlogger}load::')
+        
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r') as myfile:
+                lines = myfile.read().splitlines()
+        except FileNotFoundError:
+            logger.debug(f"Durations file '{self.path}' not found,"
+                         " it will be built.")
+            return
+        except OSError as error:
+            logger.error(f"While loading durations file '{self.path}':"
+                         f" {error}.")
+            return
+        
+        try:
+            for line in lines:
+                key, *values = line.split()
+                if key in ('inode', 'offset'):
+                    self.checkpoint[key] = int(*values)
+                elif key == 'package':
+                    name, *values = values
+                    merges, total, last = map(int, values)
+                    self.packages[name] = [ merges, total, last ]
+                elif key == 'merging':
+                    atom, start = values
+                    self.merging[self.package(atom)] = [ atom, int(start) ]
+                else:
+                    raise ValueError(f"unknown key: '{key}'")
+        except (TypeError, ValueError) as error:
+            logger.warning(f"Durations file '{self.path}' is corrupted"
+                           f" ({error}), it will be rebuilt.")
+            self._reset()
+            return
+        logger.debug(f"Loaded {len(self.packages)} package(s) durations"
+                     f" from '{self.path}' (checkpoint: {self.checkpoint}).")
+    
+    def save(self):
+        """
+        Write the durations file.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}save::')
+        
+        if not self.path or self.dryrun:
+            return
+        lines = [ f"inode {self.checkpoint['inode']}",
+                  f"offset {self.checkpoint['offset']}" ]
+        lines.extend(f'package {name} {merges} {total} {last}'
+                     for name, (merges, total, last) 
+                     in sorted(self.packages.items()))
+        lines.extend(f'merging {atom} {start}'
+                     for atom, start in self.merging.values())
+        try:
+            temporary = f'{self.path}.new'
+            with open(temporary, 'w') as myfile:
+                myfile.write('\n'.join(lines) + '\n')
+            os.replace(temporary, self.path)
+        except OSError as error:
+            logger.error(f"While writing durations file '{self.path}':"
+                         f" {error}.")
+    
+    def package(self, atom):
+        """
+        Get cat/pkg from cat/pkg-ver (with optional :slot or ::repo).
+        """
+        parts = pkgsplit(atom.split(':', 1)[0])
+        if parts:
+            return parts[0]
+        return atom
+    
+    def estimate(self, atoms):
+        """
+        Estimate how long merging atoms will take using
+        the average build duration of each package.
+        :param atoms:
+            Iterable of cat/pkg-ver.
+        :return:
+            Tuple (seconds, number of atoms never merged).
+        """
+        seconds = 0
+        unknown = 0
+        for atom in atoms:
+            entry = self.packages.get(self.package(atom))
+            if entry:
+                seconds += entry[1] // entry[0]
+            else:
+                unknown += 1
+        return seconds, unknown
+    
+    def rewind(self, inode, end):
+        """
+        Setup parsing, forward, from the checkpoint.
+        :return:
+            The byte offset of the checkpoint.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}rewind::')
+        
+        start = self.resume(self.checkpoint, inode, end)
+        if start is None:
+            start = 0
+            logger.warning(f"{self.emergelog} have been replaced, merges"
+                           " since last reading are lost.")
+        logger.debug(f"Parsing merges from byte: {start} to byte: {end}.")
+        return start
+    
+    def backward(self, offset, line):
+        """
+        Nothing needed: every merge is parsed forward from 
+        the checkpoint, see self.rewind().
+        :return:
+            True.
+        """
+        return True
+    
+    def lookup(self, index):
+        """
+        Same as self.backward().
+        """
+        return True
+    
+    def forward(self, offset, line, event):
+        """
+        Record merge start and completion.
+        """
+        timestamp, kind, fields = event
+        if kind == 'merge' and fields[2]:
+            self.merging[self.package(fields[2])] = [ fields[2], timestamp ]
+            self.changed = True
+        elif kind == 'completed' and fields[2]:
+            name = self.package(fields[2])
+            pending = self.merging.get(name)
+            if not pending or not pending[0] == fields[2]:
+                return
+            del self.merging[name]
+            start = pending[1]
+            entry = self.packages.setdefault(name, [ 0, 0, 0 ])
+            entry[0] += 1
+            entry[1] += timestamp - start
+            entry[2] = timestamp - start
+            self.changed = True
+    
+    def finish(self, inode, end, backward):
+        """
+        Drop merges started more than self.stale seconds 
+        before the newest one, then save if anything changed 
+        (parsing again lines without merge is harmless).
+        :return:
+            The number of packages with a duration.
+        """
+        if self.merging:
+            newest = max(start for atom, start in self.merging.values())
+            stale = [ name for name, (atom, start) in self.merging.items()
+                      if newest - start > self.stale ]
+            for name in stale:
+                del self.merging[name]
+            self.changed = self.changed or bool(stale)
+        checkpoint = {
+            'inode'     :   inode,
+            'offset'    :   end
+            }
+        if self.changed or not self.checkpoint['inode'] == inode:
+            self.checkpoint = checkpoint
+            self.save()
+            self.changed = False
+        else:
+            self.checkpoint = checkpoint
+        return len(self.packages)
+
+
+
+class SyncHistory(EmergeLogParser):
+    """
+    Keep the last syncs of every repository, from '>>> Syncing 
+    repository' to '=== Sync completed for', to find which one
+    make sync slow or fail.
+    """
+    def __init__(self, path=None, dryrun=False, keep=100, **kwargs):
+        """
+        :param path:
+            History file path. Default None (only kept in memory).
+        :param dryrun:
+            Don't write anything. Default False.
+        :param keep:
+            Number of syncs kept by repository. Default 100.
+        """
+        super().__init__(**kwargs)
+        
+        self.__nlogger = f'::{__name__}::SyncHistory::'
+        self.path = path
+        self.dryrun = dryrun
+        self.keep = keep
+        # Moving averages, see self.summary()
+        self.windows = (5, 20)
+        self._reset()
+        self.load()
+    
+    def _reset(self):
+        """
+        Everything from scratch.
+        """
+        # repository -> deque of (start, duration, success)
+        self.repos = { }
+        # Syncs not yet completed: repository -> [ start, stop ]
+        # stop is the first sync event of an other repository
+        # (syncs are sequential) else None
+        self.syncing = { }
+        # Offset None: never parsed, start from the oldest rotated log
+        self.checkpoint = {
+            'inode'     :   0,
+            'offset'    :   None
+            }
+        self.changed = False
+    
+    def load(self):
+        """
+        Load the history file, a line by entry:
+            inode 1234
+            offset 5678
+            sync gentoo 1605183716 63 1
+            syncing guru 1605183779 1605183802
+        """
+        logger = logging.getLogger(f'{self.__nlogger}load::')
+        
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r') as myfile:
+                lines = myfile.read().splitlines()
+        except FileNotFoundError:
+            logger.debug(f"Sync history file '{self.path}' not found,"
+                         " it will be built.")
+            return
+        except OSError as error:
+            logger.error(f"While loading sync history file '{self.path}':"
+                         f" {error}.")
+            return
+        
+        try:
+            for line in lines:
+                key, *values = line.split()
+                if key in ('inode', 'offset'):
+                    self.checkpoint[key] = int(*values)
+                elif key == 'sync':
+                    name, *values = values
+                    start, duration, success = map(int, values)
+                    self._record(name, start, duration, bool(success))
+                elif key == 'syncing':
+                    name, start, stop = values
+                    self.syncing[name] = [ int(start), 
+                                           None if stop == '-' else int(stop) ]
+                else:
+                    raise ValueError(f"unknown key: '{key}'")
+        except (TypeError, ValueError) as error:
+            logger.warning(f"Sync history file '{self.path}' is corrupted"
+                           f" ({error}), it will be rebuilt.")
+            self._reset()
+            return
+        self.changed = False
+        logger.debug(f"Loaded {len(self.repos)} repositorie(s) syncs"
+                     f" from '{self.path}' (checkpoint: {self.checkpoint}).")
+    
+    def save(self):
+        """
+        Write the history file.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}save::')
+        
+        if not self.path or self.dryrun:
+            return
+        lines = [ f"inode {self.checkpoint['inode']}",
+                  f"offset {self.checkpoint['offset']}" ]
+        lines.extend(f'sync {name} {start} {duration} {int(success)}'
+                     for name, records in sorted(self.repos.items())
+                     for start, duration, success in records)
+        lines.extend(f"syncing {name} {start} {'-' if stop is None else stop}"
+                     for name, (start, stop) in self.syncing.items())
+        try:
+            temporary = f'{self.path}.new'
+            with open(temporary, 'w') as myfile:
+                myfile.write('\n'.join(lines) + '\n')
+            os.replace(temporary, self.path)
+        except OSError as error:
+            logger.error(f"While writing sync history file '{self.path}':"
+                         f" {error}.")
+    
+    def _record(self, name, start, duration, success):
+        """
+        Add a sync of repository name.
+        """
+        records = self.repos.setdefault(name, 
+                                collections.deque(maxlen=self.keep))
+        records.append((start, duration, success))
+        self.changed = True
+    
+    def summary(self):
+        """
+        Get the last sync and the average duration of the last 
+        successful syncs (see self.windows) of every repository.
+        :return:
+            List of tuple (repository, start, duration, success, 
+            average of the last 5, average of the last 20, failures
+            in the last 20), sorted by repository. An average is 0 
+            without successful sync.
+        """
+        summary = [ ]
+        for name, records in sorted(self.repos.items()):
+            records = list(records)
+            averages = [ ]
+            for window in self.windows:
+                durations = [ record[1] for record in records[-window:] 
+                              if record[2] ]
+                averages.append(sum(durations) // len(durations)
+                                if durations else 0)
+            failures = sum(1 for record in records[-self.windows[-1]:]
+                           if not record[2])
+            summary.append((name, *records[-1], *averages, failures))
+        return summary
+    
+    def rewind(self, inode, end):
+        """
+        Setup parsing, forward, from the checkpoint.
+        :return:
+            The byte offset of the checkpoint.
+        """
+        logger = logging.getLogger(f'{self.__nlogger}rewind::')
+        
+        start = self.resume(self.checkpoint, inode, end)
+        if start is None:
+            start = 0
+            logger.warning(f"{self.emergelog} have been replaced, syncs"
+                           " since last reading are lost.")
+        logger.debug(f"Parsing syncs from byte: {start} to byte: {end}.")
+        return start
+    
+    def backward(self, offset, line):
+        """
+        Nothing needed: every sync is parsed forward from 
+        the checkpoint, see self.rewind().
+        :return:
+            True.
+        """
+        return True
+    
+    def lookup(self, index):
+        """
+        Same as self.backward().
+        """
+        return True
+    
+    def forward(self, offset, line, event):
+        """
+        Record sync start, completion and failure: a repository
+        which didn't complete before the end of the emerge run 
+        or before syncing again failed.
+        """
+        timestamp, kind, fields = event
+        if kind in ('syncing', 'synced'):
+            name = fields[0]
+            for other, pending in self.syncing.items():
+                if not other == name and pending[1] is None:
+                    pending[1] = timestamp
+            if kind == 'synced' and name in self.syncing:
+                start, stop = self.syncing.pop(name)
+                self._record(name, start, timestamp - start, True)
+            elif kind == 'syncing':
+                if name in self.syncing:
+                    self._failed(name, timestamp)
+                self.syncing[name] = [ timestamp, None ]
+                self.changed = True
+        elif kind == 'terminating':
+            for name in list(self.syncing):
+                self._failed(name, timestamp)
+    
+    def _failed(self, name, timestamp):
+        """
+        Record the pending sync of repository name as failed.
+        """
+        start, stop = self.syncing.pop(name)
+        self._record(name, start, (stop or timestamp) - start, False)
+    
+    def finish(self, inode, end, backward):
+        """
+        Save if anything changed (parsing again lines
+        without sync is harmless).
+        :return:
+            The number of repositories with a sync.
+        """
+        checkpoint = {
+            'inode'     :   inode,
+            'offset'    :   end
+            }
+        if self.changed or not self.checkpoint['inode'] == inode:
+            self.checkpoint = checkpoint
+            self.save()
+            self.changed = False
+        else:
+            self.checkpoint = checkpoint
+        return len(self.repos)
+
+
+
+class EmergeLogProcess:
+    """
+    Run an EmergeLogScanner, its extractors and its index in a
+    dedicated process: parsing is pure python so it hold the GIL,
+    there it's the child one and the daemon threads (dbus) don't 
+    wait for it. Only results and views are sent back. If the 
+    process is lost, everything is built again and run here.
+    """
+    def __init__(self, extractors, index=None, views=None, **kwargs):
+        """
+        :param extractors:
+            List of tuple (name, class, kwargs): class (of this
+            module) is built, in the child, with kwargs. Results
+            come in the same order. 
+        :param index:
+            Keyword arguments of an EmergeLogIndex. Default None 
+            (no index).
+        :param views:
+            Dictionary, view: tuple (name, attribute, args): 
+            attribute of extractor name ('scanner' for the
+            EmergeLogScanner), called with args if it's a method.
+            They are refreshed after each scan, see self.views.
+            Default None.
+        """
+        self.__nlogger = f'::{__name__}::EmergeLogProcess::'
+        logger = logging.getLogger(f'{self.__nlogger}init::')
+        
+        self.extractors = extractors
+        self.index = index
+        self.kwargs = kwargs
+        self.specs = views or { }
+        # Last views: replaced (never updated) so it 
+        # can be read from any thread.
+        self.views = { }
+        # Requests come from several threads
+        self.lock = threading.Lock()
+        # Extractors built here if the process is lost
+        self.local = None
+        
+        # 'spawn' because forking a threaded process (the daemon) 
+        # could dead lock the child.
+        context = multiprocessing.get_context('spawn')
+        # Child logging records are handled by our loggers
+        self.queue = context.Queue()
+        self.listener = logging.handlers.QueueListener(self.queue,
+                                                       _ForwardHandler())
+        self.listener.start()
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, name='emergelog',
+                            args=(child, extractors, index, self.specs, 
+                                  kwargs, self.queue,
+                                  logging.getLogger().getEffectiveLevel()))
+        try:
+            self.process.start()
+        except OSError as error:
+            logger.error(f'While starting emerge.log parser process:'
+                         f' {error}, parsing in the daemon.')
+            self.local = _build(extractors, index, kwargs)
+        else:
+            logger.debug(f'Started emerge.log parser process, pid:'
+                         f' {self.process.pid}.')
+        child.close()
+        atexit.register(self.shutdown)
+        
+        self.views = self._request('views')[1]
+    
+    def __call__(self):
+        """
+        Same as EmergeLogScanner.__call__() and refresh self.views.
+        """
+        results, self.views = self._request('scan')
+        return results
+    
+    def call(self, name, attribute, *args):
+        """
+        Get attribute of extractor name, called with 
+        args if it's a method.
+        """
+        return self._request('call', name, attribute, args)
+    
+    def _request(self, *request):
+        """
+        Send request to the process and wait its reply, 
+        see _handle().
+        """
+        logger = logging.getLogger(f'{self.__nlogger}_request::')
+        
+        with self.lock:
+            if not self.local:
+                try:
+                    self.connection.send(request)
+                    success, value = self.connection.recv()
+                except (OSError, EOFError) as error:
+                    logger.error('Lost emerge.log parser process'
+                                 f' ({error or "exited"}), parsing from now'
+                                 ' in the daemon.')
+                    self.local = _build(self.extractors, self.index, 
+                                        self.kwargs)
+                else:
+                    if not success:
+                        raise value
+                    return value
+            return _handle(self.local, self.specs, request)
+    
+    def shutdown(self):
+        """
+        Stop the process (the extractors save as they go).
+        """
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+
+
+class _ForwardHandler(logging.Handler):
+    """
+    Hand a record from the parser process to the 
+    logger of the same name.
+    """
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def _build(extractors, index, kwargs):
+    """
+    Build extractors and their scanner, see EmergeLogProcess.
+    :return:
+        Dictionary, name: object.
+    """
+    objects = { name: cls(**options) for name, cls, options in extractors }
+    objects['scanner'] = EmergeLogScanner(*objects.values(),
+                            index=EmergeLogIndex(**index) if index else None,
+                            **kwargs)
+    return objects
+
+
+def _handle(objects, views, request):
+    """
+    Run request: ('scan', ) or ('views', ) which return tuple 
+    (results, views), results is None for 'views'. Or ('call', 
+    name, attribute, args) which return attribute of object name.
+    """
+    method, *args = request
+    if method == 'call':
+        return _view(objects, *args)
+    results = objects['scanner']() if method == 'scan' else None
+    return results, { view: _view(objects, *spec) 
+                      for view, spec in views.items() }
+
+
+def _view(objects, name, attribute, args=()):
+    value = getattr(objects[name], attribute)
+    if callable(value):
+        return value(*args)
+    return value
+
+
+def _serve(connection, extractors, index, views, kwargs, queue, level):
+    """
+    Main of the parser process, see EmergeLogProcess.
+    """
+    # Don't outlive the daemon
+    on_parent_exit()()
+    if not hasattr(logging, 'DEBUG2'):
+        addLoggingLevel('DEBUG2', 9)
+    root = logging.getLogger()
+    root.handlers = [ logging.handlers.QueueHandler(queue) ]
+    root.setLevel(level)
+    
+    objects = _build(extractors, index, kwargs)
+    while True:
+        try:
+            request = connection.recv()
+        except (OSError, EOFError):
+            return
+        try:
+            reply = (True, _handle(objects, views, request))
+        except Exception as error:
+            reply = (False, error)
+        try:
+            connection.send(reply)
+        except (OSError, EOFError):
+            return
+        except Exception as error:
+            # Can't be pickled
+            connection.send((False, RuntimeError(repr(error))))
@@ -11,7 +11,6 @@ import pathlib
 import time
 import errno
 import subprocess
-import io
 import uuid
 import logging
 
@@ -25,14 +24,22 @@ from portage.dbapi.vartree import vardbapi
 from syuppo.utils import FormatTimestamp
 from syuppo.utils import StateInfo
 from syuppo.utils import on_parent_exit
+from syuppo.utils import RepoTimestamps
+from syuppo.utils import ChildCapture
+from syuppo.utils import WakeupFd
+from syuppo.utils import PretendFingerprint
 from syuppo.logger import ProcessLoggingHandler
 from syuppo.logparser import LastSync
 from syuppo.logparser import LastWorldUpdate 
+from syuppo.logparser import EmergeLogProcess
+from syuppo.logparser import EmergeLogTimeline
+from syuppo.logparser import WorldUpdateHistory
+from syuppo.logparser import MergeDurations
+from syuppo.logparser import SyncHistory
 
 
 try:
     import numpy
-    import pexpect
 except Exception as exc:
     print(f'Error: unexpected while loading module: {exc}', file=sys.stderr)
     print('Error: exiting with status \'1\'.', file=sys.stderr)
@@ -88,11 +95,22 @@ class SyncHandler:
             #   'msg'       :   repository / repositories
             #   'failed'    :   list that fail last sync
             #   'success'   :   list that successed last sync
+            #   'locations' :   dict repo name: location
+            #   'synced'    :   list of repos names with a sync-uri
             'repos'         :   self.get_repo_info(),
+            # Live table of the running (or last) dosync():
+            #   repo name: dict with 'state' (pending | running | 
+            #   done | failed | cancelled), 'start' and 'stop' 
+            #   (timestamps, 0 if unknown) and 'message' (last 
+            #   error), see sync_progress()
+            'progress'      :   { },
             # Values: True | False
             'cancel'        :   False,
             # Values: True | False
             'exit'          :   False,
+            # set() it after changing 'cancel' or 'exit': 
+            # wake up _pexpect() at once
+            'wakeup'        :   WakeupFd(),
             # locks for shared method/attr accross daemon threads
             'locks'         :   {
                 # For running check_sync()
@@ -101,9 +119,14 @@ class SyncHandler:
                 'cancel'    :   Lock(),
                 'remain'    :   Lock(),
                 'elapsed'   :   Lock(),
-                'status'    :   Lock()
+                'status'    :   Lock(),
+                'progress'  :   Lock()
                 }                                                 
             }
+        # Files written by a sync of each repository, to know
+        # if a sync happened without reading emerge.log
+        self.repotimestamps = RepoTimestamps(self.sync['repos']['locations'],
+                                             self.sync['repos']['synced'])
         
         # Print warning if interval 'too big'
         # If interval > 30 days (2592000 seconds)
@@ -124,7 +147,11 @@ class SyncHandler:
             'sync state'                     :   'never sync',
             'sync error'                     :   0,
             'sync retry'                     :   0,
-            'sync timestamp'                 :   0
+            'sync timestamp'                 :   0,
+            # emerge.log checkpoint for LastSync 
+            'sync log inode'                 :   0,
+            'sync log offset'                :   0,
+            'sync log timestamp'             :   0
             })
             
     def get_repo_info(self):
@@ -140,10 +167,13 @@ class SyncHandler:
             'count'     :   '(?)',
             'msg'       :   'repo',
             'failed'    :   [ ],
-            'success'   :   [ ]
+            'success'   :   [ ],
+            'locations' :   { },
+            'synced'    :   [ ]
             }
         
-        names = portdbapi().getRepositories()
+        portdb = portdbapi()
+        names = portdb.getRepositories()
         
         if names:
             names = sorted(names)
@@ -164,12 +194,50 @@ class SyncHandler:
             infos['formatted'] = formatted
             infos['count'] = count
             infos['msg'] = msg
+            infos['locations'] = { name: portdb.getRepositoryPath(name)
+                                   for name in names }
+            # Local overlays are never synced
+            infos['synced'] = [ name for name in names 
+                                if portdb.repositories[name].sync_uri ]
             return infos
         
         logger.error("Failed to extract repositories informations"
                      " from portdbapi().getRepositories()")
         return infos
     
+    def sync_progress(self):
+        """
+        Get the live table of the running (or last) dosync().
+        :return:
+            List of tuples (repository, state, start, elapsed, 
+            message), elapsed is up to now while running.
+        """
+        now = int(time.time())
+        with self.sync['locks']['progress']:
+            return [ (name, repo['state'], repo['start'],
+                      (repo['stop'] or now) - repo['start'] 
+                      if repo['start'] else 0, repo['message'])
+                     for name, repo in self.sync['progress'].items() ]
+    
+    def _set_progress(self, name, **values):
+        """
+        Update a repository of the sync['progress'] table
+        (added if unknown).
+        """
+        with self.sync['locks']['progress']:
+            repo = self.sync['progress'].setdefault(name, { 
+                'state' : 'pending', 'start' : 0, 'stop' : 0, 'message' : ''
+                })
+            repo.update(values)
+    
+    def get_last_sync(self):
+        """
+        Get the last sync timestamp from emerge.log.
+        :return:
+            timestamp else False.
+        """
+        return self.scan_emergelog()['sync']
+    
     def check_sync(self, init=False, recompute=False, external=False):
         """ 
         Checking sync repo timestamp, recompute time remaining
@@ -190,9 +258,17 @@ class SyncHandler:
         
         logger = logging.getLogger(f'{self.__logger_name}check_sync::')
         
-        # Get the last emerge sync timestamp
-        myparser = LastSync()
-        sync_timestamp = myparser()
+        # Get the last emerge sync timestamp: unless it's asked, 
+        # emerge.log is read only if a repository have been synced
+        # (or if it can't be known).
+        changed = self.repotimestamps.changed()
+        if (init or external or changed or not self.sync['timestamp']
+                or not self.repotimestamps.covered()):
+            sync_timestamp = self.get_last_sync()
+        else:
+            logger.debug("No repository synced since last check, keeping"
+                         f" sync timestamp: {self.sync['timestamp']}.")
+            sync_timestamp = self.sync['timestamp']
         
         if not sync_timestamp:
             # Don't need to logging anything it's 
@@ -288,6 +364,12 @@ class SyncHandler:
         
         # Refresh repositories infos
         self.sync['repos'] = self.get_repo_info()
+        self.repotimestamps.locate(self.sync['repos']['locations'],
+                                   self.sync['repos']['synced'])
+        with self.sync['locks']['progress']:
+            self.sync['progress'] = { }
+        for name in self.sync['repos']['names']:
+            self._set_progress(name)
         
         # For debug: display all the repositories
         logger.debug(f"Start syncing {self.sync['repos']['count']}" 
@@ -319,11 +401,14 @@ class SyncHandler:
         gpg_network_unreachable = re.compile(r'^gpg:.keyserver.refresh.failed:'
                                              '.Network.is.unreachable$')
                
-        # Get return code for each repo
-        repo_failed = re.compile(r'^Action:.sync.for.repo:\s(.*),'
-                                 '.returned.code.=.1$')
-        repo_success = re.compile(r'^Action:.sync.for.repo:\s(.*),'
-                                  '.returned.code.=.0$')
+        # Get return code for each repo: 1 failed, 0 success
+        repo_code = re.compile(r'^Action:.sync.for.repo:\s(.*),'
+                               r'.returned.code.=.([01])$')
+        # Live progress, matched without colors (on a pty)
+        colors = re.compile(r'\x1b\[[\d;]*[A-Za-z]')
+        repo_start = re.compile(r'^>>>.Syncing.repository.\'([^\']+)\'')
+        repo_completed = re.compile(r'^===.Sync.completed.for.(\S+)')
+        error_line = re.compile(r'^!!!\s*(.+?)\s*$')
         self.sync['repos']['failed'] = [ ]
         self.sync['repos']['success'] = [ ]
         
@@ -332,18 +417,18 @@ class SyncHandler:
         args = [ '/usr/bin/emerge', '--sync' ]
         msg = f"Stop {self.sync['repos']['msg']} synchronization"
         
-        # Running using pexpect
-        return_code, logfile = self._pexpect('sync', cmd, args, msg)
-        
-        if return_code == 'exit':
-            return
+        def now():
+            return int(time.time())
         
-        # Write and in the same time analysis logfile
-        log_writer.info('##########################################\n')
-        for line in logfile:
+        def online(line):
+            """
+            Write and in the same time analysis each line
+            """
+            nonlocal error, found_manifest_failure
             # Write
             log_writer.info(line)
-             # detected network failure for main gentoo repo 
+            plain = colors.sub('', line)
+            # detected network failure for main gentoo repo 
             if found_manifest_failure:
                 # So make sure it's network related 
                 if gpg_network_unreachable.match(line):
@@ -351,12 +436,50 @@ class SyncHandler:
             if manifest_failure.match(line):
                 found_manifest_failure = True
             # get return code for each repo
-            if repo_failed.match(line):
-                name = repo_failed.match(line).group(1)
-                self.sync['repos']['failed'].append(name)
-            if repo_success.match(line):
-                name = repo_success.match(line).group(1)
-                self.sync['repos']['success'].append(name)
+            if match := repo_code.match(line):
+                if match.group(2) == '1':
+                    self.sync['repos']['failed'].append(match.group(1))
+                else:
+                    self.sync['repos']['success'].append(match.group(1))
+                state = 'failed' if match.group(2) == '1' else 'done'
+                self._set_progress(match.group(1), state=state, 
+                        stop=self.sync['progress'].get(match.group(1), 
+                                                {}).get('stop') or now())
+            elif match := repo_start.match(plain):
+                logger.debug(f"Syncing repository: {match.group(1)}.")
+                self._set_progress(match.group(1), state='running', 
+                                   start=now(), stop=0, message='')
+            elif match := repo_completed.match(plain):
+                start = self.sync['progress'].get(match.group(1), 
+                                                  {}).get('start', 0)
+                logger.debug(f"Repository {match.group(1)} synced"
+                             f" in {now() - start}s.")
+                self._set_progress(match.group(1), state='done', stop=now())
+            elif match := error_line.match(plain):
+                # With sync jobs (--jobs) many repositories can run:
+                # the error can't be attributed
+                running = [ name for name, repo 
+                            in self.sync['progress'].items()
+                            if repo['state'] == 'running' ]
+                if len(running) == 1:
+                    self._set_progress(running[0], message=match.group(1))
+        
+        log_writer.info('##########################################\n')
+        # Running on a pty: sudo could require a terminal
+        return_code = self._pexpect('sync', cmd, args, msg, online)
+        
+        # Repositories still running (no completion line)
+        if return_code == 'exit':
+            state = 'cancelled'
+        else:
+            state = 'failed' if return_code else 'done'
+        for name, repo in list(self.sync['progress'].items()):
+            if repo['state'] == 'running':
+                self._set_progress(name, state=state, stop=now())
+        
+        if return_code == 'exit':
+            log_writer.info('Terminate process: cancelled.')
+            return
         
         if self.sync['repos']['success']:
             logger.debug("Repo sync completed: "
@@ -498,11 +621,9 @@ class SyncHandler:
                          f"{self.sync[count]+1}")
         
         # Get sync timestamp from emerge.log
-        logger.debug('Initializing emerge log parser:')
-        myparser = LastSync(log=self.pathdir['emergelog'])
         logger.debug(f"Parsing file: {self.pathdir['emergelog']}")
         logger.debug('Searching last sync timestamp.')
-        sync_timestamp = myparser()
+        sync_timestamp = self.get_last_sync()
         
         if sync_timestamp:
             if sync_timestamp == self.sync['timestamp']:
@@ -537,6 +658,108 @@ class SyncHandler:
 
 
 
+class PretendPackage:
+    """
+    A package to merge, from a line of emerge --pretend --verbose:
+    [ebuild     U  ] sys-apps/portage-3.0.20::gentoo [3.0.18::gentoo] 
+    USE="..." 1,234 KiB
+    """
+    __slots__ = ('kind', 'flags', 'atom', 'new', 'old', 'repo', 'size')
+    
+    line_re = re.compile(r'^\[(ebuild|binary)\s+([^\]]*)\]\s+(\S+)'
+                         r'(?:\s+\[([^\]]*)\])?')
+    # Localized: 1,234 KiB, 1.234 KiB...
+    size_re = re.compile(r'\s(\d[\d,.\s]*)\sKiB\s*$')
+    colors_re = re.compile(r'\x1b\[[\d;]*[A-Za-z]')
+    
+    def __init__(self, kind, flags, atom, new, old, repo, size):
+        """
+        :param kind:
+            'ebuild' or 'binary'.
+        :param flags:
+            The flags without spaces (U, N, NS, R, rR, UD...).
+        :param atom:
+            cat/pkg.
+        :param new:
+            The version to merge (with its revision).
+        :param old:
+            The installed version, '' if none (or same: R).
+        :param repo:
+            The repository, '' if unknown.
+        :param size:
+            The download size in KiB, -1 if unknown.
+        """
+        self.kind = kind
+        self.flags = flags
+        self.atom = atom
+        self.new = new
+        self.old = old
+        self.repo = repo
+        self.size = size
+    
+    @classmethod
+    def parse(cls, line):
+        """
+        Build from a line of emerge output.
+        :return:
+            PretendPackage else None.
+        """
+        if '\x1b' in line:
+            line = cls.colors_re.sub('', line)
+        match = cls.line_re.match(line)
+        if not match:
+            return None
+        kind, flags, atom, old = match.groups()
+        # cat/pkg-ver[:slot][::repo]
+        atom, _, repo = atom.partition('::')
+        split = pkgsplit(atom.split(':')[0])
+        if not split:
+            return None
+        name, version, revision = split
+        if not revision == 'r0':
+            version = f'{version}-{revision}'
+        if old:
+            # ver[:slot][::repo]
+            old = old.split('::')[0].split(':')[0]
+        size = -1
+        if match := cls.size_re.search(line):
+            size = int(re.sub(r'\D', '', match.group(1)))
+        return cls(kind, flags.replace(' ', ''), name, version, old or '', 
+                   repo, size)
+    
+    def astuple(self):
+        """
+        :return:
+            Tuple (kind, flags, atom, new, old, repo, size).
+        """
+        return (self.kind, self.flags, self.atom, self.new, self.old,
+                self.repo, self.size)
+    
+    def dump(self):
+        """
+        :return:
+            A line for the pretend list file ('-' for empty fields).
+        """
+        return ' '.join(str(field) or '-' for field in self.astuple())
+    
+    @classmethod
+    def load(cls, line):
+        """
+        Build from a line of self.dump().
+        :return:
+            PretendPackage else None.
+        """
+        fields = [ '' if field == '-' else field for field in line.split() ]
+        if not len(fields) == len(cls.__slots__):
+            return None
+        try:
+            fields[-1] = int(fields[-1])
+        except ValueError:
+            return None
+        return cls(*fields)
+
+
+
 class PretendHandler:
     """
     Manage informations related to 'pretend'.
@@ -554,6 +777,11 @@ class PretendHandler:
             'status'    :   'ready',
             # Packages to update
             'packages'  :   self.loaded_stateopts.get('pretend packages'),
+            # Estimated seconds to update them (see MergeDurations)
+            'eta'       :   self.loaded_stateopts.get('pretend eta'),
+            # How many of them have never been merged 
+            # so are not in 'eta'
+            'unestimated'   :   self.loaded_stateopts.get('pretend unestimated'),
             # Interval between two pretend_world() 
             # TODO could be tweaked
             'interval'  :   600,
@@ -566,8 +794,17 @@ class PretendHandler:
             'cancel'    :   False,
             # For exiting 
             'exit'      :   False,
+            # set() it after changing 'cancel' or 'exit': 
+            # wake up _pexpect() at once
+            'wakeup'    :   WakeupFd(),
             # same here so we know it has been cancelled if True
             'cancelled' :   False,
+            # PretendPackage list of the last completed run
+            # (replaced, never changed in place)
+            'list'      :   [ ],
+            # PretendFingerprint of the last completed run, 
+            # its result is reused while it match
+            'fingerprint'   :   self.loaded_stateopts.get('pretend fingerprint'),
             # locks for shared method/attr accross daemon threads
             'locks'     :   {
                 # For calling pretend_world()
@@ -578,6 +815,9 @@ class PretendHandler:
                 'status'    :   Lock()
                 }
             }
+        self.pretendfingerprint = PretendFingerprint()
+        if not self.pretend['fingerprint'] == 'none':
+            self.pretend['list'] = self.load_pretend_list()
     
     def stateopts(self):
         """
@@ -587,12 +827,59 @@ class PretendHandler:
         self.default_stateopts.update({
             '# Pretend Opts'                 :   '',
             # Default to -1010 so we know it's first run
-            'pretend packages'               :   -1010
+            'pretend packages'               :   -1010,
+            'pretend eta'                    :   0,
+            'pretend unestimated'            :   0,
+            'pretend fingerprint'            :   'none'
             })
+    
+    def load_pretend_list(self):
+        """
+        Load the package list of the last run.
+        :return:
+            List of PretendPackage.
+        """
+        logger = logging.getLogger(f'{self.__logger_name}load_pretend_list::')
+        
+        path = self.pathdir['pretendlist']
+        try:
+            with open(path) as myfile:
+                packages = [ package for package in map(PretendPackage.load, 
+                                                        myfile) if package ]
+        except FileNotFoundError:
+            logger.debug(f"No package list found: '{path}'.")
+            return [ ]
+        except OSError as error:
+            logger.error(f"While loading package list '{path}': {error}.")
+            return [ ]
+        logger.debug(f"Loaded {len(packages)} package(s) from '{path}'.")
+        return packages
+    
+    def save_pretend_list(self, packages):
+        """
+        Write the package list (see load_pretend_list()).
+        """
+        logger = logging.getLogger(f'{self.__logger_name}save_pretend_list::')
         
-    def pretend_world(self):
+        if self.dryrun:
+            logger.debug('Dryrun is enable, skip writing package list.')
+            return
+        path = self.pathdir['pretendlist']
+        try:
+            temporary = f'{path}.new'
+            with open(temporary, 'w') as myfile:
+                myfile.writelines(f'{package.dump()}\n' 
+                                  for package in packages)
+            os.replace(temporary, path)
+        except OSError as error:
+            logger.error(f"While writing package list '{path}': {error}.")
+        
+    def pretend_world(self, forced=False):
         """
         Get how many package to update
+        :param forced:
+            Run emerge even if nothing changed since the last
+            run (dbus request). Default False.
         """
         # TODO more verbose for debug
         logger = logging.getLogger(f'{self.__logger_name}pretend_world::')
@@ -606,8 +893,25 @@ class PretendHandler:
             self.pretend['status'] = 'running'
         
         logger.debug('Start searching available package(s) update.')
+        
+        # Resolving dependencies take minutes: skip it 
+        # when nothing it depend on changed
+        fingerprint = self.pretendfingerprint(
+                                        self.sync['repos']['locations'])
+        if (not forced and fingerprint == self.pretend['fingerprint']
+                and not self.pretend['packages'] == -1010):
+            logger.info("Nothing changed since last search for available"
+                        " package(s) update, keeping its result:"
+                        f" {self.pretend['packages']} package(s).")
+            with self.pretend['locks']['cancelled']:
+                self.pretend['cancelled'] = False
+            with self.pretend['locks']['status']:
+                self.pretend['status'] = 'completed'
+            return
                 
         packages = False
+        # See PretendPackage
+        found = [ ]
         retry = 0
         extract_packages = re.compile(r'^Total:.(\d+).package.*$')        
         
@@ -630,22 +934,34 @@ class PretendHandler:
         cmd_line = f"{cmd} {' '.join(args)}"
         msg = 'Stop checking for available updates'
         
+        def online(line):
+            """
+            Get package number and write log in the same time
+            """
+            nonlocal packages, retry
+            log_writer.info(line)
+            if package := PretendPackage.parse(line):
+                found.append(package)
+            elif match := extract_packages.match(line):
+                packages = int(match.group(1))
+                # don't retry we got packages
+                retry = 2
+                logger.debug(f"Got {packages} package(s) to update"
+                             " (process still running).")
+        
         while retry < 2:
             logger.debug(f"Running {cmd_line}")
-            return_code, logfile = self._pexpect('pretend', cmd, 
-                                                 args, msg)
+            log_writer.info("##### START ####")
+            log_writer.info(f"Command: {cmd_line}")
+            found.clear()
+            # No terminal needed: pipes are cheaper
+            return_code = self._pexpect('pretend', cmd, args, msg, 
+                                        online, tty=False)
             if return_code == 'exit':
+                log_writer.info("Terminate process: cancelled.")
+                log_writer.info("##### END ####")
                 return
             
-            # Get package number and write log in the same time
-            log_writer.info("##### START ####")
-            log_writer.info(f"Command: {cmd_line}")
-            for line in logfile:
-                log_writer.info(line)
-                if extract_packages.match(line):
-                    packages = int(extract_packages.match(line).group(1))
-                    # don't retry we got packages
-                    retry = 2
             log_writer.info("Terminate process: exit with status "
                             f"'{return_code}'")
             log_writer.info("##### END ####")
@@ -691,9 +1007,27 @@ class PretendHandler:
                     logger.debug("Couldn't found how many package to update,"
                                  " retrying without opt '--with bdeps'.")
 
+        if packages is False:
+            # Don't reuse a failed search
+            self.pretend['fingerprint'] = 'none'
+        else:
+            self.pretend['fingerprint'] = fingerprint
+            self.save_pretend_list(found)
+        self.stateinfo.save(['pretend fingerprint', 
+                             self.pretend['fingerprint']])
+        
         # Make sure we have some packages
         if packages:
             self.change_packages_value(tochange=packages)
+            self.pretend['list'] = found
+            # binary packages are not built so not estimated
+            atoms = [ f'{package.atom}-{package.new}' for package in found
+                      if package.kind == 'ebuild' ]
+            eta, unestimated = self.emergelog['parsers'].call(
+                                        'mergedurations', 'estimate', atoms)
+            logger.debug(f"Estimated update duration: {eta}s,"
+                         f" {unestimated} package(s) never merged.")
+            self.change_eta_value(eta, unestimated)
         # TODO TODO NO NO this HAVE to be rewritten.... 
         # If we got error on all the retry this shouldn't tochange=0 no no
         # this has to be maybe "-1" and then client should know there is a problem !
@@ -705,6 +1039,7 @@ class PretendHandler:
         # TODO TODO TODO 
         else:
             self.change_packages_value(tochange=0)
+            self.pretend['list'] = [ ]
                 
         with self.pretend['locks']['cancelled']:
             self.pretend['cancelled'] = False
@@ -755,6 +1090,26 @@ class PretendHandler:
         if not packages == self.pretend['packages']:
             self.pretend['packages'] = packages
             self.stateinfo.save(['pretend packages', self.pretend['packages']])
+        # Nothing left to update
+        if not packages:
+            self.change_eta_value(0, 0)
+    
+    def change_eta_value(self, eta, unestimated):
+        """
+        Change estimated update duration.
+        :param eta:
+            Seconds.
+        :param unestimated:
+            Packages not counted in eta.
+        """
+        tosave = [ [f'pretend {key}', value] 
+                   for key, value in (('eta', eta), 
+                                      ('unestimated', unestimated))
+                   if not self.pretend[key] == value ]
+        if tosave:
+            self.pretend['eta'] = eta
+            self.pretend['unestimated'] = unestimated
+            self.stateinfo.save(*tosave)
                 
     
     
@@ -987,18 +1342,22 @@ class WorldHandler:
             'world last nfailed'            :   0
             })
     
-    def get_last_world_update(self, detected=False):
+    def get_last_world_update(self, detected=False, started=False):
         """
         Getting last world update informations
+        :param detected:
+            A world update process have been detected.
+            Default False.
+        :param started:
+            When this process started, to check if it 
+            have been logged. Default False.
         """
         
         name = 'get_last_world_update'
         logger = logging.getLogger(f'{self.__logger_name}{name}::')
         logger.debug(f'Running with detected={detected}')
         
-        myparser = LastWorldUpdate(advanced_debug=self.vdebug['logparser'],
-                                   log=self.pathdir['emergelog'])
-        get_world_info = myparser()
+        get_world_info = self.scan_emergelog()['world']
         
         updated = False
         tosave = [ ]
@@ -1025,8 +1384,12 @@ class WorldHandler:
             # how many package to update (so don't need to run
             # pretend...) TEST pretend is no more run ...
             if not updated and detected:
-                logger.info("Global update have been aborted or"
-                            " failed to emerge first package.")
+                if started and not self.world_logged(started):
+                    logger.info("Global update have been aborted before"
+                                " merging anything.")
+                else:
+                    logger.info("Global update have been aborted or"
+                                " failed to emerge first package.")
             elif not updated:
                 logger.debug("Global update haven't been run," 
                              " keeping last know informations.")
@@ -1111,6 +1474,9 @@ class BaseHandler(PortageHandler, WorldHandler, PretendHandler,
         self.pathdir = kwargs['pathdir']
         self.dryrun = kwargs['dryrun']
         self.vdebug = kwargs['vdebug']
+        # Processes tokenizing emerge.log (opt-in), see 
+        # EmergeLogParser.forwardevents()
+        self.workers = kwargs.get('workers', 0)
         
         # Init timestamp converter/formatter 
         self.format_timestamp = FormatTimestamp(advanced_debug=self.vdebug['formattimestamp'])
@@ -1154,9 +1520,121 @@ class BaseHandler(PortageHandler, WorldHandler, PretendHandler,
         # Init all other class
         super().__init__(**kwargs)
         
-    def _pexpect(self, proc, cmd, args, msg):
+        # Read emerge.log once for all the parsers, in their own 
+        # process: parsing a big log would hold the GIL for seconds.
+        # They are kept between calls so only what have been 
+        # appended is parsed (see self.scan_emergelog()).
+        log = self.pathdir['emergelog']
+        self.emergelog = {
+            'parsers'   :   EmergeLogProcess([
+                # Last gentoo sync
+                ('lastsync', LastSync, {
+                    'checkpoint'    :   {
+                        'inode'     :   self.loaded_stateopts.get(
+                                                        'sync log inode'),
+                        'offset'    :   self.loaded_stateopts.get(
+                                                        'sync log offset'),
+                        'timestamp' :   self.loaded_stateopts.get(
+                                                        'sync log timestamp')
+                        },
+                    'log'           :   log }),
+                ('lastworld', LastWorldUpdate, {
+                    'advanced_debug':   self.vdebug['logparser'],
+                    'workers'       :   self.workers,
+                    'log'           :   log }),
+                # Every world update, see PortageDbus.get_world_history()
+                ('worldhistory', WorldUpdateHistory, {
+                    'path'          :   self.pathdir['worldhistory'],
+                    'dryrun'        :   self.dryrun,
+                    'advanced_debug':   self.vdebug['logparser'],
+                    'workers'       :   self.workers,
+                    'log'           :   log }),
+                # Build duration of each package for 'eta'
+                ('mergedurations', MergeDurations, {
+                    'path'          :   self.pathdir['mergedurations'],
+                    'dryrun'        :   self.dryrun,
+                    'workers'       :   self.workers,
+                    'log'           :   log }),
+                # Last syncs of every repository, 
+                # see PortageDbus.get_sync_history()
+                ('synchistory', SyncHistory, {
+                    'path'          :   self.pathdir['synchistory'],
+                    'dryrun'        :   self.dryrun,
+                    'workers'       :   self.workers,
+                    'log'           :   log }),
+                # World update starts, see self.world_logged()
+                ('timeline', EmergeLogTimeline, {
+                    'log'           :   log })
+                ],
+                index={
+                    'path'          :   self.pathdir['emergeindex'],
+                    'dryrun'        :   self.dryrun,
+                    'workers'       :   self.workers,
+                    'log'           :   log },
+                # Sent back after each scan
+                views={
+                    'checkpoint'    :   ('lastsync', 'checkpoint', ()),
+                    'history'       :   ('worldhistory', 'last', ()),
+                    'syncs'         :   ('synchistory', 'summary', ())
+                    },
+                # The scanner read forward for the history parsers
+                workers=self.workers,
+                log=log),
+            'locks'     :   {
+                # For calling self.scan_emergelog()
+                'scan'      :   Lock()
+                }
+            }
+        
+    def scan_emergelog(self):
+        """
+        Parse what have been appended to emerge.log since last call
+        (or the whole needed part the first time) for all the 
+        parsers in one reading, and save LastSync checkpoint 
+        if it changed.
+        :return:
+            Dictionary with 'sync', 'world', 'history', 
+            'durations' and 'syncs' parsers output.
         """
-        Run specific process using pexpect
+        logger = logging.getLogger(f'{self.__logger_name}scan_emergelog::')
+        
+        with self.emergelog['locks']['scan']:
+            parsers = self.emergelog['parsers']
+            previous = parsers.views['checkpoint']
+            (sync, world, history, 
+             durations, syncs, lines) = parsers()
+            checkpoint = parsers.views['checkpoint']
+        
+            tosave = [ [f'sync log {key}', value] 
+                       for key, value in checkpoint.items()
+                       if not previous[key] == value ]
+            if tosave:
+                logger.debug(f"Saving emerge.log checkpoint: {checkpoint}")
+                self.stateinfo.save(*tosave)
+        
+        return {
+            'sync'      :   sync,
+            'world'     :   world,
+            'history'   :   history,
+            'durations' :   durations,
+            'syncs'     :   syncs
+            }
+        
+    def world_logged(self, since):
+        """
+        Check if a world update have been logged since timestamp
+        since, see EmergeLogTimeline.world_logged(): answered by
+        the parser process, where the timeline is.
+        :return:
+            True if found else False.
+        """
+        return self.emergelog['parsers'].call('timeline', 'world_logged',
+                                              since)
+        
+    def _pexpect(self, proc, cmd, args, msg, online, tty=True):
+        """
+        Run specific process handing its output, line by line,
+        to online() while it runs
         
         :param proc:
             This should be call with 'sync' or 'pretend'.
@@ -1166,10 +1644,14 @@ class BaseHandler(PortageHandler, WorldHandler, PretendHandler,
             The arguments as a list.
         :param msg:
             A specific msg when calling exit or cancel.
+        :param online:
+            Called with each output line as soon as it's read.
+        :param tty:
+            Run the command on a pty, else on pipes (cheaper,
+            for commands which don't need a terminal).
         :return:
-            An iterable with, first element is the return
-            code of the command or 'exit' if aborted/cancelled. 
-            The second element is the logfile if success, else False.
+            The return code of the command or 'exit' if 
+            aborted/cancelled.
         """
         logger = logging.getLogger(f'{self.__logger_name}_pexpect::')
         
@@ -1186,19 +1668,14 @@ class BaseHandler(PortageHandler, WorldHandler, PretendHandler,
             'system'        :   'a system update'
             }
         
-        child = pexpect.spawn(cmd, args=args, encoding='utf-8', 
-                              preexec_fn=on_parent_exit(),
-                              timeout=None)
-        # We capture log
-        mycapture = io.StringIO()
-        child.logfile = mycapture
-        # Wait non blocking
-        # WARNING DONT set this to 0 or it will
-        # eat a LOT of cpu: specially when there is
-        # no data to read (ex: sync and network problem)
-        # WARNING
-        pexpect_timeout = 1
-        while not child.closed and child.isalive():
+        # Drop a set() from a previous run
+        myattr['wakeup'].clear()
+        child = ChildCapture(cmd, args, tty=tty, online=online, 
+                             wakeup=myattr['wakeup'])
+        # Sleep until there is output (then read up to 64KiB 
+        # at once) or until cancel / exit call wakeup.set(): 
+        # no timeout so no cpu used while waiting.
+        while True:
             if myattr['cancel']:
                 # So we want to cancel
                 # Just break 
@@ -1209,36 +1686,20 @@ class BaseHandler(PortageHandler, WorldHandler, PretendHandler,
                 # Same here: child still alive
                 logger.debug('Received exit order.')
                 break
-            try:
-                child.read_nonblocking(size=1, timeout=pexpect_timeout)
-                # We don't care about recording what ever since we 
-                # recording from child.logfile, 
-                # just wait until reach EOF.
-            except pexpect.EOF:
+            if not child.read():
                 # Process have finish
-                # Don't close here
                 break
-            except pexpect.TIMEOUT:
-                # Just continue until EOF
-                # Setting a timeout > 1, will
-                # just made more lantency when 
-                # calling cancel/exit ...
-                # BUT timeout = 0 will eat A LOT
-                # of cpu doing nothing...
-                continue
         
         if myattr['exit'] or myattr['cancel']:
-            logger.debug("Shutting down pexpect process running"
+            logger.debug("Shutting down process running"
                          f" command: '{cmd}' and args: "
                          f"'{' '.join(args)}'")
-            mycapture.close()
-            child.terminate(force=True)
-            child.close(force=True)
+            child.terminate()
             
             if myattr['exit']:
                 logger.debug('...exiting now, ...bye.')
                 myattr['exit'] = 'Done'
-                return 'exit', False
+                return 'exit'
             
             # Log specific message
             logger.warning(f"{msg}: {__msg[myattr['cancel']]} {generic_msg}")
@@ -1252,14 +1713,10 @@ class BaseHandler(PortageHandler, WorldHandler, PretendHandler,
             with myattr['locks']['status']:
                 myattr['status'] = 'ready'
             # skip everything else
-            return 'exit', False
+            return 'exit'
                 
         # Process finished
-        mylog = mycapture.getvalue()
-        mycapture.close()
-        child.close()
-        status = child.wait()
-        return status, mylog.splitlines()
+        return child.wait()
   
 
 
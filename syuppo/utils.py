@@ -14,9 +14,16 @@ import signal
 import gettext
 import logging
 import pwd
+import codecs
+import fcntl
+import select
+import termios
+import subprocess
+import hashlib
 
 from collections import deque
 from syuppo._distutils_compat import StrictVersion, _strtobool
+from syuppo.logger import HotLogger
 from ctypes import cdll
 
 try:
@@ -548,6 +555,8 @@ class FormatTimestamp:
         
         self.advanced_debug = advanced_debug
         self.logger_name = f'::{__name__}::FormatTimestamp::'
+        self.loggers = HotLogger(self.logger_name, 
+                                 advanced_debug=advanced_debug)
         #logger = logging.getLogger(f'{self.logger_name}init::')  
         # Dict ordered only with python >= 3.7
         if sys.version_info[:2] < (3, 7):
@@ -630,10 +639,8 @@ class FormatTimestamp:
         """
         Proceed the conversion
         """
-        logger = logging.getLogger(f'{self.logger_name}__call__::')
-        
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        self.loggers.refresh()
+        logger = self.loggers('__call__')
         
         def __format(result):
             """
@@ -685,14 +692,16 @@ class FormatTimestamp:
             logger.error(f"Granularity argument out of range [1-5]: '{granularity}' (falling back to default: 2).")
             granularity = 2
         
-        logger.debug(f"Running with: seconds: {seconds}, granularity="
-                     + f"{granularity}, rounded={rounded}, translate="
-                     + f"{translate}, nuanced={nuanced},"
-                     + f" advanced_debug={self.advanced_debug}.")
+        if self.loggers.debug:
+            logger.debug(f"Running with: seconds: {seconds}, granularity="
+                         + f"{granularity}, rounded={rounded}, translate="
+                         + f"{translate}, nuanced={nuanced},"
+                         + f" advanced_debug={self.advanced_debug}.")
         
         # For seconds only don't need to compute
         if seconds < 60:
-            logger.debug("No need to compute: seconds < 60.")
+            if self.loggers.debug:
+                logger.debug("No need to compute: seconds < 60.")
             if seconds < 0:
                 if translate:
                     return _('any time now')
@@ -726,7 +735,8 @@ class FormatTimestamp:
                         'seconds'      :   value * count,
                         'count'        :   count
                                  })
-                logger.debug(f"Adding at index {length}: {result[length]}.")
+                if self.loggers.debug:
+                    logger.debug(f"Adding at index {length}: {result[length]}.")
                 length += 1
                 
         # Don't need to compute everything / everytime
@@ -734,8 +744,9 @@ class FormatTimestamp:
         # Ok so length = granularity and if rounded 
         # then it could be rounded as well
         if length < granularity or not rounded:
-            logger.debug(f"Not rounded: list length: {length}, granularity:"
-                         + f" {granularity}, rounded: {rounded}.")
+            if self.loggers.debug:
+                logger.debug(f"Not rounded: list length: {length}, granularity:"
+                             + f" {granularity}, rounded: {rounded}.")
             # Translation 
             if translate:
                 return ' '.join('{0} {1}{2}'.format(item['value'], _(self.translate[item['name']]), 
@@ -745,8 +756,9 @@ class FormatTimestamp:
                 return ' '.join('{0} {1}{2}'.format(item['value'], item['name'], item['punctuation']) \
                                                 for item in __format(result[:granularity]))
         # Ok so now let's recompute
-        logger.debug(f"Could be rounded: list length: {length}, granularity:"
-                    + f" {granularity}.")
+        if self.loggers.debug:
+            logger.debug(f"Could be rounded: list length: {length}, granularity:"
+                        + f" {granularity}.")
         
         start = length
         
@@ -755,16 +767,20 @@ class FormatTimestamp:
         # could be not selected depending on granularity.
         # And we can delete item after we possibly rounded
         # the next item depending of the selected item's seconds
-        logger.debug('Analizing reversed list.')
+        if self.loggers.debug:
+            logger.debug('Analizing reversed list.')
         for item in reversed(result[:]):
-            logger.debug2(f"Granularity: {granularity}, start: {start}"
-                         + f", length: {length}.")
-            logger.debug2(f"Inspecting item: {item}.")
+            if self.loggers.debug2:
+                logger.debug2(f"Granularity: {granularity}, start: {start}"
+                             + f", length: {length}.")
+                logger.debug2(f"Inspecting item: {item}.")
             if granularity < start:
-                logger.debug2("Granularity < start.")
+                if self.loggers.debug2:
+                    logger.debug2("Granularity < start.")
                 # Get the next item 
                 nextkey_name = self.nextkey[item['name']]
-                logger.debug2(f"Next key name from intervals: {nextkey_name}.")
+                if self.loggers.debug2:
+                    logger.debug2(f"Next key name from intervals: {nextkey_name}.")
                 current_index = result.index(item)
                 next_index = current_index - 1
                 # if the seconds of current item is superior
@@ -772,69 +788,78 @@ class FormatTimestamp:
                 # then we 'could' round
                 if item['seconds'] > self.intervals[nextkey_name] // 2:
                     rounded_applied = True
-                    logger.debug2("Current item removed and will be rounded.")
+                    if self.loggers.debug2:
+                        logger.debug2("Current item removed and will be rounded.")
                     del result[current_index]
                     # So now, check if next item from result list exits
                     if result[next_index]['name'] == nextkey_name:
-                        logger.debug2("Next item exists: current seconds:"
-                                    + f" {result[next_index]['seconds']}.")
+                        if self.loggers.debug2:
+                            logger.debug2("Next item exists: current seconds:"
+                                        + f" {result[next_index]['seconds']}.")
                         # ok it exits then
                         # +1 to the next item (in seconds: depending on item count)
                         result[next_index]['seconds'] += result[next_index]['count']
-                        logger.debug2("Adding +1" 
-                                    + f" ({result[next_index]['count']})"
-                                    + " to next item: recalcul:"
-                                    + f" {result[next_index]['seconds']}.")
+                        if self.loggers.debug2:
+                            logger.debug2("Adding +1" 
+                                        + f" ({result[next_index]['count']})"
+                                        + " to next item: recalcul:"
+                                        + f" {result[next_index]['seconds']}.")
                     # We don't care about creating here
                     # because in any way the created item couldn't be rounded
                     # AND it will NOT be selected in this for loop (so it 
                     # won't be deleted)
-                    else:
+                    elif self.loggers.debug2:
                         logger.debug2("Skip rounding: next item missing.")
                 # Also, don't care about adding seconds to next item
                 # Because, it will not change the final result AND nuanced 
                 # won't work ...
                 else:
-                    logger.debug2("Current item removed and will NOT be"
-                                + " rounded.")
+                    if self.loggers.debug2:
+                        logger.debug2("Current item removed and will NOT be"
+                                    + " rounded.")
                     del result[current_index]
                 # Then reduce length
                 length -= 1
-            else:
+            elif self.loggers.debug2:
                 logger.debug2("Granularity >= start, keeping current item.")
             start -= 1
         
-        logger.debug2("Current state of the list after first pass:")
-        if self.advanced_debug:
+        if self.loggers.debug2:
+            logger.debug2("Current state of the list after first pass:")
             for item in result:
                 logger.debug2(f"Item: {item}")
         
-        logger.debug("Recalculate reversed list.")
+        if self.loggers.debug:
+            logger.debug("Recalculate reversed list.")
         # SECOND PASS
         # Ok now recalcul every thing
         # Reverse as well
         for item in reversed(result[:]):
-            logger.debug2(f"Inspecting item: {item}.")
+            if self.loggers.debug2:
+                logger.debug2(f"Inspecting item: {item}.")
             # Check if seconds is superior or equal to the next item 
             # but not from 'result' list but from 'self.intervals' dict
             nextkey_name = self.nextkey[item['name']]
-            logger.debug2(f"Next key name from intervals: {nextkey_name}.")
+            if self.loggers.debug2:
+                logger.debug2(f"Next key name from intervals: {nextkey_name}.")
             current_index = result.index(item)
             next_index = current_index - 1
             # Stop to weeks
             if item['seconds'] >= self.intervals[nextkey_name] and not \
                 item['name'] == 'weeks':
                 # Remove current item
-                logger.debug2("Current item removed and its values should"
-                            + " be added to the next item.")
+                if self.loggers.debug2:
+                    logger.debug2("Current item removed and its values should"
+                                + " be added to the next item.")
                 del result[result.index(item)]
                 # First make sure we have the 'next item'
                 # IF current_index == 0 then it's first/last/only item left
                 if not current_index == 0 and \
                     result[next_index]['name'] == nextkey_name:
-                    logger.debug2("Next item in result list exists:"
-                                + " current values:"
-                                + f" {result[next_index]}.")
+                    if self.loggers.debug2:
+                        logger.debug2("Next item in result list exists:"
+                                    + " current values:"
+                                    + f" {result[next_index]}.")
                     # Append to
                     result[next_index]['seconds'] += item['seconds']
                     # recalcul value
@@ -843,8 +868,9 @@ class FormatTimestamp:
                     # strip or not
                     result[next_index]['name_rstrip'] = __rstrip(result[next_index]['value'],
                                                                 result[next_index]['name'])
-                    logger.debug2("Recalculate next item values:"
-                                 + f" {result[next_index]}.")
+                    if self.loggers.debug2:
+                        logger.debug2("Recalculate next item values:"
+                                     + f" {result[next_index]}.")
                 else:
                     # Creating 
                     # get count
@@ -863,26 +889,30 @@ class FormatTimestamp:
                                 }
                     # insert to the list
                     result.append(next_item)
-                    logger.debug2("Next item created and appended:"
-                                 + f" {next_item}.")
+                    if self.loggers.debug2:
+                        logger.debug2("Next item created and appended:"
+                                     + f" {next_item}.")
                 
             else:
                 # for current item recalculate
                 # keys 'value' and 'name_rstrip'
                 item['value'] = item['seconds'] // item['count']
                 item['name_rstrip'] = __rstrip(item['value'], item['name'])
-                logger.debug2("Keeping current item, recalculate values:"
-                             + f" {item}.")
+                if self.loggers.debug2:
+                    logger.debug2("Keeping current item, recalculate values:"
+                                 + f" {item}.")
                     
-        logger.debug("Final state of the list after second pass:")
-        for item in result:
-            logger.debug(f"Item: {item}.") 
+        if self.loggers.debug:
+            logger.debug("Final state of the list after second pass:")
+            for item in result:
+                logger.debug(f"Item: {item}.") 
             
         # TEST try to nuance rounded result
         # Same here cannot pass empty string to gettext...
         nuanced_msg = u"\u200B"
         if nuanced:
-            logger.debug2("Nuanced is enabled.")
+            if self.loggers.debug2:
+                logger.debug2("Nuanced is enabled.")
             # from (-)1s left to (-)59s: "a little bit less/more"
             # from (-)60s (1min) to (-)3599s (59min/59s): "a bit less/more"
             # from (-)3600s (1hour): "less/more"
@@ -893,18 +923,21 @@ class FormatTimestamp:
                     seconds_sum += item['seconds']
             # And calculate if seconds left
             seconds_left = seconds_arg - seconds_sum
-            logger.debug2(f"Seconds stats: Arg: {seconds_arg} Sum:" 
-                         f" {seconds_sum}, Left: {seconds_left}.")
+            if self.loggers.debug2:
+                logger.debug2(f"Seconds stats: Arg: {seconds_arg} Sum:" 
+                             f" {seconds_sum}, Left: {seconds_left}.")
             # For positive value
             if seconds_left > 0:
-                logger.debug2("Nuanced applied: in more.")
+                if self.loggers.debug2:
+                    logger.debug2("Nuanced applied: in more.")
                 if seconds_left > 3600:
                     nuanced_msg = _('more than ')
                 else:
                     nuanced_msg = _('approximately ')
             # For negative value
             elif seconds_left < 0:
-                logger.debug2("Nuanced applied: in less.")
+                if self.loggers.debug2:
+                    logger.debug2("Nuanced applied: in less.")
                 if seconds_left < -3600:
                     nuanced_msg = _('less than ')
                 else:
@@ -960,6 +993,8 @@ class CheckProcRunning:
         self.advanced_debug = advanced_debug
         if self.advanced_debug:
             logger.setLevel(logging.DEBUG2)
+        self.loggers = HotLogger(self.logger_name, 
+                                 advanced_debug=advanced_debug)
         
         # WARNING: @./kernel/pid.c: #define RESERVED_PIDS           300
         # so we don't care before 300 atm (2020-12-13)
@@ -986,24 +1021,26 @@ class CheckProcRunning:
         """
         Return all the pid dir from /proc
         """
-        logger = logging.getLogger(f'{self.logger_name}__get_pid_dirs::')
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('__get_pid_dirs')
             
-        logger.debug2("Get pid only directories from '/proc'.")
+        if self.loggers.debug2:
+            logger.debug2("Get pid only directories from '/proc'.")
         listdir = pathlib.Path('/proc')
         for name in listdir.iterdir():
-            logger.debug2(f"Inspect: {name}")
+            if self.loggers.debug2:
+                logger.debug2(f"Inspect: {name}")
             if name.is_dir():
-                logger.debug2(f"Validate directory: {name}")
+                if self.loggers.debug2:
+                    logger.debug2(f"Validate directory: {name}")
                 if self.pids_only.match(name.parts[-1]):
-                    logger.debug2("Validate: Pid only and > 300"
-                                   + " (kernel RESERVED_PIDS).")
+                    if self.loggers.debug2:
+                        logger.debug2("Validate: Pid only and > 300"
+                                       + " (kernel RESERVED_PIDS).")
                     yield name
-                else:
+                elif self.loggers.debug2:
                     logger.debug2(f"Reject: {name}: Not pid only or"
                                       " pid < 300 (kernel RESERVED_PIDS).")
-            else:
+            elif self.loggers.debug2:
                 logger.debug2(f"Reject: {name}: Not dir, doesn't exist,"
                               + " broken symlink, permission errors.")
     
@@ -1012,14 +1049,13 @@ class CheckProcRunning:
         """
         Return all content using __get_pid_dirs()
         """
-        logger = logging.getLogger(f'{self.logger_name}__get_content::')
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        logger = self.loggers('__get_content')
             
         uid = re.compile(r'^Uid:\s+(\d+)\s+.*$')
             
         for dirname in self.__get_pid_dirs():
-            logger.debug2(f"Extract content from: {dirname}")
+            if self.loggers.debug2:
+                logger.debug2(f"Extract content from: {dirname}")
             try:
                 # BUG https://stackoverflow.com/a/50958431/11869956
                 # BUG https://bugs.python.org/issue12782
@@ -1038,9 +1074,10 @@ class CheckProcRunning:
                                 current = int(uid.match(line).group(1))
                                 # Get the derive username
                                 name = pwd.getpwuid(current).pw_name
-                                logger.debug2("Extract successfully.")
+                                if self.loggers.debug2:
+                                    logger.debug2("Extract successfully.")
                                 yield (content, name, dirname)
-                    else:
+                    elif self.loggers.debug2:
                         logger.debug2(f"Skip current content: '{content}', "
                                   " no data founded")
             # IOError exception when pid is terminate between getting the 
@@ -1053,31 +1090,56 @@ class CheckProcRunning:
                                 + "skipping...")
                 continue 
     
+    def __get_start_time(self, dirname):
+        """
+        Get when the process started from field 'starttime'
+        of /proc/<pid>/stat (clock ticks since boot).
+        :return:
+            Timestamp else False.
+        """
+        logger = self.loggers('__get_start_time')
+        
+        try:
+            with open('/proc/stat', 'r') as stat:
+                boot = next(int(line.split()[1]) for line in stat
+                            if line.startswith('btime '))
+            with pathlib.Path(f'{dirname}/stat').open('r') as stat:
+                # Command name could hold spaces and parentheses
+                fields = stat.read().rsplit(')', 1)[1].split()
+            return boot + int(fields[19]) / os.sysconf('SC_CLK_TCK')
+        except (OSError, StopIteration, IndexError, ValueError) as error:
+            logger.debug(f"While getting start time from '{dirname}/stat':"
+                         f" {error}.")
+            return False
+    
     def __call__(self):
         """
         Check if specific process is running 
         using content from __get_content()
         """
-        logger = logging.getLogger(f'{self.logger_name}check::')
-        if self.advanced_debug:
-            logger.setLevel(logging.DEBUG2)
+        self.loggers.refresh()
+        logger = self.loggers('check')
         
         found = False
         internal_sync_syuppod = 0
         internal_sync_root = 0
         for cmdline, name, dirname in self.__get_content():
-            logger.debug2(f"Search from: '{cmdline}'.")
+            if self.loggers.debug2:
+                logger.debug2(f"Search from: '{cmdline}'.")
             for proc in 'world', 'system', 'sync', 'portage':
                 attr = getattr(self, proc)
-                logger.debug2(f"Use '{proc}' re: {attr}")
+                if self.loggers.debug2:
+                    logger.debug2(f"Use '{proc}' re: {attr}")
                 if attr.match(cmdline):
                     found = True
-                    logger.debug2("Got positive match.")
+                    if self.loggers.debug2:
+                        logger.debug2("Got positive match.")
                     if proc == 'world' or proc == 'system':
                         if self.pretend.match(cmdline):
                             found = False
-                            logger.debug2("NOT validate the match:"
-                                          + "pretend_opt.")
+                            if self.loggers.debug2:
+                                logger.debug2("NOT validate the match:"
+                                              + "pretend_opt.")
                     # For sync DONT match internals syncs
                     if proc == 'sync':
                         # TWO process is run using syuppod user (uid)
@@ -1125,18 +1187,477 @@ class CheckProcRunning:
                                            "got unexpected internal_sync_syuppod > 2")
                 
                 if found:
-                    logger.debug2("Validate the match.")
+                    if self.loggers.debug2:
+                        logger.debug2("Validate the match.")
                     logger.debug(f"{proc} process running from cmdline:"
                                  f" '{cmdline}' as user: "
                                  f"{name} and using: {dirname}")
-                    return { 'proc'  : proc, 
+                    return { 'proc'     : proc, 
                     # dirname: will return an PosixPath object
-                             'path'  : dirname } 
-                logger.debug2("No positive match.")
+                             'path'     : dirname,
+                             'started'  : self.__get_start_time(dirname) } 
+                if self.loggers.debug2:
+                    logger.debug2("No positive match.")
         logger.debug("No specific process running.")
         return False
 
 
+class RepoTimestamps:
+    """
+    Detect repositories sync from the files each sync method 
+    write, without reading emerge.log: only a few stat calls.
+    """
+    # Relative to the repository location
+    markers = (
+        # rsync
+        'metadata/timestamp.chk',
+        # emerge-webrsync (and older rsync tree)
+        'metadata/timestamp.x',
+        # git
+        '.git/FETCH_HEAD'
+        )
+    
+    def __init__(self, locations, synced=None):
+        """
+        :param locations:
+            Dictionary, repository name: location.
+        :param synced:
+            Names of the repositories which are synced (with 
+            a sync-uri). Default None (every one).
+        """
+        self.logger_name = f'::{__name__}::RepoTimestamps::'
+        self.locate(locations, synced)
+    
+    def locate(self, locations, synced=None):
+        """
+        Set repositories to check, the current state is 
+        the reference. See self.__init__().
+        """
+        logger = logging.getLogger(f'{self.logger_name}locate::')
+        
+        self.locations = locations
+        self.synced = list(locations) if synced is None else synced
+        self.stamps = self.stat()
+        logger.debug(f"Found sync marker(s) for {len(self.stamps)}"
+                     f" / {len(locations)} repositorie(s).")
+    
+    def stat(self):
+        """
+        Stat the markers of every repository. This is done
+        sequentially: a stat is a few µs, less than handing 
+        it to a thread.
+        :return:
+            Dictionary, repository name: tuple of (marker, inode, 
+            mtime, ctime), only repositories with a marker.
+        """
+        stamps = { }
+        for name, location in self.locations.items():
+            stamp = [ ]
+            for marker in self.markers:
+                try:
+                    stat = os.stat(os.path.join(location, marker))
+                except OSError:
+                    continue
+                # ctime too: rsync keep the server mtime
+                stamp.append((marker, stat.st_ino, stat.st_mtime_ns, 
+                              stat.st_ctime_ns))
+            if stamp:
+                stamps[name] = tuple(stamp)
+        return stamps
+    
+    def changed(self):
+        """
+        Get the repositories whose markers changed since last
+        call (or self.locate()).
+        :return:
+            Sorted list of repository names.
+        """
+        logger = logging.getLogger(f'{self.logger_name}changed::')
+        
+        stamps = self.stat()
+        changed = sorted(name for name in stamps.keys() | self.stamps.keys()
+                         if not stamps.get(name) == self.stamps.get(name))
+        self.stamps = stamps
+        if changed:
+            logger.debug(f"Sync marker(s) changed for: {', '.join(changed)}.")
+        return changed
+    
+    def covered(self):
+        """
+        Check if every synced repository have a marker: otherwise 
+        some syncs can't be detected. Local overlays (without 
+        sync-uri) don't have one and are never synced.
+        """
+        return all(name in self.stamps for name in self.synced)
+    
+    def directories(self):
+        """
+        Get the directories holding the markers, to watch 
+        them (markers are often replaced, not written).
+        :return:
+            Set of existing directories.
+        """
+        return { os.path.dirname(os.path.join(location, marker))
+                 for location in self.locations.values()
+                 for marker in self.markers
+                 if os.path.isdir(os.path.dirname(os.path.join(location, 
+                                                               marker))) }
+    
+    def watched(self, name):
+        """
+        Check if a file name, from a watched directory, 
+        is a marker.
+        """
+        return name in { os.path.basename(marker)
+                         for marker in self.markers }
+
+
+
+class PretendFingerprint:
+    """
+    Fingerprint of what emerge --pretend @world depend on: 
+    repositories, world set, configuration and installed 
+    packages. Only small reads and stat calls, so pretend_world() 
+    can reuse its last result when nothing changed.
+    """
+    def __init__(self, **kwargs):
+        """
+        :param world:
+            World set files. Default /var/lib/portage/world{,_sets}.
+        :param config:
+            Configuration directory. Default /etc/portage.
+        :param installed:
+            Installed packages database. Default /var/db/pkg.
+        """
+        self.logger_name = f'::{__name__}::PretendFingerprint::'
+        self.world = kwargs.get('world', ('/var/lib/portage/world',
+                                          '/var/lib/portage/world_sets'))
+        self.config = kwargs.get('config', '/etc/portage')
+        self.installed = kwargs.get('installed', '/var/db/pkg')
+    
+    def __call__(self, locations):
+        """
+        :param locations:
+            Dictionary, repository name: location.
+        :return:
+            'sha1-' followed by the hex digest.
+        """
+        logger = logging.getLogger(f'{self.logger_name}__call__::')
+        
+        parts = [ ('repo', name, self.repository(location))
+                  for name, location in sorted(locations.items()) ]
+        for path in self.world:
+            parts.append(('world', path, self.stat(path)))
+        parts.extend(self.walk(self.config))
+        try:
+            with os.scandir(self.installed) as entries:
+                # Merging (even the same version) rename a directory
+                # inside the category: its mtime change
+                parts.extend(sorted(('installed', entry.name, 
+                                     entry.stat().st_mtime_ns)
+                                    for entry in entries
+                                    if entry.is_dir(follow_symlinks=False)))
+        except OSError as error:
+            logger.error(f"While reading '{self.installed}': {error}.")
+        fingerprint = hashlib.sha1(repr(parts).encode()).hexdigest()
+        logger.debug(f"Fingerprint of {len(parts)} item(s): {fingerprint}.")
+        return f'sha1-{fingerprint}'
+    
+    def repository(self, location):
+        """
+        Get the state of a repository: the commit for git, the 
+        content of the timestamp file for rsync / webrsync, else
+        its directories mtimes (a local overlay).
+        """
+        git = os.path.join(location, '.git')
+        head = self.read(os.path.join(git, 'HEAD'))
+        if head:
+            if not head.startswith('ref: '):
+                # Detached
+                return head
+            ref = head[5:]
+            commit = self.read(os.path.join(git, ref))
+            if commit:
+                return commit
+            for line in (self.read(os.path.join(git, 'packed-refs'))
+                         or '').splitlines():
+                if line.endswith(f' {ref}'):
+                    return line.split()[0]
+            return head
+        for marker in 'metadata/timestamp.chk', 'metadata/timestamp.x':
+            if timestamp := self.read(os.path.join(location, marker)):
+                return timestamp
+        return tuple(self.walk(location, files=False))
+    
+    def walk(self, top, files=True):
+        """
+        Stat everything under top (without following links).
+        :return:
+            Sorted list of tuples (relative path, state).
+        """
+        logger = logging.getLogger(f'{self.logger_name}walk::')
+        
+        parts = [ ]
+        def onerror(error):
+            logger.error(f"While reading '{error.filename}': {error}.")
+        for dirpath, dirnames, filenames in os.walk(top, onerror=onerror):
+            parts.append((os.path.relpath(dirpath, top), self.stat(dirpath)))
+            # Links to directories are listed but not walked
+            names = [ name for name in dirnames
+                      if os.path.islink(os.path.join(dirpath, name)) ]
+            if files:
+                names.extend(filenames)
+            for name in names:
+                path = os.path.join(dirpath, name)
+                parts.append((os.path.relpath(path, top), self.stat(path)))
+        return sorted(parts)
+    
+    def stat(self, path):
+        """
+        :return:
+            Tuple (mtime, size), the target for a link or None
+            if path don't exist.
+        """
+        try:
+            if os.path.islink(path):
+                return os.readlink(path)
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def read(self, path):
+        """
+        :return:
+            The stripped content of a small file, None on error.
+        """
+        try:
+            with open(path) as myfile:
+                return myfile.read(4096).strip()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+
+
+class ChildCapture:
+    """
+    Run a command and capture its output (stdout and stderr
+    together) by chunks, reading only when poll() say
+    the fd is readable. Complete lines are handed to online()
+    as they arrive, so nothing is kept unless asked.
+    With tty=True the child get a pty as controlling terminal
+    (sudo could require one), otherwise plain pipes: cheaper and
+    no color escapes.
+    """
+    # What str.splitlines() split on
+    linebreaks = '\r\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+    
+    def __init__(self, cmd, args, tty=True, chunksize=65536, online=None,
+                 wakeup=None):
+        """
+        :param cmd:
+            The command to run.
+        :param args:
+            The arguments as a list.
+        :param tty:
+            Run the command on a pty else on pipes. Default True.
+        :param chunksize:
+            Maximum bytes by read. Default 64KiB.
+        :param online:
+            Called with each line (without its line break) as 
+            soon as it is complete. Default None: lines are kept, 
+            see self.lines().
+        :param wakeup:
+            A WakeupFd: its set() make read() return at once
+            (without reading). Default None.
+        """
+        self.logger_name = f'::{__name__}::ChildCapture::'
+        logger = logging.getLogger(f'{self.logger_name}init::')
+
+        self.chunksize = chunksize
+        self.captured = [ ]
+        self.online = online or self.captured.append
+        # A character can be split between two reads
+        self.decoder = codecs.getincrementaldecoder('utf-8')(
+                                                        errors='replace')
+        # Incomplete last line
+        self.pending = ''
+        self.eof = False
+        parent_exit = on_parent_exit()
+
+        if tty:
+            master, slave = os.openpty()
+            def preexec():
+                parent_exit()
+                # start_new_session already called setsid()
+                fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+            try:
+                self.proc = subprocess.Popen([ cmd, *args ], stdin=slave,
+                                             stdout=slave, stderr=slave,
+                                             start_new_session=True,
+                                             preexec_fn=preexec)
+            except:
+                os.close(master)
+                raise
+            finally:
+                # Otherwise master never hit EOF
+                os.close(slave)
+            self.fd = master
+        else:
+            self.proc = subprocess.Popen([ cmd, *args ],
+                                         stdin=subprocess.DEVNULL,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT,
+                                         preexec_fn=parent_exit)
+            self.fd = self.proc.stdout.fileno()
+
+        # POLLHUP / POLLERR are always reported
+        self.poller = select.poll()
+        self.poller.register(self.fd, select.POLLIN)
+        self.wakeup = wakeup
+        if wakeup:
+            self.poller.register(wakeup, select.POLLIN)
+        logger.debug(f"Running '{cmd}' (pid: {self.proc.pid}) on"
+                     f" {'a pty' if tty else 'pipes'}.")
+        self.tty = tty
+
+    def read(self, timeout=None):
+        """
+        Wait for output (at most timeout seconds, default
+        without limit) or self.wakeup, then read what is
+        available (up to self.chunksize bytes).
+        :return:
+            False when output reached EOF else True.
+        """
+        if self.eof:
+            return False
+        events = self.poller.poll(None if timeout is None 
+                                  else timeout * 1000)
+        if self.wakeup and any(fd == self.wakeup.fileno() 
+                               for fd, event in events):
+            self.wakeup.clear()
+            return True
+        if not events:
+            return True
+        try:
+            data = os.read(self.fd, self.chunksize)
+        except OSError as error:
+            # Linux raise EIO on the master once
+            # every slave fd are closed
+            if not error.errno == errno.EIO:
+                raise
+            data = b''
+        if not data:
+            self.eof = True
+            self._split(self.decoder.decode(b'', final=True), final=True)
+            return False
+        self._split(self.decoder.decode(data))
+        return True
+
+    def _split(self, text, final=False):
+        """
+        Hand the complete lines of text (after self.pending) 
+        to self.online(), keep the last one if incomplete.
+        """
+        lines = (self.pending + text).splitlines(keepends=True)
+        self.pending = ''
+        if lines and not final:
+            last = lines[-1]
+            # A '\r' could be the start of '\r\n'
+            if last[-1] == '\r' or not last[-1] in self.linebreaks:
+                self.pending = lines.pop()
+        for line in lines:
+            self.online(line.rstrip(self.linebreaks))
+
+    def lines(self):
+        """
+        Get the lines captured so far (only when 
+        called without online).
+        :return:
+            List of lines.
+        """
+        return self.captured
+
+    def wait(self):
+        """
+        Wait for the command then release the fd.
+        :return:
+            The return code.
+        """
+        status = self.proc.wait()
+        self.close()
+        return status
+
+    def terminate(self, timeout=5):
+        """
+        Stop the command: SIGTERM then, after timeout
+        seconds, SIGKILL.
+        """
+        logger = logging.getLogger(f'{self.logger_name}terminate::')
+
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                logger.debug(f"Pid {self.proc.pid} still running after"
+                             f" {timeout}s, killing it.")
+                self.proc.kill()
+                self.proc.wait()
+        self.close()
+
+    def close(self):
+        """
+        Release the fd (can be called many times).
+        """
+        if self.fd is None:
+            return
+        self.poller.unregister(self.fd)
+        if self.wakeup:
+            self.poller.unregister(self.wakeup)
+        if self.tty:
+            os.close(self.fd)
+        else:
+            self.proc.stdout.close()
+        self.fd = None
+
+
+
+
+class WakeupFd:
+    """
+    A fd which become readable on set(), to wake up a
+    thread waiting on poll() / select() from another one.
+    """
+    def __init__(self):
+        # Non blocking: set() never wait, clear() never hang
+        self.rfd, self.wfd = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+
+    def fileno(self):
+        return self.rfd
+
+    def set(self):
+        """
+        Make the fd readable (until clear()).
+        """
+        try:
+            os.write(self.wfd, b'\0')
+        except BlockingIOError:
+            # Pipe full: already readable
+            pass
+
+    def clear(self):
+        """
+        Drain the fd.
+        """
+        try:
+            while os.read(self.rfd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+
+
 # TODO Should we need logger ???
 # Taken from https://gist.github.com/evansd/2346614
 def on_parent_exit(signame='SIGTERM'):
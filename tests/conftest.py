@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import os
+import sys
+import logging
+
+import pytest
+
+# Test this syuppo, not an installed one
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from syuppo.logger import addLoggingLevel
+
+addLoggingLevel('DEBUG2', 9)
+
+
+@pytest.fixture
+def emergelog(tmp_path):
+    """
+    Write a synthetic emerge.log (see benchmarks.generator).
+    :return:
+        Function(lines, seed=0, world=0.3) -> path.
+    """
+    from benchmarks.generator import generate
+
+    def write(lines, seed=0, world=0.3):
+        path = str(tmp_path / f'emerge-{lines}-{seed}.log')
+        generate(path, lines, seed=seed, world=world)
+        return path
+    return write
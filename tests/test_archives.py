@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import os
+import gzip
+
+import pytest
+
+from syuppo import logparser
+from syuppo.logparser import EmergeLogParser
+
+
+@pytest.fixture
+def rotated(emergelog, tmp_path):
+    """
+    emerge.log.2.gz, emerge.log.1 and emerge.log from one
+    generated log.
+    :return:
+        Tuple (parser, expected): expected is every line
+        with its offset (negative in the rotated logs).
+    """
+    with open(emergelog(3000), 'rb') as myfile:
+        lines = myfile.readlines()
+    parts = [ b''.join(lines[:1000]), b''.join(lines[1000:2000]),
+              b''.join(lines[2000:]) ]
+    log = str(tmp_path / 'emerge.log')
+    with gzip.open(f'{log}.2.gz', 'wb') as myfile:
+        myfile.write(parts[0])
+    with open(f'{log}.1', 'wb') as myfile:
+        myfile.write(parts[1])
+    with open(log, 'wb') as myfile:
+        myfile.write(parts[2])
+    # Rotated logs are ordered by mtime
+    for age, name in ((20, f'{log}.2.gz'), (10, f'{log}.1')):
+        stat = os.stat(name)
+        os.utime(name, (stat.st_atime, stat.st_mtime - age))
+    
+    expected = [ ]
+    offset = - len(parts[0]) - len(parts[1])
+    for line in lines:
+        expected.append((offset, line.decode().rstrip()))
+        offset += len(line)
+    return EmergeLogParser(log=log), expected
+
+
+@pytest.mark.parametrize('segment', [ 8388608, 4096 ])
+def test_backlines(rotated, segment):
+    parser, expected = rotated
+    parser.segment = segment
+    assert list(parser.backlines()) == expected[::-1]
+
+
+def test_forwardlines(rotated):
+    parser, expected = rotated
+    for index in 0, 1, 500, 999, 1000, 1500, 2000, 2999:
+        start = expected[index][0]
+        assert list(parser.forwardlines(start)) == expected[index:]
+        end = expected[min(index + 300, 2999)][0]
+        assert (list(parser.forwardlines(start, end)) 
+                == expected[index:min(index + 300, 2999)])
+
+
+def test_archivesize(rotated, monkeypatch):
+    parser, expected = rotated
+    opened = [ ]
+    openarchive = EmergeLogParser.openarchive
+    monkeypatch.setattr(EmergeLogParser, 'openarchive', 
+                        lambda self, path: opened.append(path) 
+                                           or openarchive(self, path))
+    monkeypatch.setattr(logparser, '_archivesizes', { })
+    sizes = [ EmergeLogParser(log=parser.emergelog).archivesize(path)
+              for path in parser.getarchives() * 2 ]
+    assert sizes[:2] == sizes[2:]
+    assert sum(sizes[:2]) == - expected[0][0]
+    # Only the compressed one, only once for every parser
+    assert opened == [ f'{parser.emergelog}.2.gz' ]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import pytest
+
+from benchmarks.cancel import measure
+
+
+# Seconds allowed from WakeupFd.set() to _pexpect() returning 
+# (child killed and reaped), generous for a loaded machine
+BOUND = 0.5
+
+
+@pytest.mark.parametrize('tty', [ True, False ], ids=[ 'pty', 'pipe' ])
+def test_cancel(tty):
+    delay, _, status = measure(tty, True, 0.3)
+    assert status == 'exit'
+    assert delay < BOUND
+
+
+@pytest.mark.parametrize('tty', [ True, False ], ids=[ 'pty', 'pipe' ])
+def test_exit(tty):
+    delay, _, status = measure(tty, True, 0.3, order='exit')
+    assert status == 'exit'
+    assert delay < BOUND
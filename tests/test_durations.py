@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+from syuppo.logparser import EmergeLogScanner
+from syuppo.logparser import MergeDurations
+
+
+LINES = (
+    # Failed, then merged again with an other version
+    '1000:  >>> emerge (1 of 2) dev-qt/qtwebengine-5.15.2 to /',
+    '2000:  >>> emerge (1 of 2) dev-qt/qtwebengine-5.15.3-r1 to /',
+    '5000:  ::: completed emerge (1 of 2) dev-qt/qtwebengine-5.15.3-r1 to /',
+    # Never completed
+    '6000:  >>> emerge (2 of 2) sys-devel/gcc-10.2.0-r5 to /',
+    '900000:  >>> emerge (1 of 1) dev-lang/python-3.9.1_p1 to /',
+    )
+
+
+def test_merging(tmp_path):
+    path = tmp_path / 'emerge.log'
+    path.write_text('\n'.join(LINES) + '\n')
+    durations = MergeDurations(path=str(tmp_path / 'durations'),
+                               log=str(path))
+    EmergeLogScanner(durations, log=str(path))()
+    assert durations.packages == { 'dev-qt/qtwebengine': [ 1, 3000, 3000 ] }
+    # gcc is stale
+    assert durations.merging == {
+        'dev-lang/python': [ 'dev-lang/python-3.9.1_p1', 900000 ] }
+
+    loaded = MergeDurations(path=str(tmp_path / 'durations'), log=str(path))
+    assert loaded.merging == durations.merging
+    assert loaded.estimate([ 'dev-qt/qtwebengine-5.15.4::gentoo',
+                             'sys-devel/gcc-11.1.0' ]) == (3000, 1)
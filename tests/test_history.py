@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import os
+import gzip
+
+import pytest
+
+from syuppo.logparser import EmergeLogScanner
+from syuppo.logparser import WorldUpdateHistory
+
+
+def history(log, path):
+    """
+    Scan log with a WorldUpdateHistory kept in path.
+    :return:
+        Every recorded world update.
+    """
+    parser = WorldUpdateHistory(path=path, log=log)
+    EmergeLogScanner(parser, log=log)()
+    return parser.last()
+
+
+def rotate(log, number, compress):
+    """
+    Rotate log to log.number (like logrotate, compressed
+    or not) and start an empty log.
+    """
+    if compress:
+        with open(log, 'rb') as source:
+            with gzip.open(f'{log}.{number}.gz', 'wb') as destination:
+                destination.write(source.read())
+        os.unlink(log)
+    else:
+        os.rename(log, f'{log}.{number}')
+    open(log, 'wb').close()
+
+
+@pytest.mark.parametrize('compress', [ False, True ], 
+                         ids=[ 'plain', 'gzip' ])
+def test_rotated_twice(emergelog, tmp_path, compress):
+    with open(emergelog(4000, world=0.5), 'rb') as myfile:
+        lines = myfile.readlines()
+    parts = [ b''.join(lines[start:start + 1000]) 
+              for start in range(0, 4000, 1000) ]
+    # Every parts in one log
+    whole = str(tmp_path / 'whole' / 'emerge.log')
+    os.makedirs(os.path.dirname(whole))
+    with open(whole, 'wb') as myfile:
+        myfile.write(b''.join(parts))
+    expected = history(whole, str(tmp_path / 'whole' / 'history'))
+    assert len(expected) > 4
+    
+    # Scanned after the first part, then two parts are 
+    # appended and the log is rotated twice: the end
+    # of the log read last time is now emerge.log.2
+    log = str(tmp_path / 'rotated' / 'emerge.log')
+    path = str(tmp_path / 'rotated' / 'history')
+    os.makedirs(os.path.dirname(log))
+    with open(log, 'wb') as myfile:
+        myfile.write(parts[0])
+    history(log, path)
+    with open(log, 'ab') as myfile:
+        myfile.write(parts[1])
+    rotate(log, 2, compress)
+    with open(log, 'wb') as myfile:
+        myfile.write(parts[2])
+    rotate(log, 1, compress)
+    with open(log, 'wb') as myfile:
+        myfile.write(parts[3])
+    # Rotated logs are ordered by mtime
+    for age, name in ((20, 'emerge.log.2'), (10, 'emerge.log.1')):
+        name = f'{name}.gz' if compress else name
+        name = os.path.join(os.path.dirname(log), name)
+        os.utime(name, (os.stat(name).st_atime, os.stat(name).st_mtime - age))
+    
+    assert history(log, path) == expected
+
+
+def test_file(emergelog, tmp_path):
+    log = emergelog(4000, world=0.5)
+    path = str(tmp_path / 'history')
+    expected = history(log, path)
+    with open(path, 'rb') as myfile:
+        data = myfile.read()
+    # Header then 28 bytes records, padding zeroed
+    assert len(data) == WorldUpdateHistory.header.size + 28 * len(expected)
+    assert all(data[offset:offset + 3] == b'\0\0\0' for offset 
+               in range(WorldUpdateHistory.header.size + 25, len(data), 28))
+    loaded = WorldUpdateHistory(path=path, log=log)
+    assert loaded.last() == expected
+    assert loaded.records['start'].tolist() == [ entry[0] 
+                                                 for entry in expected ]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import pytest
+
+from benchmarks.parallel import scan
+from syuppo import logparser
+from syuppo.logparser import EmergeLogParser
+
+
+# Small chunks so a small log is split in many of them
+CHUNKSIZE = 65536
+
+
+@pytest.fixture(autouse=True)
+def pools():
+    yield
+    logparser._shutdown_pools()
+
+
+def test_serial_by_default(emergelog):
+    assert EmergeLogParser(log=emergelog(10)).workers == 0
+
+
+@pytest.mark.parametrize('seed', [ 0, 1 ])
+def test_same_events(emergelog, seed):
+    path = emergelog(20000, seed=seed)
+    tokenizer = EmergeLogParser(log=path, workers=2, chunksize=CHUNKSIZE)
+    end = tokenizer.getstat()[1]
+    assert len(tokenizer.getchunks(0, end)) > 2
+    serial = [ (offset, line, tokenizer.tokenize(line))
+               for offset, line in tokenizer.forwardlines(0, end) ]
+    assert list(tokenizer.forwardevents(0, end)) == serial
+    # The pool is kept: a second call give the same
+    assert list(tokenizer.forwardevents(0, end)) == serial
+    assert len(logparser._pools) == 1
+
+
+def test_same_events_from_middle(emergelog):
+    path = emergelog(20000)
+    tokenizer = EmergeLogParser(log=path, workers=2, chunksize=CHUNKSIZE)
+    end = tokenizer.getstat()[1]
+    start = end // 3
+    serial = list(EmergeLogParser(log=path).forwardevents(start, end))
+    assert list(tokenizer.forwardevents(start, end)) == serial
+
+
+def test_same_scan(emergelog, tmp_path):
+    path = emergelog(20000)
+    # Same workdir: scan() starts from scratch
+    _, serial = scan(path, str(tmp_path), 0, CHUNKSIZE)
+    _, parallel = scan(path, str(tmp_path), 2, CHUNKSIZE)
+    assert parallel == serial
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import os
+
+from syuppo.logparser import EmergeLogParser
+from syuppo.logparser import EmergeLogScanner
+from syuppo.logparser import LastWorldUpdate
+from syuppo.logparser import MergeDurations
+from syuppo.logparser import SyncHistory
+from syuppo.logparser import WorldUpdateHistory
+
+
+def test_one_forward_reading(emergelog, tmp_path, monkeypatch):
+    path = emergelog(5000)
+    calls = [ ]
+    forwardevents = EmergeLogParser.forwardevents
+    monkeypatch.setattr(EmergeLogParser, 'forwardevents', 
+                        lambda self, *args: calls.append(args) 
+                                            or forwardevents(self, *args))
+    history = WorldUpdateHistory(path=str(tmp_path / 'history'), log=path)
+    durations = MergeDurations(path=str(tmp_path / 'durations'), log=path)
+    syncs = SyncHistory(path=str(tmp_path / 'syncs'), log=path)
+    EmergeLogScanner(LastWorldUpdate(log=path), history, durations, syncs,
+                     log=path)()
+    # Every event once for the three of them (LastWorldUpdate 
+    # parse its candidates)
+    assert calls.count((0, os.path.getsize(path))) == 1
+    assert len(history) and durations.packages and syncs.summary()
+
+
+def test_own_checkpoint(emergelog, tmp_path):
+    path = emergelog(5000)
+    with open(path, 'rb') as myfile:
+        lines = myfile.readlines()
+    with open(path, 'wb') as myfile:
+        myfile.writelines(lines[:2500])
+    # Up to date history, durations never parsed
+    history = WorldUpdateHistory(path=str(tmp_path / 'history'), log=path)
+    EmergeLogScanner(history, log=path)()
+    with open(path, 'ab') as myfile:
+        myfile.writelines(lines[2500:])
+    history = WorldUpdateHistory(path=str(tmp_path / 'history'), log=path)
+    durations = MergeDurations(log=path)
+    EmergeLogScanner(history, durations, log=path)()
+    
+    alone = WorldUpdateHistory(log=path)
+    fresh = MergeDurations(log=path)
+    EmergeLogScanner(alone, fresh, log=path)()
+    assert history.last() == alone.last()
+    assert durations.packages == fresh.packages
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# -*- python -*-
+# Part of syuppo package
+# Copyright © 2019-2021 Venturi Jérôme : jerome dot Venturi at gmail dot com
+# Distributed under the terms of the GNU General Public License v3
+
+import pytest
+
+from syuppo.logparser import EmergeLogParser
+from syuppo.logparser import EmergeLogProcess
+from syuppo.logparser import EmergeLogTimeline
+from syuppo.logparser import LastWorldUpdate
+
+
+def world_logged(path, since):
+    """
+    Reference: read every line.
+    """
+    parser = EmergeLogParser(log=path)
+    for offset, line, (timestamp, kind, fields) in parser.forwardevents():
+        if timestamp >= since and kind == 'emerge' and 'world' in fields:
+            return True
+    return False
+
+
+@pytest.fixture
+def parsers(emergelog, tmp_path):
+    """
+    EmergeLogProcess with the timeline, like the daemon.
+    """
+    path = emergelog(5000, world=0.1)
+    process = EmergeLogProcess([
+                ('lastworld', LastWorldUpdate, { 'log' : path }),
+                ('timeline', EmergeLogTimeline, { 'log' : path })
+                ],
+                index={ 'log' : path }, log=path)
+    yield path, process
+    process.shutdown()
+
+
+def test_world_logged(parsers):
+    path, process = parsers
+    world, lines = process()
+    assert process.local is None
+    parser = EmergeLogParser(log=path)
+    assert lines == sum(1 for offset, line, (timestamp, kind, fields) 
+                        in parser.forwardevents()
+                        if kind == 'emerge' and 'world' in fields)
+    timeline = EmergeLogTimeline(log=path)
+    timeline.update(*timeline.getstat())
+    first = int(timeline.timestamps[0])
+    last = int(timeline.timestamps[len(timeline) - 1])
+    found = set()
+    for since in [ *range(first, last, max(1, (last - first) // 50)), 
+                   last, last + 1 ]:
+        expected = world_logged(path, since)
+        found.add(expected)
+        assert process.call('timeline', 'world_logged', since) == expected
+        assert timeline.world_logged(since) == expected
+    # Both answers have been checked
+    assert found == { True, False }
+
+
+def test_appended(parsers):
+    path, process = parsers
+    process()
+    last = process.call('timeline', 'find_offset', 2 ** 62)
+    with open(path, 'a') as myfile:
+        myfile.write(f'{2 ** 40}:  *** emerge --update --deep @world\n')
+    assert not process.call('timeline', 'world_logged', 2 ** 40)
+    world, lines = process()
+    assert process.call('timeline', 'find_offset', 2 ** 40) == last
+    assert process.call('timeline', 'world_logged', 2 ** 40)